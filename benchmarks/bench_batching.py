@@ -0,0 +1,91 @@
+"""Run throughput of a LangChain entrypoint with and without micro-batching.
+
+The fake runnable models a provider where every request pays a fixed
+round-trip (``--call-ms``) plus a small cost per input (``--item-ms``) and at
+most ``--provider-slots`` requests are served at once (rate limits, connection
+caps), so ``batch`` amortizes both across inputs. Runs go through
+``LangChainAdapter.execute`` on ``--workers`` threads, as in the inline
+executor or a worker with that concurrency.
+
+Usage: python benchmarks/bench_batching.py [--runs 200] [--workers 16]
+    [--call-ms 50] [--item-ms 2] [--provider-slots 4] [--max-size 16]
+    [--latency-ms 5]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from unified_agent_interface.frameworks.batching import (
+    get_micro_batcher,
+    reset_micro_batcher,
+)
+from unified_agent_interface.frameworks.langchain import LangChainAdapter
+
+
+class FakeRunnable:
+    def __init__(self, call_ms: float, item_ms: float, slots: int) -> None:
+        self.call = call_ms / 1000.0
+        self.item = item_ms / 1000.0
+        self.slots = threading.Semaphore(slots)
+
+    def invoke(self, inputs):
+        with self.slots:
+            time.sleep(self.call + self.item)
+        return {"text": inputs["text"].upper()}
+
+    def batch(self, inputs, return_exceptions=False):
+        with self.slots:
+            time.sleep(self.call + self.item * len(inputs))
+        return [{"text": i["text"].upper()} for i in inputs]
+
+
+def bench(max_size: int, latency_ms: float, runnable, runs: int, workers: int):
+    """Runs per second, and the batcher's stats afterwards."""
+    os.environ["UAI_BATCH_MAX_SIZE"] = str(max_size)
+    os.environ["UAI_BATCH_MAX_LATENCY_MS"] = str(latency_ms)
+    reset_micro_batcher()
+    adapter = LangChainAdapter()
+
+    def run(i: int) -> str:
+        return adapter.execute(runnable, task_id=f"bench-{i}", initial_payload=f"r{i}")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(workers) as pool:
+        results = list(pool.map(run, range(runs)))
+    elapsed = time.perf_counter() - start
+    assert results == [f"R{i}" for i in range(runs)]
+    return runs / elapsed, get_micro_batcher().stats()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--call-ms", type=float, default=50.0)
+    parser.add_argument("--item-ms", type=float, default=2.0)
+    parser.add_argument("--provider-slots", type=int, default=4)
+    parser.add_argument("--max-size", type=int, default=16)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    runnable = FakeRunnable(args.call_ms, args.item_ms, args.provider_slots)
+    try:
+        single, _ = bench(1, 0, runnable, args.runs, args.workers)
+        batched, stats = bench(
+            args.max_size, args.latency_ms, runnable, args.runs, args.workers
+        )
+    finally:
+        reset_micro_batcher()
+
+    print(f"{'mode':24} {'runs/s':>10} {'mean batch':>11}")
+    print(f"{'invoke per run':24} {single:10.1f} {1:11.1f}")
+    print(f"{'micro-batched':24} {batched:10.1f} {stats['mean_size']:11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Per-turn dispatch overhead in the chat path, before and after execution profiles.
+
+Uses a trivial echo adapter so the timings are almost entirely the work done
+around ``chat_respond``: config lookup, adapter resolution, artifact settings
+and context setup. "before" repeats the per-turn resolution the chat agent did
+prior to `ExecutionProfile`; "profile" is `ConfiguredChatAgent.respond`.
+
+Usage: python benchmarks/bench_chat_dispatch.py [--turns 20000] [--repeat 5]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from unified_agent_interface.artifacts import artifact_tracking_context
+from unified_agent_interface.components.agents.chat_configured import (
+    ConfiguredChatAgent,
+)
+from unified_agent_interface.config import current_config, load_kosmos_agent_config
+from unified_agent_interface.frameworks import get_adapter
+from unified_agent_interface.models.chat import Message
+from unified_agent_interface.runtime import session_context
+
+ADAPTER = """
+from unified_agent_interface.frameworks.base import RuntimeAdapter
+
+
+class EchoAdapter(RuntimeAdapter):
+    def name(self):
+        return "echo"
+
+    def execute(self, entrypoint_obj, *, task_id, initial_payload, config_dir=None):
+        return str(initial_payload)
+
+    def supports_chat(self):
+        return True
+
+    def chat_respond(self, entrypoint_obj, *, session_id, user_input, state, config_dir=None):
+        return user_input
+"""
+
+
+def _before_turn(cfg, session_id: str, text: str) -> Message:
+    cfg = current_config(cfg)
+    adapter = get_adapter(
+        (cfg.runtime or "").lower(),
+        adapter_path=cfg.adapter or cfg.raw.get("adapter") or cfg.raw.get("adopter"),
+        base_dir=cfg.base_dir,
+    )
+    if not adapter.supports_chat():
+        raise NotImplementedError
+    arts = cfg.raw.get("artifacts") or {}
+    enabled = str(arts.get("tracking") or "").lower() == "auto"
+    env_mode = os.getenv("UAI_ARTIFACTS")
+    if env_mode is not None:
+        enabled = env_mode.lower() == "auto"
+    inc = os.getenv("UAI_ARTIFACTS_INCLUDE")
+    exc = os.getenv("UAI_ARTIFACTS_EXCLUDE")
+    base = os.getenv("UAI_ARTIFACTS_BASEDIR") or arts.get("base_dir") or cfg.base_dir
+    with (
+        session_context(session_id),
+        artifact_tracking_context(
+            enabled,
+            include=[s.strip() for s in inc.split(",") if s.strip()] if inc else None,
+            exclude=[s.strip() for s in exc.split(",") if s.strip()] if exc else None,
+            base_dir=str(base),
+        ),
+    ):
+        reply = adapter.chat_respond(
+            cfg.entrypoint,
+            session_id=session_id,
+            user_input=text,
+            state=None,
+            config_dir=cfg.base_dir,
+        )
+    return Message(role="assistant", content=reply)
+
+
+def _timed(fn, turns: int, repeat: int) -> float:
+    """Best-of-`repeat` mean microseconds per turn."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for i in range(turns):
+            fn(i)
+        best = min(best, (time.perf_counter() - start) * 1e6 / turns)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--turns", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        (Path(tmp) / "echo_adapter.py").write_text(ADAPTER)
+        toml = Path(tmp) / "kosmos.toml"
+        toml.write_text(
+            '[agent]\nruntime = "echo"\nadapter = "echo_adapter:EchoAdapter"\n'
+            'entrypoint = "unused:agent"\n'
+        )
+        cfg = load_kosmos_agent_config(str(toml))
+        agent = ConfiguredChatAgent(cfg)
+        agent.respond("warmup", "hi")
+
+        before = _timed(
+            lambda i: _before_turn(cfg, "s", f"m{i}"), args.turns, args.repeat
+        )
+        after = _timed(lambda i: agent.respond("s", f"m{i}"), args.turns, args.repeat)
+
+    print(f"{'mode':24} {'us/turn':>10}")
+    print(f"{'per-turn resolution':24} {before:10.2f}")
+    print(f"{'execution profile':24} {after:10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Per-job overhead of resolving the entrypoint, with and without the cache.
+
+The agent module simulates a heavy framework import (``--import-ms``) and is
+loaded from a file next to kosmos.toml, like the examples, so an uncached job
+re-executes it every time.
+
+Usage: python benchmarks/bench_entrypoint_cache.py [--jobs 20] [--import-ms 200]
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from unified_agent_interface.entrypoints import EntrypointCache
+from unified_agent_interface.runtime import task_context
+
+
+def bench(cache: EntrypointCache, config_dir: str, jobs: int) -> float:
+    """Mean milliseconds per job spent outside the agent's own work."""
+    start = time.perf_counter()
+    for i in range(jobs):
+        cache.load_env(config_dir)
+        obj, adapter = cache.resolve(
+            "callable", "heavy_agent:run", config_dir=config_dir
+        )
+        with task_context(f"bench-{i}"):
+            adapter.execute(obj, task_id=f"bench-{i}", initial_payload="x")
+    return (time.perf_counter() - start) * 1000 / jobs
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--jobs", type=int, default=20)
+    parser.add_argument("--import-ms", type=float, default=200.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        (Path(tmp) / "heavy_agent.py").write_text(
+            "import time\n"
+            f"time.sleep({args.import_ms / 1000!r})\n"
+            "def run(payload):\n"
+            "    return 'ok'\n"
+        )
+        cold = bench(EntrypointCache(enabled=False), tmp, args.jobs)
+        warm_cache = EntrypointCache()
+        warm_cache.resolve("callable", "heavy_agent:run", config_dir=tmp)  # preload
+        warm = bench(warm_cache, tmp, args.jobs)
+
+    print(f"{'mode':24} {'ms/job':>10}")
+    print(f"{'uncached (before)':24} {cold:10.2f}")
+    print(f"{'cached, preloaded':24} {warm:10.3f}")
+
+
+if __name__ == "__main__":
+    main()
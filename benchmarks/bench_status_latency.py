@@ -0,0 +1,128 @@
+"""Status-read latency while chat turns keep the server busy.
+
+Concurrent clients send chat turns to an adapter that sleeps `--turn-ms`
+per reply, while a probe reads ``GET /run/{id}`` in a loop. Reported are
+p50/p99 of those reads with no chat traffic and under load, once with the
+agent sharing Starlette's threadpool (``UAI_AGENT_THREADS=0``, the behaviour
+before agent threads) and once on a dedicated pool. With a shared pool the
+turns hold every thread and status reads queue behind them; with agent
+threads the p99 should stay close to the idle figure.
+
+Usage: python benchmarks/bench_status_latency.py [--chat-load 80] [--turn-ms 200]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from unified_agent_interface.app import get_app
+from unified_agent_interface.executor import shutdown_inline_executor
+
+ADAPTER = """
+import time
+
+from unified_agent_interface.frameworks.base import RuntimeAdapter
+
+
+class SlowAdapter(RuntimeAdapter):
+    def name(self):
+        return "slow"
+
+    def execute(self, entrypoint_obj, *, task_id, initial_payload, config_dir=None):
+        return str(initial_payload)
+
+    def supports_chat(self):
+        return True
+
+    def chat_respond(self, entrypoint_obj, *, session_id, user_input, state, config_dir=None):
+        time.sleep(float(user_input) / 1000)
+        return user_input
+"""
+
+
+def _percentiles(samples: list[float]) -> tuple[float, float]:
+    q = statistics.quantiles(samples, n=100)
+    return q[49], q[98]
+
+
+def _probe(client: TestClient, task_id: str, reads: int) -> list[float]:
+    samples = []
+    for _ in range(reads):
+        start = time.perf_counter()
+        client.get(f"/run/{task_id}")
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def _measure(agent_threads: int, args: argparse.Namespace) -> tuple:
+    os.environ["UAI_AGENT_THREADS"] = str(agent_threads)
+    shutdown_inline_executor()
+    with TestClient(get_app()) as client:
+        task_id = client.post("/run/", json={"input": "x"}).json()["task_id"]
+        sessions = [client.post("/chat/").json()["session_id"] for _ in range(4)]
+        idle = _probe(client, task_id, args.reads)
+
+        stop = threading.Event()
+
+        def _chat(i: int) -> None:
+            session_id = sessions[i % len(sessions)]
+            while not stop.is_set():
+                client.post(
+                    f"/chat/{session_id}", json={"user_input": str(args.turn_ms)}
+                )
+
+        load = [
+            threading.Thread(target=_chat, args=(i,)) for i in range(args.chat_load)
+        ]
+        for t in load:
+            t.start()
+        time.sleep(args.turn_ms / 1000 * 2)  # let the turns fill the threads
+        busy = _probe(client, task_id, args.reads)
+        stop.set()
+        for t in load:
+            t.join()
+    shutdown_inline_executor()
+    return _percentiles(idle), _percentiles(busy)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chat-load", type=int, default=80)
+    parser.add_argument("--turn-ms", type=int, default=200)
+    parser.add_argument("--reads", type=int, default=200)
+    parser.add_argument("--agent-threads", type=int, default=40)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        (Path(tmp) / "slow_adapter.py").write_text(ADAPTER)
+        toml = Path(tmp) / "kosmos.toml"
+        toml.write_text(
+            '[agent]\nruntime = "slow"\nadapter = "slow_adapter:SlowAdapter"\n'
+            'entrypoint = "unused:agent"\n'
+        )
+        os.environ.update(
+            KOSMOS_TOML=str(toml), UAI_PROCRASTINATE_INLINE="1", UAI_STORAGE="memory"
+        )
+        rows = [
+            ("shared threadpool", _measure(0, args)),
+            (f"{args.agent_threads} agent threads", _measure(args.agent_threads, args)),
+        ]
+
+    print(
+        f"{'mode':22} {'idle p50':>9} {'idle p99':>9} {'load p50':>9} {'load p99':>9}"
+    )
+    for name, ((idle50, idle99), (busy50, busy99)) in rows:
+        print(f"{name:22} {idle50:9.2f} {idle99:9.2f} {busy50:9.2f} {busy99:9.2f}")
+    print("(milliseconds per GET /run/{id})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Compare create/get/append_log throughput of the storage backends.
+
+Usage: python benchmarks/bench_storage.py [--runs 5000] [--logs 20]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+from typing import Callable, Dict
+
+from unified_agent_interface.components.storage.memory import InMemoryStorage
+from unified_agent_interface.components.storage.sqlite import SQLiteStorage
+from unified_agent_interface.models.run import LogEntry
+
+
+def _rate(n: int, fn: Callable[[], None]) -> float:
+    start = time.perf_counter()
+    fn()
+    return n / (time.perf_counter() - start)
+
+
+def bench(storage, runs: int, logs: int) -> Dict[str, float]:
+    ids: list[str] = []
+
+    def create() -> None:
+        for _ in range(runs):
+            ids.append(storage.create_run("input", {}).id)
+
+    def append() -> None:
+        entry = LogEntry(message="x" * 80)
+        for tid in ids:
+            for _ in range(logs):
+                storage.append_run_log(tid, entry)
+
+    def get() -> None:
+        for tid in ids:
+            storage.get_run(tid)
+
+    result = {
+        "create/s": _rate(runs, create),
+        "append_log/s": _rate(runs * logs, append),
+        "get/s": _rate(runs, get),
+    }
+    flush = getattr(storage, "flush", None)
+    if callable(flush):
+        flush()
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5000)
+    parser.add_argument("--logs", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        backends = {
+            "memory": InMemoryStorage(),
+            "sqlite": SQLiteStorage(os.path.join(tmp, "bench.db")),
+            "sqlite (commit per write)": SQLiteStorage(
+                os.path.join(tmp, "bench-unbatched.db"), batch_size=1
+            ),
+        }
+        print(f"{'backend':28} {'create/s':>12} {'append_log/s':>14} {'get/s':>12}")
+        for name, storage in backends.items():
+            r = bench(storage, args.runs, args.logs)
+            print(
+                f"{name:28} {r['create/s']:12.0f} {r['append_log/s']:14.0f} {r['get/s']:12.0f}"
+            )
+            close = getattr(storage, "close", None)
+            if callable(close):
+                close()
+
+
+if __name__ == "__main__":
+    main()
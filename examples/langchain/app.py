@@ -24,13 +24,20 @@ prompt = ChatPromptTemplate(
     ]
 )
 
-memory = ConversationBufferWindowMemory(memory_key="chat_history", return_messages=True)
 
-chain = LLMChain(
-    llm=ChatOpenAI(),
-    prompt=prompt,
-    memory=memory,
-)
+def make_chain() -> LLMChain:
+    """Build a chain with its own memory; used as the per-session factory."""
+    memory = ConversationBufferWindowMemory(
+        memory_key="chat_history", return_messages=True
+    )
+    return LLMChain(
+        llm=ChatOpenAI(),
+        prompt=prompt,
+        memory=memory,
+    )
+
+
+chain = make_chain()
 
 
 # if __name__ == "__main__":
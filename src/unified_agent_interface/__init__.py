@@ -169,12 +169,19 @@ def cli() -> None:  # pragma: no cover
         url: str = typer.Option(
             "http://localhost:8000", "--url", help="Base server URL"
         ),
+        delete: bool = typer.Option(
+            False, "--delete", help="Also delete the run and its logs"
+        ),
     ) -> None:
-        """Cancel/stop a run (deletes it from in-memory storage)."""
+        """Cancel/stop a run; it is kept with status `cancelled` unless --delete."""
         _load_dotenv_if_present()
         import httpx as _httpx
 
-        r = _httpx.delete(url.rstrip("/") + f"/run/{task_id}", timeout=30)
+        base = url.rstrip("/") + f"/run/{task_id}"
+        if delete:
+            r = _httpx.delete(base, timeout=30)
+        else:
+            r = _httpx.post(base + "/cancel", timeout=30)
         r.raise_for_status()
         _print(r.json() if r.text else {"ok": True}, title="Run Cancelled")
 
@@ -184,9 +191,12 @@ def cli() -> None:  # pragma: no cover
         url: str = typer.Option(
             "http://localhost:8000", "--url", help="Base server URL"
         ),
+        delete: bool = typer.Option(
+            False, "--delete", help="Also delete the run and its logs"
+        ),
     ) -> None:
         """Alias for cancel."""
-        run_cancel(task_id=task_id, url=url)
+        run_cancel(task_id=task_id, url=url, delete=delete)
 
     @run_app.command("watch")
     def run_watch(
@@ -200,90 +210,151 @@ def cli() -> None:  # pragma: no cover
         verbose: bool = typer.Option(
             True, "--verbose/--quiet", help="Print status changes"
         ),
+        stream: bool = typer.Option(
+            True,
+            "--stream/--poll",
+            help="Follow the server-sent event stream (falls back to polling)",
+        ),
     ) -> None:
         """Watch a run, prompting for input when required, until completion."""
         import time as _time
-        from contextlib import nullcontext
 
         _load_dotenv_if_present()
-        prev_status = None
-        prev_input_len = None
-        prev_log_len = 0
+        # Logs already shown; shared by the stream and the polling fallback
+        log_cursor = 0
+
+        def _show_status(status: str | None, inputs: int, prompt: str | None) -> None:
+            if not verbose:
+                return
+            if JSON_OUTPUT:
+                typer.echo(json.dumps({"event": "status", "status": status, "inputs": inputs}))
+            else:
+                console.print(
+                    f"[bold]status[/bold]=[cyan]{status}[/cyan] inputs=[magenta]{inputs}[/magenta]"
+                )
+            if prompt and status == "waiting_input":
+                _show_prompt(prompt)
+
+        def _show_prompt(prompt: str) -> None:
+            if JSON_OUTPUT:
+                typer.echo(json.dumps({"event": "prompt", "prompt": prompt}))
+            else:
+                console.print(f"[yellow]input_prompt[/yellow]: {prompt}")
+
+        def _show_log(entry: dict) -> None:
+            nonlocal log_cursor
+            log_cursor += 1
+            level = (entry.get("level") or "INFO").upper()
+            ts = entry.get("timestamp")
+            msg = entry.get("message")
+            if JSON_OUTPUT:
+                typer.echo(json.dumps({"event": "log", "level": level, "timestamp": ts, "message": msg}))
+            else:
+                style = {
+                    "DEBUG": "dim",
+                    "INFO": "cyan",
+                    "WARNING": "yellow",
+                    "WARN": "yellow",
+                    "ERROR": "red",
+                    "CRITICAL": "bold red",
+                }.get(level, "white")
+                console.print(f"[{style}]{level:7}[/] {ts} {msg}")
+
+        def _ask_input(prompt: str | None) -> None:
+            text = typer.prompt(prompt or "Awaiting human input...")
+            if text.strip() == "":
+                if not JSON_OUTPUT:
+                    typer.echo("Empty input, not sending. Press Ctrl+C to exit.")
+            else:
+                _http_post(url, f"/run/{task_id}/input", {"input": text})
+
+        def _finish(status: str | None) -> None:
+            # Fetch the full run once for the final summary
+            data = _http_get(url, f"/run/{task_id}")
+            if JSON_OUTPUT:
+                _print(data)
+            else:
+                # Show final result if present
+                result = data.get("result_text")
+                if result:
+                    console.rule("Result")
+                    console.print(result)
+                _print({
+                    "id": data.get("id"),
+                    "status": status,
+                    "artifacts": len(data.get("artifacts") or []),
+                    "logs": len(data.get("logs") or []),
+                }, title="Run Finished")
+
+        def _watch_stream() -> bool:
+            """Follow `/run/{id}/events`; False if the stream is unavailable or drops."""
+            import httpx  # lazy import
+
+            path = f"/run/{task_id}/events?logs_after={log_cursor}"
+            try:
+                with httpx.stream(
+                    "GET",
+                    url.rstrip("/") + path,
+                    timeout=httpx.Timeout(60.0, connect=10.0),
+                ) as r:
+                    if r.status_code != 200:
+                        return False
+                    event = None
+                    for line in r.iter_lines():
+                        if line.startswith("event:"):
+                            event = line[6:].strip()
+                            continue
+                        if not line.startswith("data:"):
+                            continue
+                        data = json.loads(line[5:])
+                        if event == "status":
+                            _show_status(data.get("status"), int(data.get("inputs") or 0), None)
+                        elif event == "log":
+                            _show_log(data)
+                        elif event == "waiting_input":
+                            prompt = data.get("prompt") or None
+                            if verbose and prompt:
+                                _show_prompt(prompt)
+                            _ask_input(prompt)
+                        elif event == "complete":
+                            _finish(data.get("status"))
+                            return True
+                        elif event == "deleted":
+                            if not JSON_OUTPUT:
+                                console.print("[yellow]Run deleted[/yellow]")
+                            return True
+            except httpx.HTTPError:
+                pass
+            return False
+
         try:
+            if stream and _watch_stream():
+                return
+            prev_status = None
+            prev_input_len = None
             while True:
-                data = _http_get(url, f"/run/{task_id}")
+                # Only logs past the cursor are transferred; input_cursor is the input count
+                data = _http_get(url, f"/run/{task_id}/updates?logs_after={log_cursor}")
                 status = data.get("status")
-                ibuf = data.get("input_buffer") or []
                 prompt = data.get("input_prompt") or None
-                logs = data.get("logs") or []
-
-                if verbose and (
-                    status != prev_status
-                    or (
-                        isinstance(ibuf, list)
-                        and prev_input_len is not None
-                        and len(ibuf) != prev_input_len
-                    )
+                input_cursor = int(data.get("input_cursor") or 0)
+
+                if status != prev_status or (
+                    prev_input_len is not None and input_cursor != prev_input_len
                 ):
-                    if JSON_OUTPUT:
-                        typer.echo(json.dumps({"event": "status", "status": status, "inputs": len(ibuf) if isinstance(ibuf, list) else 0}))
-                    else:
-                        console.print(
-                            f"[bold]status[/bold]=[cyan]{status}[/cyan] inputs=[magenta]{len(ibuf) if isinstance(ibuf, list) else 0}[/magenta]"
-                        )
-                    if prompt and status == "waiting_input":
-                        if JSON_OUTPUT:
-                            typer.echo(json.dumps({"event": "prompt", "prompt": prompt}))
-                        else:
-                            console.print(f"[yellow]input_prompt[/yellow]: {prompt}")
+                    _show_status(status, input_cursor, prompt)
                 prev_status = status
-                prev_input_len = len(ibuf) if isinstance(ibuf, list) else prev_input_len
+                prev_input_len = input_cursor
 
                 # Stream new logs as they arrive
-                if isinstance(logs, list) and len(logs) > prev_log_len:
-                    new_logs = logs[prev_log_len:]
-                    for entry in new_logs:
-                        level = (entry.get("level") or "INFO").upper()
-                        ts = entry.get("timestamp")
-                        msg = entry.get("message")
-                        if JSON_OUTPUT:
-                            typer.echo(json.dumps({"event": "log", "level": level, "timestamp": ts, "message": msg}))
-                        else:
-                            style = {
-                                "DEBUG": "dim",
-                                "INFO": "cyan",
-                                "WARNING": "yellow",
-                                "WARN": "yellow",
-                                "ERROR": "red",
-                                "CRITICAL": "bold red",
-                            }.get(level, "white")
-                            console.print(f"[{style}]{level:7}[/] {ts} {msg}")
-                    prev_log_len = len(logs)
-
-                if status in ("completed", "failed", "cancelled"):
-                    if JSON_OUTPUT:
-                        _print(data)
-                    else:
-                        # Show final result if present
-                        result = data.get("result_text")
-                        if result:
-                            console.rule("Result")
-                            console.print(result)
-                        _print({
-                            "id": data.get("id"),
-                            "status": status,
-                            "artifacts": len(data.get("artifacts") or []),
-                            "logs": len(data.get("logs") or []),
-                        }, title="Run Finished")
+                for entry in data.get("logs") or []:
+                    _show_log(entry)
+
+                if status in ("completed", "failed", "cancelled", "timed_out"):
+                    _finish(status)
                     break
                 if status == "waiting_input":
-                    ask = prompt or "Awaiting human input..."
-                    text = typer.prompt(ask)
-                    if text.strip() == "":
-                        if not JSON_OUTPUT:
-                            typer.echo("Empty input, not sending. Press Ctrl+C to exit.")
-                    else:
-                        _http_post(url, f"/run/{task_id}/input", {"input": text})
+                    _ask_input(prompt)
                     # Continue immediately to re-check status
                     continue
                 _time.sleep(max(0.1, interval))
@@ -412,9 +483,21 @@ def cli() -> None:  # pragma: no cover
         )
 
     @worker_app.command("start")
-    def worker_start() -> None:
+    def worker_start(
+        concurrency: t.Optional[int] = typer.Option(
+            None,
+            "--concurrency",
+            "-c",
+            help="Jobs run at once in this process (default: UAI_WORKER_CONCURRENCY or [agent.worker] concurrency, else 1)",
+        ),
+    ) -> None:
         """Install schema and start Procrastinate worker (requires DATABASE_URL/PROCRASTINATE_DSN)."""
-        from .queue import get_procrastinate_app
+        from .executor import get_loop_executor
+        from .queue import (
+            get_procrastinate_app,
+            get_worker_executor,
+            worker_concurrency,
+        )
 
         _load_dotenv_if_present()
         papp = get_procrastinate_app()
@@ -434,9 +517,48 @@ def cli() -> None:  # pragma: no cover
         except Exception as e:
             raise RuntimeError(f"DB connection check failed: {e}")
 
+        # Import the configured agent now so the first job starts warm
+        cfg = None
+        try:
+            from .config import load_kosmos_agent_config
+            from .entrypoints import get_entrypoint_cache
+
+            cfg = load_kosmos_agent_config()
+            get_entrypoint_cache().preload(cfg)
+        except Exception as e:
+            typer.echo(f"Entrypoint preload skipped: {e}")
+
+        from .direct import direct_storage
+
+        if direct_storage() is not None:
+            typer.echo("Writing run updates directly to shared storage")
+
+        # Report runs that finished while the server was unreachable last time
+        from .completion import CompletionSpool, replay_spool
+
+        spool = CompletionSpool()
+        if spool.pending():
+            sent = replay_spool(spool)
+            typer.echo(
+                f"Replayed {sent} spooled completion(s); {spool.pending()} left in {spool.directory}"
+            )
+
+        # Route input() per run before jobs start on concurrent threads
+        from .runtime import install_input_shim
+
+        install_input_shim()
+
+        # A run parked on human input ends its Procrastinate job early and
+        # continues on the worker executor, so `concurrency` counts only
+        # runs that are computing.
+        concurrency = concurrency or worker_concurrency(cfg)
+        get_worker_executor(cfg, concurrency)
+        # Async agents skip the threads: they share one event loop per worker
+        get_loop_executor(cfg)
+
         # Try common worker APIs across versions
         with papp.open():
-            papp.run_worker()  # type: ignore[attr-defined]
+            papp.run_worker(concurrency=concurrency)  # type: ignore[attr-defined]
 
     @worker_app.command("install")
     def worker_install() -> None:
@@ -1,11 +1,15 @@
-from typing import List
+from typing import AsyncIterator, List, Set
+import asyncio
 import uuid
 
 from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 
 from ..components.agents.base import Agent
 from ..components.agents.chat_configured import ConfiguredChatAgent
 from ..components.storage.base import Storage
+from .run import _sse, run_agent_call
 from ..models.chat import (
     Artifact,
     ChatSession,
@@ -19,6 +23,9 @@ from ..models.chat import (
 
 router = APIRouter()
 
+# Streamed chat turns in flight; holding them keeps the tasks from being collected
+_turns: Set[asyncio.Future] = set()
+
 
 def get_storage(req: Request) -> Storage:
     return req.app.state.storage
@@ -33,12 +40,12 @@ def get_agent(req: Request) -> Agent:
 
 
 @router.get("/", response_model=List[ChatSession])
-def list_chats(storage: Storage = Depends(get_storage)) -> List[ChatSession]:
-    return storage.list_chats()
+async def list_chats(storage: Storage = Depends(get_storage)) -> List[ChatSession]:
+    return await run_in_threadpool(storage.list_chats)
 
 
 @router.post("/next", response_model=NextResponse)
-def next_step(
+async def next_step(
     payload: NextRequest, req: Request, agent: Agent = Depends(get_agent)
 ) -> NextResponse:
     # Stateless chat is not available for LangChain; require a session
@@ -50,38 +57,48 @@ def next_step(
             status_code=400,
             detail="Stateless chat is not supported for LangChain. Create a session first.",
         )
-    state, artifacts, _ = agent.next(payload.state or {}, payload.user_input or "")
+    state, artifacts, _ = await run_agent_call(
+        req, agent.next, payload.state or {}, payload.user_input or ""
+    )
     return NextResponse(state=state, artifacts=artifacts)
 
 
 @router.post("/", response_model=CreateChatResponse)
-def create_chat(storage: Storage = Depends(get_storage)) -> CreateChatResponse:
-    session = storage.create_chat()
+async def create_chat(
+    storage: Storage = Depends(get_storage),
+) -> CreateChatResponse:
+    session = await run_in_threadpool(storage.create_chat)
     return CreateChatResponse(session_id=session.id)
 
 
 @router.post("/{session_id}")
-def send_message(
+async def send_message(
     session_id: str,
     payload: SendMessageRequest,
+    req: Request,
     storage: Storage = Depends(get_storage),
     agent: Agent = Depends(get_agent),
 ):
-    session = storage.get_chat(session_id)
+    session = await run_in_threadpool(storage.get_chat, session_id)
     if session is None:
         raise HTTPException(status_code=404, detail="Session not found")
 
     # User message
     user_msg = Message(role="user", content=payload.user_input or "")
-    storage.add_message(session_id, user_msg)
+    await run_in_threadpool(storage.add_message, session_id, user_msg)
+
+    # Agent response on the agent threads; waits and returns reply
+    artifacts, reply = await run_agent_call(
+        req, agent.respond, session_id, payload.user_input or ""
+    )
 
-    # Agent response (sync; waits and returns reply)
-    artifacts, reply = agent.respond(session_id, payload.user_input or "")
-    if reply:
-        storage.add_message(session_id, reply)
+    def _store() -> None:
+        if reply:
+            storage.add_message(session_id, reply)
+        for art in artifacts:
+            storage.add_artifact(session_id, art)
 
-    for art in artifacts:
-        storage.add_artifact(session_id, art)
+    await run_in_threadpool(_store)
 
     return {
         "state": {},
@@ -90,54 +107,141 @@ def send_message(
     }
 
 
+@router.post("/{session_id}/stream")
+async def stream_message(
+    session_id: str,
+    payload: SendMessageRequest,
+    req: Request,
+    storage: Storage = Depends(get_storage),
+    agent: Agent = Depends(get_agent),
+) -> StreamingResponse:
+    """Send a message and receive the reply as server-sent events.
+
+    Events: `token` (`{text}`) for each piece of the reply as the agent
+    produces it, then `message` with the stored assistant `Message` and any
+    artifacts, or `error`. The reply is stored once it is complete, even if
+    the client disconnects first.
+    """
+    if await run_in_threadpool(storage.get_chat, session_id) is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    user_input = payload.user_input or ""
+    await run_in_threadpool(
+        storage.add_message, session_id, Message(role="user", content=user_input)
+    )
+
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+
+    def _put(item: tuple) -> None:
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, item)
+        except RuntimeError:  # loop already closed
+            pass
+
+    def _turn() -> None:
+        try:
+            respond_stream = getattr(agent, "respond_stream", None)
+            if callable(respond_stream):
+                artifacts, reply = respond_stream(
+                    session_id, user_input, lambda text: _put(("token", text))
+                )
+            else:
+                artifacts, reply = agent.respond(session_id, user_input)
+                if reply is not None:
+                    _put(("token", reply.content))
+            if reply:
+                storage.add_message(session_id, reply)
+            for art in artifacts:
+                storage.add_artifact(session_id, art)
+            _put(("message", (reply, artifacts)))
+        except Exception as e:
+            _put(("error", str(e)))
+
+    async def _events() -> AsyncIterator[str]:
+        while True:
+            kind, value = await queue.get()
+            if kind == "token":
+                if value:
+                    yield _sse("token", {"text": value})
+                continue
+            if kind == "error":
+                yield _sse("error", {"detail": value})
+            else:
+                reply, artifacts = value
+                yield _sse(
+                    "message",
+                    {
+                        "message": reply.model_dump(mode="json") if reply else None,
+                        "artifacts": [a.model_dump(mode="json") for a in artifacts],
+                    },
+                )
+            return
+
+    # The turn runs to completion on an agent thread; the response only relays it
+    turn = asyncio.ensure_future(run_agent_call(req, _turn))
+    _turns.add(turn)
+    turn.add_done_callback(_turns.discard)
+    return StreamingResponse(
+        _events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.delete("/{session_id}")
-def delete_chat(session_id: str, storage: Storage = Depends(get_storage)):
-    ok = storage.delete_chat(session_id)
+async def delete_chat(
+    session_id: str, req: Request, storage: Storage = Depends(get_storage)
+):
+    ok = await run_in_threadpool(storage.delete_chat, session_id)
     if not ok:
         raise HTTPException(status_code=404, detail="Session not found")
+    agent = getattr(req.app.state, "chat_agent", None)
+    end = getattr(agent, "end_session", None)
+    if callable(end):
+        await run_agent_call(req, end, session_id)
     return {"ok": True}
 
 
 @router.get("/{session_id}/messages", response_model=List[Message])
-def get_messages(
+async def get_messages(
     session_id: str, storage: Storage = Depends(get_storage)
 ) -> List[Message]:
-    msgs = storage.get_messages(session_id)
+    msgs = await run_in_threadpool(storage.get_messages, session_id)
     if msgs is None:
         raise HTTPException(status_code=404, detail="Session not found")
     return msgs
 
 
 @router.get("/{session_id}/artifacts", response_model=List[Artifact])
-def list_artifacts(
+async def list_artifacts(
     session_id: str, storage: Storage = Depends(get_storage)
 ) -> List[Artifact]:
-    arts = storage.get_artifacts(session_id)
+    arts = await run_in_threadpool(storage.get_artifacts, session_id)
     if arts is None:
         raise HTTPException(status_code=404, detail="Session not found")
     return arts
 
 
 @router.get("/{session_id}/artifacts/{artifact_id}", response_model=Artifact)
-def get_artifact(
+async def get_artifact(
     session_id: str, artifact_id: str, storage: Storage = Depends(get_storage)
 ) -> Artifact:
-    art = storage.get_artifact(session_id, artifact_id)
+    art = await run_in_threadpool(storage.get_artifact, session_id, artifact_id)
     if art is None:
         raise HTTPException(status_code=404, detail="Artifact not found")
     return art
 
 
 @router.post("/{session_id}/artifacts", response_model=Artifact)
-def add_artifact(
+async def add_artifact(
     session_id: str, payload: dict, storage: Storage = Depends(get_storage)
 ) -> Artifact:
-    session = storage.get_chat(session_id)
+    session = await run_in_threadpool(storage.get_chat, session_id)
     if session is None:
         raise HTTPException(status_code=404, detail="Session not found")
     data = dict(payload or {})
     if not data.get("id"):
         data["id"] = str(uuid.uuid4())
     art = Artifact(**data)
-    storage.add_artifact(session_id, art)
+    await run_in_threadpool(storage.add_artifact, session_id, art)
     return art
@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from . import chat, run
+from . import chat, run, storage
 
 
 api_router = APIRouter()
@@ -8,3 +8,4 @@ api_router = APIRouter()
 # Grouped routers
 api_router.include_router(chat.router, prefix="/chat", tags=["chat"])
 api_router.include_router(run.router, prefix="/run", tags=["run"])
+api_router.include_router(storage.router, prefix="/storage", tags=["storage"])
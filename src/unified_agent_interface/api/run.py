@@ -1,54 +1,178 @@
-from typing import List
+from typing import Any, AsyncIterator, Callable, List, Optional
+import asyncio
+import functools
+import json
 import uuid
 
-from fastapi import APIRouter, Depends, HTTPException, Request
+import anyio
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 
+from ..components.events import RunEventHub
+from ..deadlines import resolve_deadline
+from ..executor import QueueFullError
 from ..components.storage.base import Storage
 from ..models.run import (
+    TERMINAL_STATUSES,
     CreateRunRequest,
     CreateRunResponse,
+    LogBatch,
     LogEntry,
+    NextInputResponse,
+    OutputChunk,
     RunArtifact,
     RunStatusResponse,
+    RunTask,
+    RunUpdates,
 )
 
 
 router = APIRouter()
 
+# Comment lines keep idle event streams alive through proxies
+SSE_HEARTBEAT_SECONDS = 15.0
+
 
 def get_storage(req: Request) -> Storage:
     return req.app.state.storage
 
 
+def get_events(req: Request) -> RunEventHub:
+    return req.app.state.events
+
+
+async def run_agent_call(req: Request, fn: Callable[..., Any], *args: Any) -> Any:
+    """Run blocking agent work on the app's agent threads.
+
+    Handlers that only touch storage use Starlette's threadpool; chat turns
+    and run dispatch go through `app.state.agent_limiter` (see
+    `agent_thread_limit`), so a burst of slow agents leaves that pool free.
+    """
+    limiter = getattr(req.app.state, "agent_limiter", None)
+    return await anyio.to_thread.run_sync(functools.partial(fn, *args), limiter=limiter)
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def _run_events(
+    task_id: str,
+    storage: Storage,
+    hub: RunEventHub,
+    log_cursor: int,
+    artifact_cursor: int,
+    output_cursor: int = 0,
+) -> AsyncIterator[str]:
+    # Subscribe before the first read so no mutation falls in between
+    sub = hub.subscribe(task_id)
+    try:
+        status = prompt = None
+        inputs = -1
+        while True:
+            up = await run_in_threadpool(
+                storage.get_run_updates,
+                task_id,
+                logs_after=log_cursor,
+                artifacts_after=artifact_cursor,
+                output_after=output_cursor,
+            )
+            if up is None:
+                yield _sse("deleted", {"id": task_id})
+                return
+            if up.status != status or up.input_cursor != inputs:
+                yield _sse(
+                    "status",
+                    {
+                        "id": up.id,
+                        "status": up.status,
+                        "estimated_completion_time": up.estimated_completion_time,
+                        "inputs": up.input_cursor,
+                    },
+                )
+            for log in up.logs:
+                yield _sse("log", log.model_dump(mode="json"))
+            for art in up.artifacts:
+                yield _sse("artifact", art.model_dump(mode="json"))
+            if up.output:
+                yield _sse("output", {"text": up.output})
+            # After a new input, the same prompt text is a new question
+            if up.status == "waiting_input" and (
+                status != "waiting_input"
+                or up.input_prompt != prompt
+                or up.input_cursor != inputs
+            ):
+                yield _sse("waiting_input", {"prompt": up.input_prompt})
+            if up.status in TERMINAL_STATUSES:
+                yield _sse(
+                    "complete", {"status": up.status, "result_text": up.result_text}
+                )
+                return
+            status, prompt, inputs = up.status, up.input_prompt, up.input_cursor
+            log_cursor, artifact_cursor = up.log_cursor, up.artifact_cursor
+            output_cursor = up.output_cursor
+            if not await sub.wait(SSE_HEARTBEAT_SECONDS):
+                yield ": keep-alive\n\n"
+    finally:
+        sub.close()
+
+
 @router.get("/", response_model=List[RunStatusResponse])
-def list_runs(storage: Storage = Depends(get_storage)) -> List[RunStatusResponse]:
-    tasks = storage.list_runs()
+async def list_runs(
+    storage: Storage = Depends(get_storage),
+) -> List[RunStatusResponse]:
+    tasks = await run_in_threadpool(storage.list_runs)
     return [RunStatusResponse(**t.model_dump()) for t in tasks]
 
 
-@router.post("/", response_model=CreateRunResponse)
-def create_run(
-    payload: CreateRunRequest | None = None,
-    storage: Storage = Depends(get_storage),
-    req: Request = None,
-):
-    params = (payload.params if payload else None) or {}
+def _create_run(
+    storage: Storage, agent: Any, payload: CreateRunRequest | None, params: dict
+) -> CreateRunResponse:
     task = storage.create_run(
         initial_input=payload.input if payload else None, params=params
     )
-    # Use configured run agent (from kosmos.toml)
-    agent = req.app.state.run_agent  # type: ignore[attr-defined]
-    agent.on_create(task, payload.input if payload else None)
+    try:
+        agent.on_create(task, payload.input if payload else None)
+    except QueueFullError as e:
+        storage.delete_run(task.id)
+        raise HTTPException(
+            status_code=503, detail=str(e), headers={"Retry-After": "5"}
+        )
     return CreateRunResponse(
         task_id=task.id, estimated_completion_time=task.estimated_completion_time
     )
 
 
+@router.post("/", response_model=CreateRunResponse)
+async def create_run(
+    req: Request,
+    payload: CreateRunRequest | None = None,
+    storage: Storage = Depends(get_storage),
+):
+    params = (payload.params if payload else None) or {}
+    try:
+        resolve_deadline(params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # Use configured run agent (from kosmos.toml); dispatch may defer to Postgres
+    agent = req.app.state.run_agent  # type: ignore[attr-defined]
+    return await run_agent_call(req, _create_run, storage, agent, payload, params)
+
+
+@router.get("/stats")
+async def run_stats(req: Request) -> dict:
+    """Run duration quantiles per runtime/entrypoint, queue depth and current ETA."""
+    agent = req.app.state.run_agent  # type: ignore[attr-defined]
+    stats = getattr(agent, "stats", None)
+    return await run_in_threadpool(stats) if callable(stats) else {}
+
+
 @router.get("/{task_id}", response_model=RunStatusResponse)
-def get_run_status(
+async def get_run_status(
     task_id: str, storage: Storage = Depends(get_storage), req: Request = None
 ) -> RunStatusResponse:
-    task = storage.get_run(task_id)
+    task = await run_in_threadpool(storage.get_run, task_id)
     if task is None:
         raise HTTPException(status_code=404, detail="Task not found")
     # Advance task by configured agent rules
@@ -57,8 +181,92 @@ def get_run_status(
     return RunStatusResponse(**task.model_dump())
 
 
+@router.get("/{task_id}/updates", response_model=RunUpdates)
+async def get_run_updates(
+    task_id: str,
+    logs_after: Optional[int] = Query(default=None, ge=0),
+    inputs_after: Optional[int] = Query(default=None, ge=0),
+    artifacts_after: Optional[int] = Query(default=None, ge=0),
+    output_after: Optional[int] = Query(default=None, ge=0),
+    limit: Optional[int] = Query(default=None, ge=1),
+    storage: Storage = Depends(get_storage),
+) -> RunUpdates:
+    """Status plus only the logs/inputs/artifacts/output past the given cursors.
+
+    Lists whose cursor is omitted come back empty; the returned `*_cursor`
+    fields are the values to pass on the next call.
+    """
+    updates = await run_in_threadpool(
+        storage.get_run_updates,
+        task_id,
+        logs_after=logs_after,
+        inputs_after=inputs_after,
+        artifacts_after=artifacts_after,
+        output_after=output_after,
+        limit=limit,
+    )
+    if updates is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return updates
+
+
+@router.get("/{task_id}/events")
+async def stream_run_events(
+    task_id: str,
+    logs_after: int = Query(default=0, ge=0),
+    artifacts_after: int = Query(default=0, ge=0),
+    output_after: int = Query(default=0, ge=0),
+    storage: Storage = Depends(get_storage),
+    hub: RunEventHub = Depends(get_events),
+) -> StreamingResponse:
+    """Server-sent events for a run, pushed as storage records each change.
+
+    Events: `status`, `log`, `artifact`, `output` (streamed result text),
+    `waiting_input`, then `complete` (or `deleted`) before the stream closes.
+    Logs, artifacts and output past the given cursors are replayed first.
+    """
+    if await run_in_threadpool(storage.get_run, task_id) is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return StreamingResponse(
+        _run_events(task_id, storage, hub, logs_after, artifacts_after, output_after),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _cancel(task: RunTask, storage: Storage, req: Request) -> None:
+    storage.update_run(
+        task.id, status="cancelled", estimated_completion_time=None, input_prompt=None
+    )
+    agent = getattr(req.app.state, "run_agent", None)
+    on_cancel = getattr(agent, "on_cancel", None)
+    if callable(on_cancel):
+        on_cancel(task)
+
+
+@router.post("/{task_id}/cancel")
+def cancel_run(task_id: str, req: Request, storage: Storage = Depends(get_storage)):
+    """Mark the run `cancelled` and stop its agent; logs and artifacts are kept.
+
+    The agent stops at its next cancellation point (log post, instrumented
+    call, input wait); a job still queued in Postgres is not started.
+    """
+    task = storage.get_run(task_id)
+    if task is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    if task.status in TERMINAL_STATUSES:
+        raise HTTPException(status_code=409, detail=f"Task already {task.status}")
+    _cancel(task, storage, req)
+    return {"ok": True, "status": "cancelled"}
+
+
 @router.delete("/{task_id}")
-def cancel_run(task_id: str, storage: Storage = Depends(get_storage)):
+def delete_run(task_id: str, req: Request, storage: Storage = Depends(get_storage)):
+    task = storage.get_run(task_id)
+    if task is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    if task.status not in TERMINAL_STATUSES:
+        _cancel(task, storage, req)
     ok = storage.delete_run(task_id)
     if not ok:
         raise HTTPException(status_code=404, detail="Task not found")
@@ -75,84 +283,178 @@ def provide_input(
     task = storage.get_run(task_id)
     if task is None:
         raise HTTPException(status_code=404, detail="Task not found")
+    if task.status in TERMINAL_STATUSES:
+        raise HTTPException(status_code=409, detail=f"Task already {task.status}")
     storage.append_run_input(task_id, payload.input or "")
     agent = req.app.state.run_agent  # type: ignore[attr-defined]
     agent.on_input(task, payload.input or "")
     # Resume running
-    task.status = "running"
+    storage.update_run(task_id, status="running")
     return {"ok": True}
 
 
+@router.get("/{task_id}/input/next", response_model=NextInputResponse)
+async def next_input(
+    task_id: str,
+    after: int = Query(default=0, ge=0),
+    timeout: float = Query(default=30.0, ge=0, le=120),
+    storage: Storage = Depends(get_storage),
+    hub: RunEventHub = Depends(get_events),
+) -> NextInputResponse:
+    """Long-poll for the input at index `after`.
+
+    Blocks until `POST /run/{id}/input` appends it, the run finishes, or
+    `timeout` seconds pass; the wait is woken by storage mutations.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    sub = hub.subscribe(task_id)
+    try:
+        while True:
+            up = await run_in_threadpool(
+                storage.get_run_updates, task_id, inputs_after=after, limit=1
+            )
+            if up is None:
+                raise HTTPException(status_code=404, detail="Task not found")
+            if up.inputs:
+                return NextInputResponse(
+                    input=up.inputs[0], cursor=after + 1, status=up.status
+                )
+            remaining = deadline - loop.time()
+            if up.status in TERMINAL_STATUSES or remaining <= 0:
+                return NextInputResponse(cursor=after, status=up.status)
+            await sub.wait(remaining)
+    finally:
+        sub.close()
+
+
 @router.get("/{task_id}/artifacts", response_model=List[RunArtifact])
-def list_run_artifacts(
+async def list_run_artifacts(
     task_id: str, storage: Storage = Depends(get_storage)
 ) -> List[RunArtifact]:
-    arts = storage.get_run_artifacts(task_id)
+    arts = await run_in_threadpool(storage.get_run_artifacts, task_id)
     if arts is None:
         raise HTTPException(status_code=404, detail="Task not found")
     return arts
 
 
 @router.get("/{task_id}/artifacts/{artifact_id}", response_model=RunArtifact)
-def get_run_artifact(
+async def get_run_artifact(
     task_id: str, artifact_id: str, storage: Storage = Depends(get_storage)
 ) -> RunArtifact:
-    art = storage.get_single_run_artifact(task_id, artifact_id)
+    art = await run_in_threadpool(storage.get_single_run_artifact, task_id, artifact_id)
     if art is None:
         raise HTTPException(status_code=404, detail="Artifact not found")
     return art
 
 
 @router.post("/{task_id}/artifacts", response_model=RunArtifact)
-def add_run_artifact(
+async def add_run_artifact(
     task_id: str, payload: dict, storage: Storage = Depends(get_storage)
 ) -> RunArtifact:
-    task = storage.get_run(task_id)
-    if task is None:
-        raise HTTPException(status_code=404, detail="Task not found")
     data = dict(payload or {})
     if not data.get("id"):
         data["id"] = str(uuid.uuid4())
     art = RunArtifact(**data)
-    storage.add_run_artifact(task_id, art)
+    try:
+        await run_in_threadpool(storage.add_run_artifact, task_id, art)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Task not found")
     return art
 
 
 @router.post("/{task_id}/logs")
-def send_logs(task_id: str, payload: LogEntry, storage: Storage = Depends(get_storage)):
-    task = storage.get_run(task_id)
-    if task is None:
+async def send_logs(
+    task_id: str, payload: LogEntry, storage: Storage = Depends(get_storage)
+):
+    # Storage raises KeyError for unknown runs; no read of the whole run first
+    try:
+        await run_in_threadpool(storage.append_run_log, task_id, payload)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return {"ok": True}
+
+
+@router.post("/{task_id}/logs/batch")
+async def send_log_batch(
+    task_id: str, payload: LogBatch, storage: Storage = Depends(get_storage)
+):
+    try:
+        await run_in_threadpool(storage.append_run_logs, task_id, payload.logs)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return {"ok": True, "count": len(payload.logs)}
+
+
+@router.post("/{task_id}/output")
+async def append_output(
+    task_id: str, payload: OutputChunk, storage: Storage = Depends(get_storage)
+):
+    """Append streamed result text to the run's `partial_result`."""
+    try:
+        await run_in_threadpool(storage.append_run_output, task_id, payload.text)
+    except KeyError:
         raise HTTPException(status_code=404, detail="Task not found")
-    storage.append_run_log(task_id, payload)
     return {"ok": True}
 
 
 @router.post("/{task_id}/wait")
-def wait_for_input(
+async def wait_for_input(
     task_id: str, payload: dict, storage: Storage = Depends(get_storage)
 ):
-    task = storage.get_run(task_id)
-    if task is None:
+    # Status only: `get_run_updates` without cursors skips logs and artifacts
+    up = await run_in_threadpool(storage.get_run_updates, task_id)
+    if up is None:
         raise HTTPException(status_code=404, detail="Task not found")
-    task.status = "waiting_input"
-    task.estimated_completion_time = None
-    task.input_prompt = str(payload.get("prompt") or "")
+    if up.status in TERMINAL_STATUSES:
+        return {"ok": False, "status": up.status}
+    await run_in_threadpool(
+        storage.update_run,
+        task_id,
+        status="waiting_input",
+        estimated_completion_time=None,
+        input_prompt=str(payload.get("prompt") or ""),
+    )
     return {"ok": True}
 
 
 @router.post("/{task_id}/complete")
 def complete_run(
     task_id: str,
-    payload: dict,  # expects {status: completed|failed, result_text?: str}
+    payload: dict,  # expects {status: completed|failed|cancelled|timed_out, result_text?: str, duration?: float}
+    req: Request,
     storage: Storage = Depends(get_storage),
 ):
+    """Record the run's final status; idempotent, so workers can retry safely.
+
+    A run that already reached a terminal status keeps it and the call
+    answers `{ok: true, status: <stored status>}`.
+    """
     task = storage.get_run(task_id)
     if task is None:
         raise HTTPException(status_code=404, detail="Task not found")
     status = payload.get("status")
-    if status not in ("completed", "failed"):
+    if status not in TERMINAL_STATUSES:
         raise HTTPException(status_code=400, detail="Invalid status")
-    task.status = status
-    task.result_text = payload.get("result_text")
-    task.estimated_completion_time = None
+    agent = getattr(req.app.state, "run_agent", None)
+    on_complete = getattr(agent, "on_complete", None)
+    if task.status in ("cancelled", "timed_out"):
+        # A cancel or expired deadline wins over whatever the worker finished with
+        if callable(on_complete):
+            on_complete(task, task.status)
+        return {"ok": True, "status": task.status}
+    if task.status in TERMINAL_STATUSES:
+        # Repeated delivery (e.g. a retry after a lost response): nothing to do
+        return {"ok": True, "status": task.status}
+    storage.update_run(
+        task_id,
+        status=status,
+        result_text=payload.get("result_text"),
+        estimated_completion_time=None,
+    )
+    if callable(on_complete):
+        duration = payload.get("duration")
+        if not isinstance(duration, (int, float)) or duration < 0:
+            duration = None
+        on_complete(task, status, duration)
     return {"ok": True}
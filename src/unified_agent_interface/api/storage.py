@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Depends, Request
+from starlette.concurrency import run_in_threadpool
+
+from ..components.storage.base import Storage
+
+
+router = APIRouter()
+
+
+def get_storage(req: Request) -> Storage:
+    return req.app.state.storage
+
+
+@router.get("/stats")
+async def storage_stats(storage: Storage = Depends(get_storage)) -> dict:
+    # Backends with retention expose sizes and eviction counters via stats()
+    stats = getattr(storage, "stats", None)
+    data = await run_in_threadpool(stats) if callable(stats) else {}
+    backend = getattr(storage, "inner", storage)
+    return {"backend": type(backend).__name__, **data}
@@ -1,22 +1,72 @@
+from contextlib import asynccontextmanager
+
+import anyio
 from fastapi import FastAPI
 
 from .api.router import api_router
-from .components.storage.memory import InMemoryStorage
+from .components.events import NotifyingStorage, RunChangeListener, RunEventHub
+from .components.storage import create_storage
 from .config import load_kosmos_agent_config
+from .direct import direct_storage_enabled
+from .executor import (
+    agent_thread_limit,
+    inline_mode,
+    shutdown_inline_executor,
+    shutdown_loop_executor,
+)
+from .frameworks.output_stream import set_local_output_sink
 from .components.agents.configured import ConfiguredRunAgent
 from .components.agents.chat_configured import ConfiguredChatAgent
 
 
 def get_app() -> FastAPI:
-    app = FastAPI(title="Unified Agent Interface", version="0.1.0")
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        # Workers writing straight to shared storage announce changes through
+        # the backend; relay them to watchers and the run agent
+        listener = None
+        if direct_storage_enabled(cfg) and callable(
+            getattr(app.state.storage, "listen_runs", None)
+        ):
+
+            def _on_change(task_id: str) -> None:
+                app.state.events.publish(task_id)
+                app.state.run_agent.on_remote_update(task_id)
+
+            listener = RunChangeListener(app.state.storage, _on_change)
+            listener.start()
+        # Agent work in handlers gets its own threads (see `run_agent_call`)
+        threads = agent_thread_limit(cfg)
+        app.state.agent_limiter = anyio.CapacityLimiter(threads) if threads else None
+        # Inline runs execute in this process: stream their output straight to storage
+        if inline_mode():
+            set_local_output_sink(app.state.storage.append_run_output)
+        yield
+        if listener is not None:
+            listener.stop()
+        # Stop taking inline runs; those in flight finish in the background
+        shutdown_inline_executor(wait=False)
+        shutdown_loop_executor(wait=False)
+        if inline_mode():
+            set_local_output_sink(None)
+        # Flush batched writes of persistent backends on shutdown
+        close = getattr(app.state.storage, "close", None)
+        if callable(close):
+            close()
 
-    # Initialize in-memory storage (placeholder; swap with Postgres/Redis later)
-    app.state.storage = InMemoryStorage()
+    app = FastAPI(title="Unified Agent Interface", version="0.1.0", lifespan=lifespan)
 
     # Load kosmos agent configuration and prepare agents
     cfg = load_kosmos_agent_config()
-    app.state.run_agent = ConfiguredRunAgent(cfg)
+
+    # Storage backend is selected via `[agent.storage]` or `UAI_STORAGE` (default: memory)
+    # Run mutations are published to the hub, which wakes `/run/{id}/events` streams
+    app.state.events = RunEventHub()
+    app.state.storage = NotifyingStorage(create_storage(cfg), app.state.events)
+
+    app.state.run_agent = ConfiguredRunAgent(cfg, storage=app.state.storage)
     app.state.chat_agent = ConfiguredChatAgent(cfg)
+    app.state.agent_limiter = None  # created on startup, inside the event loop
 
     # Mount API
     app.include_router(api_router)
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional
+
+
+class RunCancelled(BaseException):
+    """Raised inside a run once it has been cancelled.
+
+    Like `asyncio.CancelledError` it derives from `BaseException`, so agent
+    code that catches `Exception` does not swallow it.
+    """
+
+
+class RunTimedOut(RunCancelled):
+    """Raised inside a run once its deadline has passed."""
+
+
+def _check_interval() -> float:
+    try:
+        return float(os.getenv("UAI_CANCEL_CHECK_INTERVAL", "2"))
+    except ValueError:
+        return 2.0
+
+
+def _remote_status(task_id: str) -> Optional[str]:
+    """Run status from the server; "deleted" on 404, None if unreachable."""
+    from .direct import direct_storage
+    from .frameworks.utils import CONTROL_TIMEOUT, http_client, server_base_url
+
+    storage = direct_storage()
+    if storage is not None:
+        try:
+            up = storage.get_run_updates(task_id)
+        except Exception:
+            return None
+        return "deleted" if up is None else up.status
+
+    try:
+        # No cursors: the response carries the status and no entries
+        r = http_client().get(
+            f"{server_base_url()}/run/{task_id}/updates", timeout=CONTROL_TIMEOUT
+        )
+    except Exception:
+        return None
+    if r.status_code == 404:
+        return "deleted"
+    if r.status_code == 200:
+        return r.json().get("status")
+    return None
+
+
+class CancelToken:
+    """Cancellation flag for one run.
+
+    Runs in the server process are cancelled directly by `cancel_local`. With
+    `remote=True` (worker processes) the token also asks the server for the
+    run's status, at most once per `UAI_CANCEL_CHECK_INTERVAL` seconds.
+    """
+
+    def __init__(
+        self,
+        task_id: str,
+        *,
+        remote: bool = False,
+        deadline: Optional[float] = None,
+    ) -> None:
+        self.task_id = task_id
+        self.remote = remote
+        self.deadline = deadline  # epoch seconds
+        self.timed_out = False
+        self._event = threading.Event()
+        self._checked_at = 0.0
+        self._callbacks: List[Callable[[], None]] = []
+        self._callbacks_lock = threading.Lock()
+
+    def add_callback(self, fn: Callable[[], None]) -> None:
+        """Call `fn` (from the cancelling thread) once the run is stopped."""
+        with self._callbacks_lock:
+            if not self._event.is_set():
+                self._callbacks.append(fn)
+                return
+        fn()
+
+    def cancel(self, timed_out: bool = False) -> None:
+        self.timed_out = self.timed_out or timed_out
+        with self._callbacks_lock:
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for fn in callbacks:
+            try:
+                fn()
+            except Exception:
+                pass
+
+    def is_cancelled(self, refresh: bool = False) -> bool:
+        if self._event.is_set():
+            return True
+        if self.deadline is not None and time.time() >= self.deadline:
+            self.cancel(timed_out=True)
+        elif self.remote:
+            now = time.monotonic()
+            if refresh or now - self._checked_at >= _check_interval():
+                self._checked_at = now
+                status = _remote_status(self.task_id)
+                if status in ("cancelled", "deleted", "timed_out"):
+                    self.cancel(timed_out=status == "timed_out")
+        return self._event.is_set()
+
+    def check(self, refresh: bool = False) -> None:
+        """Raise `RunCancelled` (`RunTimedOut` past the deadline) if the run was stopped."""
+        if self.is_cancelled(refresh):
+            raise (RunTimedOut if self.timed_out else RunCancelled)(self.task_id)
+
+
+_current_token: ContextVar[Optional[CancelToken]] = ContextVar(
+    "uai_cancel_token", default=None
+)
+# Tokens of runs executing in this process, so the server can cancel them
+_tokens: Dict[str, CancelToken] = {}
+_tokens_lock = threading.Lock()
+
+
+def get_cancel_token() -> Optional[CancelToken]:
+    return _current_token.get()
+
+
+def check_cancelled(refresh: bool = False) -> None:
+    """Raise `RunCancelled` if the current run was cancelled; no-op outside a run."""
+    token = _current_token.get()
+    if token is not None:
+        token.check(refresh)
+
+
+def cancel_local(task_id: str, timed_out: bool = False) -> bool:
+    """Cancel a run executing in this process; False if it is not here."""
+    with _tokens_lock:
+        token = _tokens.get(task_id)
+    if token is None:
+        return False
+    token.cancel(timed_out)
+    return True
+
+
+@contextmanager
+def cancel_scope(
+    task_id: str, deadline: Optional[float] = None
+) -> Iterator[CancelToken]:
+    """Register a token for `task_id` and make it current."""
+    from .executor import inline_mode
+
+    token = CancelToken(task_id, remote=not inline_mode(), deadline=deadline)
+    with _tokens_lock:
+        _tokens[task_id] = token
+    ctx = _current_token.set(token)
+    try:
+        yield token
+    finally:
+        _current_token.reset(ctx)
+        with _tokens_lock:
+            if _tokens.get(task_id) is token:
+                del _tokens[task_id]
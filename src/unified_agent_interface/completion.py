@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+
+# Responses worth retrying: the server is restarting, overloaded or behind a
+# proxy that lost it. Anything else (e.g. 404 for a deleted run) is final.
+_RETRY_STATUS = {408, 429, 500, 502, 503, 504}
+
+# One replay at a time per process; concurrent callers simply skip
+_replay_lock = threading.Lock()
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2**attempt)]."""
+    return random.uniform(0.0, min(cap, base * (2**attempt)))
+
+
+def spool_dir() -> Path:
+    """Where undeliverable completions are kept.
+
+    `UAI_COMPLETION_SPOOL`, else `[agent.worker] spool_dir` (relative to the
+    kosmos.toml directory), else `.uai/spool` next to kosmos.toml.
+    """
+    env = os.getenv("UAI_COMPLETION_SPOOL")
+    if env:
+        return Path(env)
+    base = Path.cwd()
+    configured = None
+    try:
+        from .config import load_kosmos_agent_config
+
+        cfg = load_kosmos_agent_config()
+        base = Path(cfg.base_dir)
+        configured = (cfg.raw.get("worker") or {}).get("spool_dir")
+    except Exception:
+        pass
+    path = Path(configured) if configured else Path(".uai") / "spool"
+    return path if path.is_absolute() else base / path
+
+
+class CompletionSpool:
+    """Completion payloads that could not be delivered, one JSON file per run.
+
+    A run completes once, so a newer entry for the same run replaces the older
+    one. Files are written atomically; replay deletes each entry once the
+    server has accepted it (or reported the run gone).
+    """
+
+    def __init__(self, directory: Optional[Path] = None) -> None:
+        self.directory = Path(directory) if directory is not None else spool_dir()
+
+    def _path(self, task_id: str) -> Path:
+        return self.directory / f"{task_id}.json"
+
+    def put(self, task_id: str, payload: Dict[str, Any]) -> Path:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(task_id)
+        tmp = path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+        tmp.write_text(json.dumps({"task_id": task_id, "payload": payload}))
+        os.replace(tmp, path)
+        return path
+
+    def pending(self) -> int:
+        if not self.directory.is_dir():
+            return 0
+        return sum(1 for _ in self.directory.glob("*.json"))
+
+    def replay(self, send: Callable[[str, Dict[str, Any]], bool]) -> int:
+        """Offer every spooled completion to `send`; returns how many were cleared.
+
+        `send` returns True when the entry can be dropped. Entries it returns
+        False for stay in the spool for the next replay.
+        """
+        if not self.directory.is_dir():
+            return 0
+        if not _replay_lock.acquire(blocking=False):
+            return 0
+        sent = 0
+        try:
+            for path in sorted(self.directory.glob("*.json")):
+                try:
+                    entry = json.loads(path.read_text())
+                except (OSError, ValueError):
+                    continue
+                if send(entry["task_id"], entry["payload"]):
+                    path.unlink(missing_ok=True)
+                    sent += 1
+        finally:
+            _replay_lock.release()
+        return sent
+
+
+def _send_once(task_id: str, payload: Dict[str, Any]) -> Optional[bool]:
+    """POST one completion: True on success, False if final, None to retry."""
+    from .frameworks.utils import http_client, server_base_url
+
+    try:
+        r = http_client().post(
+            f"{server_base_url()}/run/{task_id}/complete", json=payload, timeout=120
+        )
+    except Exception:
+        return None
+    if r.status_code < 400:
+        return True
+    if r.status_code in _RETRY_STATUS:
+        return None
+    return False
+
+
+def deliver_completion(
+    task_id: str,
+    payload: Dict[str, Any],
+    *,
+    attempts: Optional[int] = None,
+    sleep: Callable[[float], None] = time.sleep,
+) -> bool:
+    """Send a completion, retrying with jittered exponential backoff.
+
+    `UAI_COMPLETION_RETRIES` (default 5) bounds the attempts, with delays from
+    `UAI_COMPLETION_BACKOFF` (0.5 s) doubling up to `UAI_COMPLETION_BACKOFF_MAX`
+    (30 s). Connection errors, timeouts and 408/429/5xx are retried. A
+    completion that is still undelivered goes to the spool; one the server
+    rejects for good (e.g. the run was deleted) is dropped. Returns True once
+    the server accepted it. `/complete` is idempotent, so a retry after a lost
+    response is harmless. In direct storage mode the completion is written to
+    shared storage instead, with HTTP as the fallback if that fails.
+    """
+    from .direct import complete_run_direct, direct_storage
+
+    storage = direct_storage()
+    if storage is not None:
+        try:
+            return complete_run_direct(storage, task_id, payload)
+        except Exception:
+            pass
+    if attempts is None:
+        attempts = int(_env_float("UAI_COMPLETION_RETRIES", 5))
+    base = _env_float("UAI_COMPLETION_BACKOFF", 0.5)
+    cap = _env_float("UAI_COMPLETION_BACKOFF_MAX", 30.0)
+    for attempt in range(max(1, attempts)):
+        if attempt:
+            sleep(backoff_delay(attempt - 1, base, cap))
+        result = _send_once(task_id, payload)
+        if result is True:
+            # The server is reachable again: deliver what earlier runs left behind
+            replay_spool()
+            return True
+        if result is False:
+            return False
+    try:
+        CompletionSpool().put(task_id, payload)
+    except OSError:
+        pass
+    return False
+
+
+def replay_spool(spool: Optional[CompletionSpool] = None) -> int:
+    """Try each spooled completion once; returns how many left the spool."""
+    spool = spool or CompletionSpool()
+    # A final rejection also clears the entry; only retryable failures stay
+    return spool.replay(
+        lambda task_id, payload: _send_once(task_id, payload) is not None
+    )
@@ -1,11 +1,14 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Tuple, List
+from typing import Any, Callable, Dict, List, Optional, Tuple, cast
 
 from .base import Agent
-from ...config import AgentConfig
+from ...config import AgentConfig, current_config
+from ...executor import get_loop_executor
+from ...frameworks.base import AsyncRuntimeAdapter
 from ...models.chat import Artifact, Message
-from ...frameworks import get_adapter
+from ...profile import ExecutionProfile, get_execution_profile
+from ...runtime import session_context
 
 
 class ConfiguredChatAgent(Agent):
@@ -16,8 +19,22 @@ class ConfiguredChatAgent(Agent):
     """
 
     def __init__(self, cfg: AgentConfig) -> None:
-        self.cfg = cfg
+        self._cfg = cfg
         self._instances: Dict[str, Any] = {}
+        self._profile: Optional[ExecutionProfile] = None
+
+    @property
+    def cfg(self) -> AgentConfig:
+        # Follow hot reloads of kosmos.toml
+        return current_config(self._cfg)
+
+    @property
+    def profile(self) -> ExecutionProfile:
+        cfg = self.cfg
+        profile = self._profile
+        if profile is None or profile.cfg is not cfg:
+            profile = self._profile = get_execution_profile(cfg)
+        return profile
 
     def runtime(self) -> str:
         return self.cfg.runtime
@@ -25,114 +42,119 @@ class ConfiguredChatAgent(Agent):
     def respond(
         self, session_id: str, user_input: str
     ) -> Tuple[List[Artifact], Message | None]:
-        rt = (self.cfg.runtime or "").lower()
-        adapter = get_adapter(
-            rt,
-            adapter_path=self.cfg.adapter
-            or self.cfg.raw.get("adapter")
-            or self.cfg.raw.get("adopter"),
-            base_dir=self.cfg.base_dir,
-        )
+        profile = self.profile
+        adapter = profile.adapter
         if not adapter.supports_chat():
             raise NotImplementedError(
-                f"Chat not implemented for runtime: {self.cfg.runtime}"
+                f"Chat not implemented for runtime: {profile.cfg.runtime}"
             )
 
         # Delegate to adapter; pass entrypoint string so adapter can manage per-session state
-        from ...runtime import session_context
-        from ...artifacts import artifact_tracking_context
+        text = self._respond(profile, session_id, user_input, None)
+        reply = Message(role="assistant", content=text)
+        return [], reply
 
-        arts_cfg = self.cfg.raw.get("artifacts") or {}
-        import os as _os
+    def respond_stream(
+        self, session_id: str, user_input: str, emit: Callable[[str], Any]
+    ) -> Tuple[List[Artifact], Message | None]:
+        """Like `respond`, handing each piece of the reply to `emit` as it is made.
 
-        _env_mode = _os.getenv("UAI_ARTIFACTS")
-        _enabled = (
-            True if (str(arts_cfg.get("tracking") or "").lower() == "auto") else False
-        )
-        if _env_mode is not None:
-            _enabled = _env_mode.lower() == "auto"
-        _inc = _os.getenv("UAI_ARTIFACTS_INCLUDE")
-        _exc = _os.getenv("UAI_ARTIFACTS_EXCLUDE")
-        _base = (
-            _os.getenv("UAI_ARTIFACTS_BASEDIR")
-            or arts_cfg.get("base_dir")
-            or self.cfg.base_dir
-        )
-        _inc_list = [s.strip() for s in _inc.split(",") if s.strip()] if _inc else None
-        _exc_list = [s.strip() for s in _exc.split(",") if s.strip()] if _exc else None
-
-        with (
-            session_context(session_id),
-            artifact_tracking_context(
-                bool(_enabled),
-                include=_inc_list,
-                exclude=_exc_list,
-                base_dir=str(_base),
-            ),
-        ):
-            text = adapter.chat_respond(
-                self.cfg.entrypoint,
-                session_id=session_id,
-                user_input=user_input,
-                state=None,
-                config_dir=self.cfg.base_dir,
+        Adapters with `chat_stream`/`achat_stream` stream token by token;
+        others emit the whole reply at once. Returns the assembled reply.
+        """
+        profile = self.profile
+        adapter = profile.adapter
+        if not adapter.supports_chat():
+            raise NotImplementedError(
+                f"Chat not implemented for runtime: {profile.cfg.runtime}"
             )
-        reply = Message(role="assistant", content=text)
-        return [], reply
+        text = self._stream(profile, session_id, user_input, emit)
+        return [], Message(role="assistant", content=text)
 
     def next(
         self, state: dict, user_input: str
     ) -> Tuple[dict, List[Artifact], Message | None]:
-        rt = (self.cfg.runtime or "").lower()
-        adapter = get_adapter(
-            rt,
-            adapter_path=self.cfg.adapter
-            or self.cfg.raw.get("adapter")
-            or self.cfg.raw.get("adopter"),
-            base_dir=self.cfg.base_dir,
-        )
+        profile = self.profile
+        adapter = profile.adapter
         if not adapter.supports_chat():
             raise NotImplementedError(
-                f"Chat not implemented for runtime: {self.cfg.runtime}"
+                f"Chat not implemented for runtime: {profile.cfg.runtime}"
             )
         # Stateless runs use a synthetic session id
-        from ...runtime import session_context
-        from ...artifacts import artifact_tracking_context
-
-        arts_cfg = self.cfg.raw.get("artifacts") or {}
-        import os as _os
+        self._respond(profile, "stateless", user_input, state or {})
+        # For stateless next we don't return messages; just state/artifacts
+        return state or {}, [], None
 
-        _env_mode = _os.getenv("UAI_ARTIFACTS")
-        _enabled = (
-            True if (str(arts_cfg.get("tracking") or "").lower() == "auto") else False
+    def _respond(
+        self,
+        profile: ExecutionProfile,
+        session_id: str,
+        user_input: str,
+        state: Optional[dict],
+    ) -> str:
+        adapter = profile.adapter
+        kwargs: Dict[str, Any] = dict(
+            session_id=session_id,
+            user_input=user_input,
+            state=state,
+            config_dir=profile.config_dir,
         )
-        if _env_mode is not None:
-            _enabled = _env_mode.lower() == "auto"
-        _inc = _os.getenv("UAI_ARTIFACTS_INCLUDE")
-        _exc = _os.getenv("UAI_ARTIFACTS_EXCLUDE")
-        _base = (
-            _os.getenv("UAI_ARTIFACTS_BASEDIR")
-            or arts_cfg.get("base_dir")
-            or self.cfg.base_dir
-        )
-        _inc_list = [s.strip() for s in _inc.split(",") if s.strip()] if _inc else None
-        _exc_list = [s.strip() for s in _exc.split(",") if s.strip()] if _exc else None
-
-        with (
-            session_context("stateless"),
-            artifact_tracking_context(
-                bool(_enabled),
-                include=_inc_list,
-                exclude=_exc_list,
-                base_dir=str(_base),
-            ),
+        if not profile.is_async or not callable(
+            getattr(adapter, "achat_respond", None)
         ):
-            adapter.chat_respond(
-                self.cfg.entrypoint,
-                session_id="stateless",
-                user_input=user_input,
-                state=state or {},
-                config_dir=self.cfg.base_dir,
-            )
-        # For stateless next we don't return messages; just state/artifacts
-        return state or {}, [], None
+            with session_context(session_id), profile.artifact_context():
+                return adapter.chat_respond(profile.entrypoint, **kwargs)
+
+        async_adapter = cast(AsyncRuntimeAdapter, adapter)
+
+        async def _turn() -> str:
+            # Context is entered inside the loop task so it stays per turn
+            with session_context(session_id), profile.artifact_context():
+                return await async_adapter.achat_respond(profile.entrypoint, **kwargs)
+
+        # The request thread waits while the turn awaits alongside other runs
+        return get_loop_executor(profile.cfg).run(_turn)
+
+    def _stream(
+        self,
+        profile: ExecutionProfile,
+        session_id: str,
+        user_input: str,
+        emit: Callable[[str], Any],
+    ) -> str:
+        adapter = profile.adapter
+        kwargs = dict(
+            session_id=session_id,
+            user_input=user_input,
+            state=None,
+            config_dir=profile.config_dir,
+        )
+        parts: List[str] = []
+        astream = getattr(adapter, "achat_stream", None)
+        if profile.is_async and callable(astream):
+
+            async def _turn() -> None:
+                with session_context(session_id), profile.artifact_context():
+                    async for text in astream(profile.entrypoint, **kwargs):
+                        parts.append(text)
+                        emit(text)
+
+            get_loop_executor(profile.cfg).run(_turn)
+            return "".join(parts)
+
+        stream = getattr(adapter, "chat_stream", None)
+        if not callable(stream):
+            text = self._respond(profile, session_id, user_input, None)
+            emit(text)
+            return text
+        with session_context(session_id), profile.artifact_context():
+            for text in stream(profile.entrypoint, **kwargs):
+                parts.append(text)
+                emit(text)
+        return "".join(parts)
+
+    def end_session(self, session_id: str) -> None:
+        """Release per-session framework state when a chat is deleted."""
+        end = getattr(self.profile.adapter, "end_session", None)
+        if callable(end):
+            end(session_id)
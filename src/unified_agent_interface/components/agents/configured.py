@@ -1,12 +1,28 @@
 from __future__ import annotations
 
 import threading
-from datetime import datetime, timedelta
-from typing import Dict, Optional, Any
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Set, Tuple
 
-from ...config import AgentConfig
-from ...queue import enqueue_run_execute
-from ...models.run import RunTask
+from ...config import AgentConfig, current_config
+from ...cancellation import RunCancelled, cancel_local
+from ...deadlines import default_run_timeout, get_deadline_watchdog, resolve_deadline
+from ...durations import DurationModel
+from ...executor import (
+    QueueFullError,
+    get_inline_executor,
+    get_loop_executor,
+    inline_mode,
+)
+from ...queue import (
+    cancel_run_job,
+    enqueue_run_execute,
+    runs_async,
+    worker_concurrency,
+)
+from ...models.run import TERMINAL_STATUSES, RunTask
+from ..storage.base import Storage
 from .run_base import RunAgent
 
 
@@ -16,52 +32,245 @@ class ConfiguredRunAgent(RunAgent):
     Supported runtimes:
     - "crewai": entrypoint should be a Crew object exposing `.kickoff(inputs=...)`
     - "callable": entrypoint is a Python callable; called with `(inputs: dict)`
+
+    `estimated_completion_time` comes from the durations of past runs of the
+    same entrypoint (see `DurationModel`) and the runs ahead in the queue;
+    `eta_seconds` is used until enough runs have completed.
     """
 
-    def __init__(self, cfg: AgentConfig, eta_seconds: int = 5) -> None:
-        self.cfg = cfg
+    def __init__(
+        self,
+        cfg: AgentConfig,
+        eta_seconds: int = 5,
+        storage: Optional[Storage] = None,
+    ) -> None:
+        self._cfg = cfg
         self._eta_seconds = eta_seconds
-        self._threads: Dict[str, threading.Thread] = {}
+        self._storage = storage
+        self._durations = DurationModel(storage, default_seconds=eta_seconds)
+        # Worker runs dispatched by this server and not yet reported back
+        self._active: Set[str] = set()
+        self._lock = threading.Lock()
+
+    @property
+    def cfg(self) -> AgentConfig:
+        # Follow hot reloads of kosmos.toml
+        return current_config(self._cfg)
 
     def name(self) -> str:  # Reflect configured runtime
         return f"configured:{self.cfg.runtime}"
 
-    def _start_thread(self, task: RunTask, target):
-        t = threading.Thread(target=target, daemon=True)
-        self._threads[task.id] = t
-        t.start()
+    def _update(self, task: RunTask, **fields: Any) -> None:
+        # Mutate the caller's snapshot and persist through storage when available
+        for key, value in fields.items():
+            setattr(task, key, value)
+        if self._storage is not None:
+            self._storage.update_run(task.id, **fields)
+
+    def _queue_depth(self) -> Tuple[int, int]:
+        # Runs ahead of a new one, and how many of them execute at once
+        if inline_mode():
+            if runs_async(self.cfg):
+                stats = get_loop_executor(self.cfg).stats()
+                return stats["running"] + stats["queued"], stats["max_concurrency"]
+            stats = get_inline_executor(self.cfg).stats()
+            return stats["running"] + stats["queued"], stats["workers"]
+        with self._lock:
+            return len(self._active), worker_concurrency(self.cfg)
+
+    def _eta(
+        self, deadline: Optional[float], ahead: int = 0, capacity: int = 1
+    ) -> datetime:
+        cfg = self.cfg
+        seconds = self._durations.estimate(
+            cfg.runtime, cfg.entrypoint, ahead=ahead, capacity=capacity
+        )
+        eta = datetime.utcnow() + timedelta(seconds=seconds)
+        if deadline is not None:
+            expires = datetime.fromtimestamp(deadline, timezone.utc)
+            eta = min(eta, expires.replace(tzinfo=None))
+        return eta
+
+    def _expire(self, task: RunTask) -> None:
+        # Watchdog callback: report the run timed out now, then stop its agent
+        current = self._storage.get_run(task.id) if self._storage else task
+        if current is None or current.status in TERMINAL_STATUSES:
+            return
+        self._update(
+            task,
+            status="timed_out",
+            estimated_completion_time=None,
+            input_prompt=None,
+        )
+        self._stop(task, timed_out=True)
+
+    def _stop(self, task: RunTask, timed_out: bool = False) -> None:
+        # Inline runs see the stop at once; worker runs notice it at their next
+        # check, and a job still waiting in Postgres is not started at all.
+        get_deadline_watchdog().discard(task.id)
+        with self._lock:
+            self._active.discard(task.id)
+        cancel_local(task.id, timed_out)
+        job_id = task.params.get("job_id")
+        if job_id is not None and not inline_mode():
+            cancel_run_job(job_id)
 
     def on_create(self, task: RunTask, initial_input: Any | None) -> None:
-        task.status = "running"
-        task.params["agent"] = self.name()
-        task.estimated_completion_time = datetime.utcnow() + timedelta(
-            seconds=self._eta_seconds
+        # `timeout`/`deadline` from the request params, else `[agent] timeout`
+        deadline = resolve_deadline(task.params, default_run_timeout(self.cfg.raw))
+        params = {**task.params, "agent": self.name()}
+        if deadline is not None:
+            params["deadline"] = datetime.fromtimestamp(
+                deadline, timezone.utc
+            ).isoformat()
+        ahead, capacity = self._queue_depth()
+
+        # Inline runs wait in the executor queue until a thread picks them up;
+        # worker runs are marked running before deferral so the worker's
+        # completion callback can never be overwritten.
+        self._update(
+            task,
+            status="pending" if inline_mode() else "running",
+            params=params,
+            estimated_completion_time=self._eta(deadline, ahead, capacity),
         )
+        started: Dict[str, float] = {}
 
-        # Defer execution to Procrastinate worker (or inline in tests)
+        # Defer execution to Procrastinate worker (or the inline executor)
         try:
 
+            def _inline_start():
+                current = self._storage.get_run(task.id) if self._storage else task
+                if current is None:
+                    raise KeyError(task.id)
+                if current.status in ("cancelled", "timed_out"):
+                    raise RunCancelled(task.id)
+                started["at"] = time.monotonic()
+                # Out of the queue now: only its own duration remains
+                self._update(
+                    task,
+                    status="running",
+                    estimated_completion_time=self._eta(deadline),
+                )
+
             def _inline_complete(status: str, result_text: Optional[str]):
-                task.status = status
-                task.result_text = result_text
-                task.estimated_completion_time = None
-
-            enqueue_run_execute(
-                task_id=task.id,
-                initial_payload=initial_input,
-                inline_complete=_inline_complete,
-            )
+                current = self._storage.get_run(task.id) if self._storage else None
+                if current is not None and current.status in ("cancelled", "timed_out"):
+                    # Already reported by the cancel or the deadline watchdog
+                    self.on_complete(task, current.status)
+                    return
+                self._update(
+                    task,
+                    status=status,
+                    result_text=result_text,
+                    estimated_completion_time=None,
+                )
+                duration = time.monotonic() - started["at"] if started else None
+                self.on_complete(task, status, duration)
+
+            # Tracked before the job exists: a fast worker may complete it
+            # before enqueue returns, and `on_complete` must find it here
+            with self._lock:
+                self._active.add(task.id)
+            try:
+                job_id = enqueue_run_execute(
+                    task_id=task.id,
+                    initial_payload=initial_input,
+                    inline_complete=_inline_complete,
+                    inline_start=_inline_start,
+                    deadline=deadline,
+                )
+            except BaseException:
+                with self._lock:
+                    self._active.discard(task.id)
+                raise
+            if job_id is None:
+                # Inline runs are counted by the inline executor instead
+                with self._lock:
+                    self._active.discard(task.id)
+            if deadline is not None:
+                get_deadline_watchdog().schedule(
+                    task.id, deadline, lambda: self._expire(task)
+                )
+            if job_id is not None:
+                # Kept so a cancel can abort the job while it is still queued
+                self._update(task, params={**task.params, "job_id": job_id})
+        except QueueFullError:
+            raise
         except Exception as e:
-            task.status = "failed"
-            task.result_text = f"Queue error: {e}"
-            task.estimated_completion_time = None
+            self._update(
+                task,
+                status="failed",
+                result_text=f"Queue error: {e}",
+                estimated_completion_time=None,
+            )
 
     def on_status(self, task: RunTask) -> None:
-        t = self._threads.get(task.id)
-        if t and not t.is_alive() and task.status == "running":
-            task.status = "completed"
-            task.estimated_completion_time = None
+        # Completion is reported by the executor or the worker callback
+        return
 
     def on_input(self, task: RunTask, text: str) -> None:
         # No-op: server already appended input to buffer; worker polls it.
         return
+
+    def on_cancel(self, task: RunTask) -> None:
+        self._stop(task)
+
+    def on_complete(
+        self, task: RunTask, status: str, duration: Optional[float] = None
+    ) -> None:
+        """Called once a run reached `status`; completed runs feed the ETA model.
+
+        `duration` is the execution time reported by the executor; without it
+        the time since the run was created is used.
+        """
+        get_deadline_watchdog().discard(task.id)
+        with self._lock:
+            self._active.discard(task.id)
+        if status != "completed":
+            return
+        if duration is None:
+            duration = (datetime.utcnow() - task.created_at).total_seconds()
+        cfg = self.cfg
+        self._durations.record(cfg.runtime, cfg.entrypoint, duration)
+
+    def on_remote_update(self, task_id: str) -> None:
+        """A worker changed the run directly in shared storage.
+
+        Completions written that way never reach `/complete`, so they are
+        picked up here for the runs this server dispatched.
+        """
+        with self._lock:
+            if task_id not in self._active:
+                return
+        if self._storage is None:
+            return
+        up = self._storage.get_run_updates(task_id)
+        if up is not None and up.status not in TERMINAL_STATUSES:
+            return
+        with self._lock:
+            if task_id not in self._active:
+                return  # another notification got here first
+            self._active.discard(task_id)
+        task = self._storage.get_run(task_id) if up is not None else None
+        if task is None:
+            get_deadline_watchdog().discard(task_id)
+            return
+        duration = task.params.get("duration")
+        if not isinstance(duration, (int, float)):
+            duration = None
+        self.on_complete(task, task.status, duration)
+
+    def stats(self) -> Dict[str, Any]:
+        """Duration quantiles, queue depth and the ETA a new run would get now."""
+        cfg = self.cfg
+        ahead, capacity = self._queue_depth()
+        return {
+            "runtime": cfg.runtime,
+            "entrypoint": cfg.entrypoint,
+            "queue": {"ahead": ahead, "capacity": capacity},
+            "eta_seconds": self._durations.estimate(
+                cfg.runtime, cfg.entrypoint, ahead=ahead, capacity=capacity
+            ),
+            "durations": self._durations.stats(),
+        }
@@ -19,3 +19,7 @@ class RunAgent(Protocol):
     def on_input(self, task: RunTask, text: str) -> None:
         """Handle external input provided to the task."""
         ...
+
+    def on_cancel(self, task: RunTask) -> None:
+        """Stop work on a task that was just marked cancelled."""
+        ...
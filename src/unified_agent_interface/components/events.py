@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import Any, Callable, Dict, List, Optional, Protocol, Set
+
+from ..models.run import LogEntry, RunArtifact
+from .storage.base import Storage
+
+
+class RunSubscription:
+    """Wake-up signal for one watcher of a run.
+
+    Notifications carry no payload: the watcher re-reads the run through
+    `Storage.get_run_updates` with its own cursors, so bursts of mutations
+    collapse into a single read and nothing is lost if it falls behind.
+    """
+
+    def __init__(self, hub: "RunEventHub", task_id: str) -> None:
+        self._hub = hub
+        self.task_id = task_id
+        self._loop = asyncio.get_running_loop()
+        self._event = asyncio.Event()
+
+    def notify(self) -> None:
+        try:
+            self._loop.call_soon_threadsafe(self._event.set)
+        except RuntimeError:  # loop already closed
+            pass
+
+    async def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait for a mutation since the last call; False on timeout."""
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        self._event.clear()
+        return True
+
+    def close(self) -> None:
+        self._hub.unsubscribe(self)
+
+
+class RunEventHub:
+    """Fans out run mutations to the watchers subscribed to that run.
+
+    `publish` is thread-safe and may be called from request handlers, worker
+    threads or the event loop itself.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._subs: Dict[str, Set[RunSubscription]] = {}
+
+    def subscribe(self, task_id: str) -> RunSubscription:
+        """Register a watcher; must be called from the loop that will wait on it."""
+        sub = RunSubscription(self, task_id)
+        with self._lock:
+            self._subs.setdefault(task_id, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub: RunSubscription) -> None:
+        with self._lock:
+            subs = self._subs.get(sub.task_id)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subs[sub.task_id]
+
+    def publish(self, task_id: str) -> None:
+        with self._lock:
+            subs = list(self._subs.get(task_id, ()))
+        for sub in subs:
+            sub.notify()
+
+    def subscriber_count(self, task_id: Optional[str] = None) -> int:
+        with self._lock:
+            if task_id is not None:
+                return len(self._subs.get(task_id, ()))
+            return sum(len(s) for s in self._subs.values())
+
+
+class RunPublisher(Protocol):
+    """Receives run mutations: a `RunEventHub` or a cross-process notifier."""
+
+    def publish(self, task_id: str) -> None: ...
+
+
+class NotifyingStorage:
+    """Storage wrapper that publishes every run mutation to a `RunEventHub`.
+
+    All other calls (reads, chat methods, `stats`, `close`, ...) go straight
+    to the wrapped backend.
+    """
+
+    def __init__(self, inner: Storage, hub: RunPublisher) -> None:
+        self.inner = inner
+        self.hub = hub
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.inner, name)
+
+    def update_run(self, task_id: str, **fields: Any) -> None:
+        self.inner.update_run(task_id, **fields)
+        self.hub.publish(task_id)
+
+    def delete_run(self, task_id: str) -> bool:
+        ok = self.inner.delete_run(task_id)
+        if ok:
+            self.hub.publish(task_id)
+        return ok
+
+    def append_run_input(self, task_id: str, text: str) -> None:
+        self.inner.append_run_input(task_id, text)
+        self.hub.publish(task_id)
+
+    def append_run_log(self, task_id: str, log: LogEntry) -> None:
+        self.inner.append_run_log(task_id, log)
+        self.hub.publish(task_id)
+
+    def append_run_logs(self, task_id: str, logs: List[LogEntry]) -> None:
+        self.inner.append_run_logs(task_id, logs)
+        self.hub.publish(task_id)
+
+    def add_run_artifact(self, task_id: str, artifact: RunArtifact) -> None:
+        self.inner.add_run_artifact(task_id, artifact)
+        self.hub.publish(task_id)
+
+    def append_run_output(self, task_id: str, text: str) -> None:
+        self.inner.append_run_output(task_id, text)
+        self.hub.publish(task_id)
+
+
+class RunChangeListener:
+    """Relays run notifications from a shared backend on a background thread.
+
+    Workers in direct storage mode write runs without going through this
+    server; the backend's `listen_runs` reports those changes and `callback`
+    receives each changed task id. Listening restarts after errors (e.g. a
+    dropped database connection).
+    """
+
+    def __init__(self, storage: Any, callback: Callable[[str], None]) -> None:
+        self._storage = storage
+        self._callback = callback
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="uai-run-listener", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = 2.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self._storage.listen_runs(self._notify, self._stop)
+            except Exception:
+                self._stop.wait(1.0)
+
+    def _notify(self, task_id: str) -> None:
+        try:
+            self._callback(task_id)
+        except Exception:
+            pass
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Optional
+
+from ...config import AgentConfig
+from .base import Storage
+from .memory import InMemoryStorage, RetentionPolicy
+
+
+def _setting(section: dict, key: str, env: str, cast):
+    value = os.getenv(env)
+    if value is None:
+        value = section.get(key)
+    return None if value in (None, "") else cast(value)
+
+
+def retention_policy(section: dict) -> RetentionPolicy:
+    """Retention limits for in-memory storage from `[agent.storage]` and env."""
+    return RetentionPolicy(
+        run_ttl_seconds=_setting(
+            section, "run_ttl_seconds", "UAI_STORAGE_RUN_TTL", float
+        ),
+        max_runs=_setting(section, "max_runs", "UAI_STORAGE_MAX_RUNS", int),
+        chat_ttl_seconds=_setting(
+            section, "chat_ttl_seconds", "UAI_STORAGE_CHAT_TTL", float
+        ),
+        max_chats=_setting(section, "max_chats", "UAI_STORAGE_MAX_CHATS", int),
+        max_messages_per_chat=_setting(
+            section, "max_messages_per_chat", "UAI_STORAGE_MAX_MESSAGES", int
+        ),
+        archive_dir=_setting(section, "archive_dir", "UAI_STORAGE_ARCHIVE_DIR", str),
+    )
+
+
+def create_storage(cfg: Optional[AgentConfig] = None) -> Storage:
+    """Build the storage backend selected by env or kosmos.toml.
+
+    `UAI_STORAGE` overrides `[agent.storage] backend` (``memory``, ``sqlite`` or
+    ``postgres``). For SQLite, `UAI_STORAGE_PATH` overrides `[agent.storage] path`;
+    relative config paths resolve against the kosmos.toml directory. Postgres uses
+    the same connection settings (and pool) as the Procrastinate queue.
+    """
+    section = (cfg.raw.get("storage") if cfg else None) or {}
+    backend = (os.getenv("UAI_STORAGE") or section.get("backend") or "memory").lower()
+
+    if backend == "memory":
+        return InMemoryStorage(retention_policy(section))
+    if backend == "sqlite":
+        from .sqlite import SQLiteStorage
+
+        path = os.getenv("UAI_STORAGE_PATH")
+        if not path:
+            path = str(section.get("path") or "uai.db")
+            if cfg and not Path(path).is_absolute():
+                path = str(Path(cfg.base_dir) / path)
+        return SQLiteStorage(
+            path,
+            batch_size=int(section.get("batch_size", 64)),
+            flush_interval=float(section.get("flush_interval", 0.05)),
+        )
+    if backend == "postgres":
+        from .postgres import PostgresStorage
+
+        return PostgresStorage()
+    raise ValueError(f"Unsupported storage backend: {backend}")
@@ -1,9 +1,10 @@
 from __future__ import annotations
 
-from typing import List, Optional, Protocol
+import threading
+from typing import Any, Callable, Dict, List, Optional, Protocol
 
 from ...models.chat import Artifact, ChatSession, Message
-from ...models.run import LogEntry, RunArtifact, RunTask
+from ...models.run import LogEntry, RunArtifact, RunTask, RunUpdates
 
 
 class Storage(Protocol):
@@ -22,11 +23,53 @@ class Storage(Protocol):
     def create_run(self, initial_input: Optional[str], params: dict) -> RunTask: ...
     def get_run(self, task_id: str) -> Optional[RunTask]: ...
     def delete_run(self, task_id: str) -> bool: ...
+    def update_run(self, task_id: str, **fields: Any) -> None: ...
+    # Appends raise KeyError for an unknown run instead of reading it first
     def append_run_input(self, task_id: str, text: str) -> None: ...
     def append_run_log(self, task_id: str, log: LogEntry) -> None: ...
+    def append_run_logs(self, task_id: str, logs: List[LogEntry]) -> None: ...
     def add_run_artifact(self, task_id: str, artifact: RunArtifact) -> None: ...
+    def append_run_output(self, task_id: str, text: str) -> None:
+        """Append streamed text to the run's `partial_result`."""
+        ...
+
     def get_run_artifacts(self, task_id: str) -> Optional[List[RunArtifact]]: ...
     def get_single_run_artifact(
         self, task_id: str, artifact_id: str
     ) -> Optional[RunArtifact]: ...
     def list_runs(self) -> List[RunTask]: ...
+    def get_run_updates(
+        self,
+        task_id: str,
+        *,
+        logs_after: Optional[int] = None,
+        inputs_after: Optional[int] = None,
+        artifacts_after: Optional[int] = None,
+        output_after: Optional[int] = None,
+        limit: Optional[int] = None,
+    ) -> Optional[RunUpdates]:
+        """Scalar fields plus entries past each given cursor (omitted: none).
+
+        `limit` caps entries per list; cursors then point past what was returned.
+        `output_after` is a character offset into `partial_result`.
+        """
+        ...
+
+    # Run duration sketches (see `durations.DurationModel`), keyed by name
+    def load_run_durations(self) -> Dict[str, dict]: ...
+    def save_run_duration(self, key: str, sketch: dict) -> None: ...
+
+
+class SharedStorage(Storage, Protocol):
+    """A backend several processes can use at once (SQLite file, Postgres).
+
+    Workers writing to it directly call `notify_run` after each change, and
+    the server's `listen_runs` turns those into wake-ups for its watchers.
+    """
+
+    def notify_run(self, task_id: str) -> None: ...
+    def listen_runs(
+        self, callback: Callable[[str], None], stop: threading.Event
+    ) -> None:
+        """Call `callback(task_id)` for each notification until `stop` is set."""
+        ...
@@ -1,36 +1,122 @@
 from __future__ import annotations
 
+import threading
+import time
 import uuid
-from typing import Dict, List, Optional
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
 
 from ...models.chat import Artifact, ChatSession, Message
-from ...models.run import LogEntry, RunArtifact, RunTask
+from ...models.run import (
+    TERMINAL_STATUSES,
+    LogEntry,
+    RunArtifact,
+    RunTask,
+    RunUpdates,
+)
+
+
+def _slice(items: List[Any], after: Optional[int], limit: Optional[int]):
+    """Entries of an append-only list past `after`, and the next cursor."""
+    if after is None:
+        return [], len(items)
+    start = max(0, after)
+    end = len(items) if limit is None else min(len(items), start + max(0, limit))
+    return list(items[start:end]), max(start, end)
+
+
+@dataclass
+class RetentionPolicy:
+    """Bounds for `InMemoryStorage`; `None` disables a limit.
+
+    - run_ttl_seconds: drop runs this long after they reach a terminal status.
+    - max_runs / max_chats: keep at most this many, evicting least recently used.
+      Runs that are still active are never evicted, so `max_runs` is soft while
+      more runs than that are in flight.
+    - chat_ttl_seconds: drop sessions idle for this long.
+    - max_messages_per_chat: keep only the newest messages of a session.
+    - archive_dir: write evicted runs/sessions there as JSON; `get_run` and
+      `get_chat` restore them on demand.
+    """
+
+    run_ttl_seconds: Optional[float] = None
+    max_runs: Optional[int] = None
+    chat_ttl_seconds: Optional[float] = None
+    max_chats: Optional[int] = None
+    max_messages_per_chat: Optional[int] = None
+    archive_dir: Optional[str] = None
+    sweep_interval: float = 1.0
 
 
 class InMemoryStorage:
-    def __init__(self) -> None:
-        self._chats: Dict[str, ChatSession] = {}
-        self._runs: Dict[str, RunTask] = {}
+    def __init__(self, retention: Optional[RetentionPolicy] = None) -> None:
+        self._chats: OrderedDict[str, ChatSession] = OrderedDict()
+        self._runs: OrderedDict[str, RunTask] = OrderedDict()
+        self._retention = retention or RetentionPolicy()
+        self._lock = threading.RLock()
+        # Monotonic timestamps driving TTL expiry
+        self._finished_at: Dict[str, float] = {}
+        self._chat_touched_at: Dict[str, float] = {}
+        self._last_sweep = time.monotonic()
+        self._durations: Dict[str, dict] = {}
+        self._counters: Dict[str, int] = {
+            "runs_expired": 0,
+            "runs_evicted": 0,
+            "chats_expired": 0,
+            "chats_evicted": 0,
+            "messages_trimmed": 0,
+            "archived": 0,
+            "restored": 0,
+        }
+
+    def stats(self) -> Dict[str, int]:
+        """Current sizes and cumulative eviction counters."""
+        with self._lock:
+            return {
+                "runs": len(self._runs),
+                "chats": len(self._chats),
+                **self._counters,
+            }
 
     # Chat
     def create_chat(self) -> ChatSession:
         sid = str(uuid.uuid4())
         session = ChatSession(id=sid)
-        self._chats[sid] = session
+        with self._lock:
+            self._chats[sid] = session
+            self._touch_chat(sid)
+            self._enforce_limits()
         return session
 
     def get_chat(self, session_id: str) -> Optional[ChatSession]:
-        return self._chats.get(session_id)
+        with self._lock:
+            session = self._chats.get(session_id) or self._restore_chat(session_id)
+            if session is not None:
+                self._touch_chat(session_id)
+            return session
 
     def delete_chat(self, session_id: str) -> bool:
-        return self._chats.pop(session_id, None) is not None
+        with self._lock:
+            self._chat_touched_at.pop(session_id, None)
+            archived = self._unarchive("chats", session_id)
+            return self._chats.pop(session_id, None) is not None or archived
 
     def add_message(self, session_id: str, message: Message) -> None:
         message.id = message.id or str(uuid.uuid4())
-        self._chats[session_id].messages.append(message)
+        with self._lock:
+            messages = self._chats[session_id].messages
+            messages.append(message)
+            self._touch_chat(session_id)
+            limit = self._retention.max_messages_per_chat
+            if limit is not None and len(messages) > limit:
+                excess = len(messages) - limit
+                del messages[:excess]
+                self._counters["messages_trimmed"] += excess
 
     def get_messages(self, session_id: str) -> Optional[List[Message]]:
-        session = self._chats.get(session_id)
+        session = self.get_chat(session_id)
         return None if session is None else list(session.messages)
 
     def add_artifact(self, session_id: str, artifact: Artifact) -> None:
@@ -38,23 +124,26 @@ class InMemoryStorage:
             import uuid as _uuid
 
             artifact.id = str(_uuid.uuid4())
-        self._chats[session_id].artifacts.append(artifact)
+        with self._lock:
+            self._chats[session_id].artifacts.append(artifact)
+            self._touch_chat(session_id)
 
     def get_artifacts(self, session_id: str) -> Optional[List[Artifact]]:
-        session = self._chats.get(session_id)
+        session = self.get_chat(session_id)
         return None if session is None else list(session.artifacts)
 
     def get_artifact(self, session_id: str, artifact_id: str) -> Optional[Artifact]:
-        session = self._chats.get(session_id)
+        session = self.get_chat(session_id)
         if session is None:
             return None
         for art in session.artifacts:
             if art.id == artifact_id:
                 return art
         return None
-    
+
     def list_chats(self) -> List[ChatSession]:
-        return list(self._chats.values())
+        with self._lock:
+            return list(self._chats.values())
 
     # Runs
     def create_run(self, initial_input: Optional[object], params: dict) -> RunTask:
@@ -67,36 +156,76 @@ class InMemoryStorage:
         )
         if isinstance(initial_input, str) and initial_input:
             task.input_buffer.append(initial_input)
-        self._runs[tid] = task
+        with self._lock:
+            self._runs[tid] = task
+            self._enforce_limits()
         return task
 
     def get_run(self, task_id: str) -> Optional[RunTask]:
-        return self._runs.get(task_id)
+        with self._lock:
+            task = self._runs.get(task_id) or self._restore_run(task_id)
+            if task is not None:
+                self._runs.move_to_end(task_id)
+            return task
 
     def delete_run(self, task_id: str) -> bool:
-        return self._runs.pop(task_id, None) is not None
+        with self._lock:
+            self._finished_at.pop(task_id, None)
+            archived = self._unarchive("runs", task_id)
+            return self._runs.pop(task_id, None) is not None or archived
+
+    def update_run(self, task_id: str, **fields: Any) -> None:
+        with self._lock:
+            task = self._runs[task_id]
+            for key, value in fields.items():
+                setattr(task, key, value)
+            self._runs.move_to_end(task_id)
+            if task.status in TERMINAL_STATUSES:
+                self._finished_at.setdefault(task_id, time.monotonic())
+                self._enforce_limits()
+            else:
+                self._finished_at.pop(task_id, None)
 
     def append_run_input(self, task_id: str, text: str) -> None:
-        self._runs[task_id].input_buffer.append(text)
+        with self._lock:
+            self._runs[task_id].input_buffer.append(text)
+
+    def _appendable_run(self, task_id: str) -> RunTask:
+        # Caller holds the lock; an archived run comes back, a missing one is a KeyError
+        task = self._runs.get(task_id) or self._restore_run(task_id)
+        if task is None:
+            raise KeyError(task_id)
+        return task
 
     def append_run_log(self, task_id: str, log: LogEntry) -> None:
-        self._runs[task_id].logs.append(log)
+        with self._lock:
+            self._appendable_run(task_id).logs.append(log)
+
+    def append_run_logs(self, task_id: str, logs: List[LogEntry]) -> None:
+        with self._lock:
+            self._appendable_run(task_id).logs.extend(logs)
 
     def add_run_artifact(self, task_id: str, artifact: RunArtifact) -> None:
         if not artifact.id:
             import uuid as _uuid
 
             artifact.id = str(_uuid.uuid4())
-        self._runs[task_id].artifacts.append(artifact)
+        with self._lock:
+            self._appendable_run(task_id).artifacts.append(artifact)
+
+    def append_run_output(self, task_id: str, text: str) -> None:
+        with self._lock:
+            task = self._runs[task_id]
+            task.partial_result = (task.partial_result or "") + text
 
     def get_run_artifacts(self, task_id: str) -> Optional[List[RunArtifact]]:
-        task = self._runs.get(task_id)
+        task = self.get_run(task_id)
         return None if task is None else list(task.artifacts)
 
     def get_single_run_artifact(
         self, task_id: str, artifact_id: str
     ) -> Optional[RunArtifact]:
-        task = self._runs.get(task_id)
+        task = self.get_run(task_id)
         if task is None:
             return None
         for art in task.artifacts:
@@ -105,4 +234,158 @@ class InMemoryStorage:
         return None
 
     def list_runs(self) -> List[RunTask]:
-        return list(self._runs.values())
+        with self._lock:
+            return list(self._runs.values())
+
+    def get_run_updates(
+        self,
+        task_id: str,
+        *,
+        logs_after: Optional[int] = None,
+        inputs_after: Optional[int] = None,
+        artifacts_after: Optional[int] = None,
+        output_after: Optional[int] = None,
+        limit: Optional[int] = None,
+    ) -> Optional[RunUpdates]:
+        with self._lock:
+            task = self.get_run(task_id)
+            if task is None:
+                return None
+            logs, log_cursor = _slice(task.logs, logs_after, limit)
+            inputs, input_cursor = _slice(task.input_buffer, inputs_after, limit)
+            arts, art_cursor = _slice(task.artifacts, artifacts_after, limit)
+            output = task.partial_result or ""
+            return RunUpdates(
+                id=task.id,
+                status=task.status,
+                estimated_completion_time=task.estimated_completion_time,
+                result_text=task.result_text,
+                input_prompt=task.input_prompt,
+                logs=logs,
+                inputs=inputs,
+                artifacts=arts,
+                output="" if output_after is None else output[max(0, output_after) :],
+                log_cursor=log_cursor,
+                input_cursor=input_cursor,
+                artifact_cursor=art_cursor,
+                output_cursor=len(output),
+            )
+
+    # Duration sketches are small and never expire
+    def load_run_durations(self) -> Dict[str, dict]:
+        with self._lock:
+            return dict(self._durations)
+
+    def save_run_duration(self, key: str, sketch: dict) -> None:
+        with self._lock:
+            self._durations[key] = sketch
+
+    # Retention (callers hold self._lock)
+    def _touch_chat(self, session_id: str) -> None:
+        self._chats.move_to_end(session_id)
+        self._chat_touched_at[session_id] = time.monotonic()
+
+    def _enforce_limits(self) -> None:
+        policy = self._retention
+        now = time.monotonic()
+        if now - self._last_sweep >= policy.sweep_interval:
+            self._last_sweep = now
+            if policy.run_ttl_seconds is not None:
+                cutoff = now - policy.run_ttl_seconds
+                for tid in [t for t, at in self._finished_at.items() if at <= cutoff]:
+                    self._evict_run(tid, "runs_expired")
+            if policy.chat_ttl_seconds is not None:
+                cutoff = now - policy.chat_ttl_seconds
+                for sid in [
+                    s for s, at in self._chat_touched_at.items() if at <= cutoff
+                ]:
+                    self._evict_chat(sid, "chats_expired")
+
+        if policy.max_runs is not None and len(self._runs) > policy.max_runs:
+            # Oldest-used first; active runs stay since a worker still reports to them
+            for tid in list(self._runs):
+                if len(self._runs) <= policy.max_runs:
+                    break
+                if tid in self._finished_at:
+                    self._evict_run(tid, "runs_evicted")
+        if policy.max_chats is not None:
+            while len(self._chats) > policy.max_chats:
+                self._evict_chat(next(iter(self._chats)), "chats_evicted")
+
+    def _evict_run(self, task_id: str, counter: str) -> None:
+        task = self._runs.pop(task_id, None)
+        self._finished_at.pop(task_id, None)
+        if task is None:
+            return
+        self._counters[counter] += 1
+        self._archive("runs", task_id, task.model_dump_json())
+
+    def _evict_chat(self, session_id: str, counter: str) -> None:
+        session = self._chats.pop(session_id, None)
+        self._chat_touched_at.pop(session_id, None)
+        if session is None:
+            return
+        self._counters[counter] += 1
+        self._archive("chats", session_id, session.model_dump_json())
+
+    def _archive_path(self, kind: str, key: str) -> Optional[Path]:
+        if not self._retention.archive_dir:
+            return None
+        # Keys are server-generated UUIDs; guard against path tricks anyway
+        if not key or "/" in key or "\\" in key or key.startswith("."):
+            return None
+        return Path(self._retention.archive_dir) / kind / f"{key}.json"
+
+    def _archive(self, kind: str, key: str, data: str) -> None:
+        path = self._archive_path(kind, key)
+        if path is None:
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            tmp.write_text(data, encoding="utf-8")
+            tmp.replace(path)
+            self._counters["archived"] += 1
+        except OSError:
+            pass
+
+    def _unarchive(self, kind: str, key: str) -> bool:
+        path = self._archive_path(kind, key)
+        if path is None:
+            return False
+        try:
+            path.unlink()
+            return True
+        except OSError:
+            return False
+
+    def _read_archive(self, kind: str, key: str) -> Optional[str]:
+        path = self._archive_path(kind, key)
+        if path is None or not path.exists():
+            return None
+        try:
+            return path.read_text(encoding="utf-8")
+        except OSError:
+            return None
+
+    def _restore_run(self, task_id: str) -> Optional[RunTask]:
+        data = self._read_archive("runs", task_id)
+        if data is None:
+            return None
+        task = RunTask.model_validate_json(data)
+        self._runs[task_id] = task
+        if task.status in TERMINAL_STATUSES:
+            self._finished_at[task_id] = time.monotonic()
+        # Limits apply again on the next insert; the caller gets this run back
+        self._counters["restored"] += 1
+        return task
+
+    def _restore_chat(self, session_id: str) -> Optional[ChatSession]:
+        data = self._read_archive("chats", session_id)
+        if data is None:
+            return None
+        session = ChatSession.model_validate_json(data)
+        self._chats[session_id] = session
+        self._touch_chat(session_id)
+        self._counters["restored"] += 1
+        return session
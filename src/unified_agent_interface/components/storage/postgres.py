@@ -0,0 +1,526 @@
+from __future__ import annotations
+
+import threading
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+from ...models.chat import Artifact, ChatSession, Message
+from ...models.run import LogEntry, RunArtifact, RunTask, RunUpdates
+
+
+_RUN_LIST_FIELDS = {"artifacts", "logs", "input_buffer"}
+_NOTIFY_CHANNEL = "uai_runs"
+_CHAT_LIST_FIELDS = {"messages", "artifacts"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS uai_runs (
+    id TEXT PRIMARY KEY,
+    created_at TIMESTAMP NOT NULL,
+    status TEXT NOT NULL,
+    data JSONB NOT NULL,
+    log_count INTEGER NOT NULL DEFAULT 0,
+    input_count INTEGER NOT NULL DEFAULT 0,
+    artifact_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS uai_run_logs (
+    task_id TEXT NOT NULL REFERENCES uai_runs (id) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    data JSONB NOT NULL,
+    PRIMARY KEY (task_id, seq)
+);
+CREATE TABLE IF NOT EXISTS uai_run_inputs (
+    task_id TEXT NOT NULL REFERENCES uai_runs (id) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (task_id, seq)
+);
+CREATE TABLE IF NOT EXISTS uai_run_artifacts (
+    task_id TEXT NOT NULL REFERENCES uai_runs (id) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    artifact_id TEXT NOT NULL,
+    data JSONB NOT NULL,
+    PRIMARY KEY (task_id, seq)
+);
+CREATE TABLE IF NOT EXISTS uai_chats (
+    id TEXT PRIMARY KEY,
+    created_at TIMESTAMP NOT NULL,
+    data JSONB NOT NULL,
+    message_count INTEGER NOT NULL DEFAULT 0,
+    artifact_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS uai_chat_messages (
+    session_id TEXT NOT NULL REFERENCES uai_chats (id) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    data JSONB NOT NULL,
+    PRIMARY KEY (session_id, seq)
+);
+CREATE TABLE IF NOT EXISTS uai_chat_artifacts (
+    session_id TEXT NOT NULL REFERENCES uai_chats (id) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    artifact_id TEXT NOT NULL,
+    data JSONB NOT NULL,
+    PRIMARY KEY (session_id, seq)
+);
+CREATE TABLE IF NOT EXISTS uai_run_durations (
+    key TEXT PRIMARY KEY,
+    data JSONB NOT NULL
+);
+"""
+
+# Appends bump a per-parent counter and insert the child in one statement. The
+# row lock taken by the UPDATE serializes concurrent appends from any process,
+# and a missing parent inserts nothing (rowcount 0).
+_APPEND_LOG = """
+WITH s AS (
+    UPDATE uai_runs SET log_count = log_count + 1 WHERE id = %(id)s
+    RETURNING log_count - 1 AS seq
+)
+INSERT INTO uai_run_logs (task_id, seq, data) SELECT %(id)s, seq, %(data)s FROM s
+"""
+_APPEND_LOGS = """
+WITH s AS (
+    UPDATE uai_runs SET log_count = log_count + %(n)s WHERE id = %(id)s
+    RETURNING log_count - %(n)s AS base
+)
+INSERT INTO uai_run_logs (task_id, seq, data)
+SELECT %(id)s, s.base + e.ord - 1, e.data
+FROM s, unnest(%(data)s::jsonb[]) WITH ORDINALITY AS e(data, ord)
+"""
+_APPEND_INPUT = """
+WITH s AS (
+    UPDATE uai_runs SET input_count = input_count + 1 WHERE id = %(id)s
+    RETURNING input_count - 1 AS seq
+)
+INSERT INTO uai_run_inputs (task_id, seq, value) SELECT %(id)s, seq, %(value)s FROM s
+"""
+_APPEND_RUN_ARTIFACT = """
+WITH s AS (
+    UPDATE uai_runs SET artifact_count = artifact_count + 1 WHERE id = %(id)s
+    RETURNING artifact_count - 1 AS seq
+)
+INSERT INTO uai_run_artifacts (task_id, seq, artifact_id, data)
+SELECT %(id)s, seq, %(artifact_id)s, %(data)s FROM s
+"""
+# Streamed output is concatenated in place; the row lock orders concurrent appends
+_APPEND_OUTPUT = """
+UPDATE uai_runs SET data = jsonb_set(
+    data, '{partial_result}', to_jsonb(COALESCE(data->>'partial_result', '') || %s::text)
+) WHERE id = %s
+"""
+_APPEND_MESSAGE = """
+WITH s AS (
+    UPDATE uai_chats SET message_count = message_count + 1 WHERE id = %(id)s
+    RETURNING message_count - 1 AS seq
+)
+INSERT INTO uai_chat_messages (session_id, seq, data) SELECT %(id)s, seq, %(data)s FROM s
+"""
+_APPEND_CHAT_ARTIFACT = """
+WITH s AS (
+    UPDATE uai_chats SET artifact_count = artifact_count + 1 WHERE id = %(id)s
+    RETURNING artifact_count - 1 AS seq
+)
+INSERT INTO uai_chat_artifacts (session_id, seq, artifact_id, data)
+SELECT %(id)s, seq, %(artifact_id)s, %(data)s FROM s
+"""
+
+
+class PostgresStorage:
+    """Storage backed by Postgres through a pooled `psycopg` connection pool.
+
+    By default it borrows the process-wide pool from `queue.get_connection_pool`,
+    the same one Procrastinate uses to defer jobs, so several server processes
+    or hosts can serve the same runs. Logs, inputs and artifacts are separate
+    tables; appending one is a single INSERT.
+    """
+
+    def __init__(self, pool: Any = None, *, create_schema: bool = True) -> None:
+        if pool is None:
+            from ...queue import get_connection_pool
+
+            pool = get_connection_pool()
+        self._pool = pool
+        if create_schema:
+            with self._pool.connection() as conn:
+                conn.execute(_SCHEMA)
+
+    def _jsonb(self, value: str) -> Any:
+        from psycopg.types.json import Jsonb
+
+        # Already-serialized pydantic JSON; skip psycopg's own json.dumps
+        return Jsonb(value, dumps=lambda s: s)
+
+    def _execute(self, sql: str, params: Any = None) -> int:
+        with self._pool.connection() as conn:
+            return conn.execute(sql, params).rowcount
+
+    def _fetchone(self, sql: str, params: Any = None) -> Optional[tuple]:
+        with self._pool.connection() as conn:
+            return conn.execute(sql, params).fetchone()
+
+    def _fetchall(self, sql: str, params: Any = None) -> List[tuple]:
+        with self._pool.connection() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    # Chat
+    def create_chat(self) -> ChatSession:
+        session = ChatSession(id=str(uuid.uuid4()))
+        self._execute(
+            "INSERT INTO uai_chats (id, created_at, data) VALUES (%s, %s, %s)",
+            (
+                session.id,
+                session.created_at,
+                self._jsonb(session.model_dump_json(exclude=_CHAT_LIST_FIELDS)),
+            ),
+        )
+        return session
+
+    def get_chat(self, session_id: str) -> Optional[ChatSession]:
+        row = self._fetchone("SELECT data FROM uai_chats WHERE id = %s", (session_id,))
+        if row is None:
+            return None
+        session = ChatSession.model_validate(row[0])
+        session.messages = self.get_messages(session_id) or []
+        session.artifacts = self.get_artifacts(session_id) or []
+        return session
+
+    def delete_chat(self, session_id: str) -> bool:
+        return self._execute("DELETE FROM uai_chats WHERE id = %s", (session_id,)) > 0
+
+    def add_message(self, session_id: str, message: Message) -> None:
+        message.id = message.id or str(uuid.uuid4())
+        n = self._execute(
+            _APPEND_MESSAGE,
+            {"id": session_id, "data": self._jsonb(message.model_dump_json())},
+        )
+        if n == 0:
+            raise KeyError(session_id)
+
+    def get_messages(self, session_id: str) -> Optional[List[Message]]:
+        if (
+            self._fetchone("SELECT 1 FROM uai_chats WHERE id = %s", (session_id,))
+            is None
+        ):
+            return None
+        rows = self._fetchall(
+            "SELECT data FROM uai_chat_messages WHERE session_id = %s ORDER BY seq",
+            (session_id,),
+        )
+        return [Message.model_validate(r[0]) for r in rows]
+
+    def add_artifact(self, session_id: str, artifact: Artifact) -> None:
+        if not artifact.id:
+            artifact.id = str(uuid.uuid4())
+        n = self._execute(
+            _APPEND_CHAT_ARTIFACT,
+            {
+                "id": session_id,
+                "artifact_id": artifact.id,
+                "data": self._jsonb(artifact.model_dump_json()),
+            },
+        )
+        if n == 0:
+            raise KeyError(session_id)
+
+    def get_artifacts(self, session_id: str) -> Optional[List[Artifact]]:
+        if (
+            self._fetchone("SELECT 1 FROM uai_chats WHERE id = %s", (session_id,))
+            is None
+        ):
+            return None
+        rows = self._fetchall(
+            "SELECT data FROM uai_chat_artifacts WHERE session_id = %s ORDER BY seq",
+            (session_id,),
+        )
+        return [Artifact.model_validate(r[0]) for r in rows]
+
+    def get_artifact(self, session_id: str, artifact_id: str) -> Optional[Artifact]:
+        row = self._fetchone(
+            "SELECT data FROM uai_chat_artifacts "
+            "WHERE session_id = %s AND artifact_id = %s ORDER BY seq LIMIT 1",
+            (session_id, artifact_id),
+        )
+        return None if row is None else Artifact.model_validate(row[0])
+
+    def list_chats(self) -> List[ChatSession]:
+        sessions: Dict[str, ChatSession] = {}
+        for (data,) in self._fetchall(
+            "SELECT data FROM uai_chats ORDER BY created_at, id"
+        ):
+            session = ChatSession.model_validate(data)
+            sessions[session.id] = session
+        for sid, data in self._fetchall(
+            "SELECT session_id, data FROM uai_chat_messages ORDER BY session_id, seq"
+        ):
+            if sid in sessions:
+                sessions[sid].messages.append(Message.model_validate(data))
+        for sid, data in self._fetchall(
+            "SELECT session_id, data FROM uai_chat_artifacts ORDER BY session_id, seq"
+        ):
+            if sid in sessions:
+                sessions[sid].artifacts.append(Artifact.model_validate(data))
+        return list(sessions.values())
+
+    # Runs
+    def create_run(self, initial_input: Optional[object], params: dict) -> RunTask:
+        task = RunTask(
+            id=str(uuid.uuid4()),
+            status="pending",
+            estimated_completion_time=None,
+            params=dict(params or {}),
+        )
+        with self._pool.connection() as conn:
+            conn.execute(
+                "INSERT INTO uai_runs (id, created_at, status, data) "
+                "VALUES (%s, %s, %s, %s)",
+                (
+                    task.id,
+                    task.created_at,
+                    task.status,
+                    self._jsonb(task.model_dump_json(exclude=_RUN_LIST_FIELDS)),
+                ),
+            )
+            if isinstance(initial_input, str) and initial_input:
+                conn.execute(_APPEND_INPUT, {"id": task.id, "value": initial_input})
+                task.input_buffer.append(initial_input)
+        return task
+
+    def get_run(self, task_id: str) -> Optional[RunTask]:
+        row = self._fetchone("SELECT data FROM uai_runs WHERE id = %s", (task_id,))
+        if row is None:
+            return None
+        task = RunTask.model_validate(row[0])
+        task.logs = [
+            LogEntry.model_validate(r[0])
+            for r in self._fetchall(
+                "SELECT data FROM uai_run_logs WHERE task_id = %s ORDER BY seq",
+                (task_id,),
+            )
+        ]
+        task.input_buffer = [
+            r[0]
+            for r in self._fetchall(
+                "SELECT value FROM uai_run_inputs WHERE task_id = %s ORDER BY seq",
+                (task_id,),
+            )
+        ]
+        task.artifacts = self.get_run_artifacts(task_id) or []
+        return task
+
+    def delete_run(self, task_id: str) -> bool:
+        return self._execute("DELETE FROM uai_runs WHERE id = %s", (task_id,)) > 0
+
+    def update_run(self, task_id: str, **fields: Any) -> None:
+        with self._pool.connection() as conn:
+            # Row lock keeps concurrent read-modify-write updates consistent
+            row = conn.execute(
+                "SELECT data FROM uai_runs WHERE id = %s FOR UPDATE", (task_id,)
+            ).fetchone()
+            if row is None:
+                raise KeyError(task_id)
+            task = RunTask.model_validate(row[0])
+            for key, value in fields.items():
+                if key in _RUN_LIST_FIELDS:
+                    raise ValueError(f"'{key}' is append-only; use the append methods")
+                setattr(task, key, value)
+            conn.execute(
+                "UPDATE uai_runs SET status = %s, data = %s WHERE id = %s",
+                (
+                    task.status,
+                    self._jsonb(task.model_dump_json(exclude=_RUN_LIST_FIELDS)),
+                    task_id,
+                ),
+            )
+
+    def append_run_input(self, task_id: str, text: str) -> None:
+        if self._execute(_APPEND_INPUT, {"id": task_id, "value": text}) == 0:
+            raise KeyError(task_id)
+
+    def append_run_log(self, task_id: str, log: LogEntry) -> None:
+        n = self._execute(
+            _APPEND_LOG, {"id": task_id, "data": self._jsonb(log.model_dump_json())}
+        )
+        if n == 0:
+            raise KeyError(task_id)
+
+    def append_run_logs(self, task_id: str, logs: List[LogEntry]) -> None:
+        if not logs:
+            if (
+                self._fetchone("SELECT 1 FROM uai_runs WHERE id = %s", (task_id,))
+                is None
+            ):
+                raise KeyError(task_id)
+            return
+        # One counter bump and one multi-row insert for the whole batch
+        n = self._execute(
+            _APPEND_LOGS,
+            {
+                "id": task_id,
+                "n": len(logs),
+                "data": [self._jsonb(log.model_dump_json()) for log in logs],
+            },
+        )
+        if n == 0:
+            raise KeyError(task_id)
+
+    def add_run_artifact(self, task_id: str, artifact: RunArtifact) -> None:
+        if not artifact.id:
+            artifact.id = str(uuid.uuid4())
+        n = self._execute(
+            _APPEND_RUN_ARTIFACT,
+            {
+                "id": task_id,
+                "artifact_id": artifact.id,
+                "data": self._jsonb(artifact.model_dump_json()),
+            },
+        )
+        if n == 0:
+            raise KeyError(task_id)
+
+    def append_run_output(self, task_id: str, text: str) -> None:
+        if self._execute(_APPEND_OUTPUT, (text, task_id)) == 0:
+            raise KeyError(task_id)
+
+    def get_run_artifacts(self, task_id: str) -> Optional[List[RunArtifact]]:
+        if self._fetchone("SELECT 1 FROM uai_runs WHERE id = %s", (task_id,)) is None:
+            return None
+        rows = self._fetchall(
+            "SELECT data FROM uai_run_artifacts WHERE task_id = %s ORDER BY seq",
+            (task_id,),
+        )
+        return [RunArtifact.model_validate(r[0]) for r in rows]
+
+    def get_single_run_artifact(
+        self, task_id: str, artifact_id: str
+    ) -> Optional[RunArtifact]:
+        row = self._fetchone(
+            "SELECT data FROM uai_run_artifacts "
+            "WHERE task_id = %s AND artifact_id = %s ORDER BY seq LIMIT 1",
+            (task_id, artifact_id),
+        )
+        return None if row is None else RunArtifact.model_validate(row[0])
+
+    def list_runs(self) -> List[RunTask]:
+        tasks: Dict[str, RunTask] = {}
+        for (data,) in self._fetchall(
+            "SELECT data FROM uai_runs ORDER BY created_at, id"
+        ):
+            task = RunTask.model_validate(data)
+            tasks[task.id] = task
+        for tid, data in self._fetchall(
+            "SELECT task_id, data FROM uai_run_logs ORDER BY task_id, seq"
+        ):
+            if tid in tasks:
+                tasks[tid].logs.append(LogEntry.model_validate(data))
+        for tid, value in self._fetchall(
+            "SELECT task_id, value FROM uai_run_inputs ORDER BY task_id, seq"
+        ):
+            if tid in tasks:
+                tasks[tid].input_buffer.append(value)
+        for tid, data in self._fetchall(
+            "SELECT task_id, data FROM uai_run_artifacts ORDER BY task_id, seq"
+        ):
+            if tid in tasks:
+                tasks[tid].artifacts.append(RunArtifact.model_validate(data))
+        return list(tasks.values())
+
+    def get_run_updates(
+        self,
+        task_id: str,
+        *,
+        logs_after: Optional[int] = None,
+        inputs_after: Optional[int] = None,
+        artifacts_after: Optional[int] = None,
+        output_after: Optional[int] = None,
+        limit: Optional[int] = None,
+    ) -> Optional[RunUpdates]:
+        with self._pool.connection() as conn:
+            row = conn.execute(
+                "SELECT data, log_count, input_count, artifact_count "
+                "FROM uai_runs WHERE id = %s",
+                (task_id,),
+            ).fetchone()
+            if row is None:
+                return None
+            task = RunTask.model_validate(row[0])
+            updates = RunUpdates(
+                id=task.id,
+                status=task.status,
+                estimated_completion_time=task.estimated_completion_time,
+                result_text=task.result_text,
+                input_prompt=task.input_prompt,
+                log_cursor=row[1],
+                input_cursor=row[2],
+                artifact_cursor=row[3],
+                output_cursor=len(task.partial_result or ""),
+            )
+            if output_after is not None:
+                updates.output = (task.partial_result or "")[max(0, output_after) :]
+            # LIMIT NULL means no limit in Postgres
+            n = None if limit is None else max(0, limit)
+            if logs_after is not None:
+                updates.logs = [
+                    LogEntry.model_validate(r[0])
+                    for r in conn.execute(
+                        "SELECT data FROM uai_run_logs WHERE task_id = %s "
+                        "AND seq >= %s ORDER BY seq LIMIT %s",
+                        (task_id, max(0, logs_after), n),
+                    )
+                ]
+                updates.log_cursor = max(0, logs_after) + len(updates.logs)
+            if inputs_after is not None:
+                updates.inputs = [
+                    r[0]
+                    for r in conn.execute(
+                        "SELECT value FROM uai_run_inputs WHERE task_id = %s "
+                        "AND seq >= %s ORDER BY seq LIMIT %s",
+                        (task_id, max(0, inputs_after), n),
+                    )
+                ]
+                updates.input_cursor = max(0, inputs_after) + len(updates.inputs)
+            if artifacts_after is not None:
+                updates.artifacts = [
+                    RunArtifact.model_validate(r[0])
+                    for r in conn.execute(
+                        "SELECT data FROM uai_run_artifacts WHERE task_id = %s "
+                        "AND seq >= %s ORDER BY seq LIMIT %s",
+                        (task_id, max(0, artifacts_after), n),
+                    )
+                ]
+                updates.artifact_cursor = max(0, artifacts_after) + len(
+                    updates.artifacts
+                )
+            return updates
+
+    # Duration sketches
+    def load_run_durations(self) -> Dict[str, dict]:
+        rows = self._fetchall("SELECT key, data FROM uai_run_durations")
+        return {key: data for key, data in rows}
+
+    def save_run_duration(self, key: str, sketch: dict) -> None:
+        from psycopg.types.json import Jsonb
+
+        self._execute(
+            "INSERT INTO uai_run_durations (key, data) VALUES (%s, %s) "
+            "ON CONFLICT (key) DO UPDATE SET data = EXCLUDED.data",
+            (key, Jsonb(sketch)),
+        )
+
+    # Change notifications between processes (LISTEN/NOTIFY)
+    def notify_run(self, task_id: str) -> None:
+        self._execute("SELECT pg_notify(%s, %s)", (_NOTIFY_CHANNEL, task_id))
+
+    def listen_runs(
+        self, callback: Callable[[str], None], stop: threading.Event
+    ) -> None:
+        """LISTEN on a dedicated connection, calling `callback` per notification."""
+        import psycopg
+
+        # Same target as the pool: without a DSN its settings are all in `kwargs`
+        kwargs = {**(self._pool.kwargs or {}), "autocommit": True}
+        with psycopg.connect(self._pool.conninfo, **kwargs) as conn:
+            conn.execute(f"LISTEN {_NOTIFY_CHANNEL}")
+            while not stop.is_set():
+                for note in conn.notifies(timeout=1.0):
+                    callback(note.payload)
+                    if stop.is_set():
+                        break
@@ -0,0 +1,569 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from ...models.chat import Artifact, ChatSession, Message
+from ...models.run import LogEntry, RunArtifact, RunTask, RunUpdates
+
+
+# List fields are stored in their own append-only tables; the run row only keeps
+# the scalar fields as a JSON document so new model fields need no migration.
+_RUN_LIST_FIELDS = {"artifacts", "logs", "input_buffer"}
+_CHAT_LIST_FIELDS = {"messages", "artifacts"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    status TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS run_logs (
+    task_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (task_id, seq)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS run_inputs (
+    task_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (task_id, seq)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS run_artifacts (
+    task_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    artifact_id TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (task_id, seq)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS chats (
+    id TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS chat_messages (
+    session_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (session_id, seq)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS chat_artifacts (
+    session_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    artifact_id TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (session_id, seq)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS run_events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    task_id TEXT NOT NULL,
+    at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS run_durations (
+    key TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+"""
+
+# Statements are module constants so sqlite3's per-connection statement cache
+# reuses the compiled (prepared) form on every call.
+_INSERT_RUN = "INSERT INTO runs (id, created_at, status, data) VALUES (?, ?, ?, ?)"
+_SELECT_RUN = "SELECT data FROM runs WHERE id = ?"
+_SELECT_RUNS = "SELECT data FROM runs ORDER BY created_at, id"
+_UPDATE_RUN = "UPDATE runs SET status = ?, data = ? WHERE id = ?"
+_RUN_EXISTS = "SELECT 1 FROM runs WHERE id = ?"
+_APPEND_OUTPUT = (
+    "UPDATE runs SET data = json_set(data, '$.partial_result', "
+    "COALESCE(json_extract(data, '$.partial_result'), '') || ?) WHERE id = ?"
+)
+_APPEND_LOG = (
+    "INSERT INTO run_logs (task_id, seq, data) "
+    "SELECT ?, COALESCE(MAX(seq), -1) + 1, ? FROM run_logs WHERE task_id = ?"
+)
+_APPEND_INPUT = (
+    "INSERT INTO run_inputs (task_id, seq, value) "
+    "SELECT ?, COALESCE(MAX(seq), -1) + 1, ? FROM run_inputs WHERE task_id = ?"
+)
+_APPEND_RUN_ARTIFACT = (
+    "INSERT INTO run_artifacts (task_id, seq, artifact_id, data) "
+    "SELECT ?, COALESCE(MAX(seq), -1) + 1, ?, ? FROM run_artifacts WHERE task_id = ?"
+)
+_SELECT_LOGS = "SELECT data FROM run_logs WHERE task_id = ? ORDER BY seq"
+_SELECT_INPUTS = "SELECT value FROM run_inputs WHERE task_id = ? ORDER BY seq"
+_SELECT_RUN_ARTIFACTS = "SELECT data FROM run_artifacts WHERE task_id = ? ORDER BY seq"
+_SELECT_RUN_ARTIFACT = (
+    "SELECT data FROM run_artifacts WHERE task_id = ? AND artifact_id = ? "
+    "ORDER BY seq LIMIT 1"
+)
+_SELECT_LOGS_AFTER = (
+    "SELECT data FROM run_logs WHERE task_id = ? AND seq >= ? ORDER BY seq LIMIT ?"
+)
+_SELECT_INPUTS_AFTER = (
+    "SELECT value FROM run_inputs WHERE task_id = ? AND seq >= ? ORDER BY seq LIMIT ?"
+)
+_SELECT_RUN_ARTIFACTS_AFTER = (
+    "SELECT data FROM run_artifacts WHERE task_id = ? AND seq >= ? ORDER BY seq LIMIT ?"
+)
+_SELECT_RUN_CURSORS = (
+    "SELECT "
+    "(SELECT COALESCE(MAX(seq), -1) + 1 FROM run_logs WHERE task_id = ?), "
+    "(SELECT COALESCE(MAX(seq), -1) + 1 FROM run_inputs WHERE task_id = ?), "
+    "(SELECT COALESCE(MAX(seq), -1) + 1 FROM run_artifacts WHERE task_id = ?)"
+)
+_SAVE_DURATION = (
+    "INSERT INTO run_durations (key, data) VALUES (?, ?) "
+    "ON CONFLICT (key) DO UPDATE SET data = excluded.data"
+)
+_NOTIFY_RUN = "INSERT INTO run_events (task_id, at) VALUES (?, ?)"
+_SELECT_EVENTS = "SELECT seq, task_id FROM run_events WHERE seq > ? ORDER BY seq"
+_PRUNE_EVENTS = "DELETE FROM run_events WHERE at < ?"
+# Notifications older than this are pruned; listeners poll far more often
+_EVENT_RETENTION = 60.0
+_INSERT_CHAT = "INSERT INTO chats (id, created_at, data) VALUES (?, ?, ?)"
+_SELECT_CHAT = "SELECT data FROM chats WHERE id = ?"
+_SELECT_CHATS = "SELECT data FROM chats ORDER BY created_at, id"
+_CHAT_EXISTS = "SELECT 1 FROM chats WHERE id = ?"
+_APPEND_MESSAGE = (
+    "INSERT INTO chat_messages (session_id, seq, data) "
+    "SELECT ?, COALESCE(MAX(seq), -1) + 1, ? FROM chat_messages WHERE session_id = ?"
+)
+_APPEND_CHAT_ARTIFACT = (
+    "INSERT INTO chat_artifacts (session_id, seq, artifact_id, data) "
+    "SELECT ?, COALESCE(MAX(seq), -1) + 1, ?, ? "
+    "FROM chat_artifacts WHERE session_id = ?"
+)
+_SELECT_MESSAGES = "SELECT data FROM chat_messages WHERE session_id = ? ORDER BY seq"
+_SELECT_CHAT_ARTIFACTS = (
+    "SELECT data FROM chat_artifacts WHERE session_id = ? ORDER BY seq"
+)
+_SELECT_CHAT_ARTIFACT = (
+    "SELECT data FROM chat_artifacts WHERE session_id = ? AND artifact_id = ? "
+    "ORDER BY seq LIMIT 1"
+)
+
+
+class SQLiteStorage:
+    """Storage backed by a single SQLite database file.
+
+    Logs, inputs, artifacts and messages live in their own tables, so appending
+    one is a single INSERT. The database runs in WAL mode and commits are
+    batched: writes become durable (and visible to other processes) after
+    `batch_size` statements or `flush_interval` seconds, whichever comes first.
+    Reads through this instance always see its own pending writes.
+    """
+
+    def __init__(
+        self,
+        path: str = "uai.db",
+        *,
+        batch_size: int = 64,
+        flush_interval: float = 0.05,
+    ) -> None:
+        self.path = str(path)
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._batch_size = max(1, int(batch_size))
+        self._flush_interval = max(0.0, float(flush_interval))
+        self._lock = threading.RLock()
+        self._pending = 0
+        self._timer: Optional[threading.Timer] = None
+        self._conn = sqlite3.connect(
+            self.path, check_same_thread=False, cached_statements=256
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    # Transaction batching
+    def _write(self, sql: str, params: tuple) -> sqlite3.Cursor:
+        with self._lock:
+            cur = self._conn.execute(sql, params)
+            self._mark_dirty()
+            return cur
+
+    def _mark_dirty(self) -> None:
+        self._pending += 1
+        if self._pending >= self._batch_size or self._flush_interval == 0:
+            self.flush()
+        elif self._timer is None:
+            self._timer = threading.Timer(self._flush_interval, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self) -> None:
+        """Commit any pending writes."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._pending:
+                self._conn.commit()
+                self._pending = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self.flush()
+            self._conn.close()
+
+    def _exists(self, sql: str, key: str) -> bool:
+        return self._conn.execute(sql, (key,)).fetchone() is not None
+
+    # Chat
+    def create_chat(self) -> ChatSession:
+        session = ChatSession(id=str(uuid.uuid4()))
+        self._write(
+            _INSERT_CHAT,
+            (
+                session.id,
+                session.created_at.isoformat(),
+                session.model_dump_json(exclude=_CHAT_LIST_FIELDS),
+            ),
+        )
+        return session
+
+    def get_chat(self, session_id: str) -> Optional[ChatSession]:
+        with self._lock:
+            row = self._conn.execute(_SELECT_CHAT, (session_id,)).fetchone()
+            if row is None:
+                return None
+            return self._load_chat(row[0])
+
+    def _load_chat(self, data: str) -> ChatSession:
+        session = ChatSession.model_validate_json(data)
+        session.messages = [
+            Message.model_validate_json(r[0])
+            for r in self._conn.execute(_SELECT_MESSAGES, (session.id,))
+        ]
+        session.artifacts = [
+            Artifact.model_validate_json(r[0])
+            for r in self._conn.execute(_SELECT_CHAT_ARTIFACTS, (session.id,))
+        ]
+        return session
+
+    def delete_chat(self, session_id: str) -> bool:
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM chats WHERE id = ?", (session_id,))
+            self._conn.execute(
+                "DELETE FROM chat_messages WHERE session_id = ?", (session_id,)
+            )
+            self._conn.execute(
+                "DELETE FROM chat_artifacts WHERE session_id = ?", (session_id,)
+            )
+            self._mark_dirty()
+            return cur.rowcount > 0
+
+    def add_message(self, session_id: str, message: Message) -> None:
+        message.id = message.id or str(uuid.uuid4())
+        with self._lock:
+            if not self._exists(_CHAT_EXISTS, session_id):
+                raise KeyError(session_id)
+            self._write(
+                _APPEND_MESSAGE, (session_id, message.model_dump_json(), session_id)
+            )
+
+    def get_messages(self, session_id: str) -> Optional[List[Message]]:
+        with self._lock:
+            if not self._exists(_CHAT_EXISTS, session_id):
+                return None
+            return [
+                Message.model_validate_json(r[0])
+                for r in self._conn.execute(_SELECT_MESSAGES, (session_id,))
+            ]
+
+    def add_artifact(self, session_id: str, artifact: Artifact) -> None:
+        if not artifact.id:
+            artifact.id = str(uuid.uuid4())
+        with self._lock:
+            if not self._exists(_CHAT_EXISTS, session_id):
+                raise KeyError(session_id)
+            self._write(
+                _APPEND_CHAT_ARTIFACT,
+                (session_id, artifact.id, artifact.model_dump_json(), session_id),
+            )
+
+    def get_artifacts(self, session_id: str) -> Optional[List[Artifact]]:
+        with self._lock:
+            if not self._exists(_CHAT_EXISTS, session_id):
+                return None
+            return [
+                Artifact.model_validate_json(r[0])
+                for r in self._conn.execute(_SELECT_CHAT_ARTIFACTS, (session_id,))
+            ]
+
+    def get_artifact(self, session_id: str, artifact_id: str) -> Optional[Artifact]:
+        with self._lock:
+            row = self._conn.execute(
+                _SELECT_CHAT_ARTIFACT, (session_id, artifact_id)
+            ).fetchone()
+            return None if row is None else Artifact.model_validate_json(row[0])
+
+    def list_chats(self) -> List[ChatSession]:
+        with self._lock:
+            rows = self._conn.execute(_SELECT_CHATS).fetchall()
+            return [self._load_chat(r[0]) for r in rows]
+
+    # Runs
+    def create_run(self, initial_input: Optional[object], params: dict) -> RunTask:
+        task = RunTask(
+            id=str(uuid.uuid4()),
+            status="pending",
+            estimated_completion_time=None,
+            params=dict(params or {}),
+        )
+        with self._lock:
+            self._write(
+                _INSERT_RUN,
+                (
+                    task.id,
+                    task.created_at.isoformat(),
+                    task.status,
+                    task.model_dump_json(exclude=_RUN_LIST_FIELDS),
+                ),
+            )
+            if isinstance(initial_input, str) and initial_input:
+                self._write(_APPEND_INPUT, (task.id, initial_input, task.id))
+                task.input_buffer.append(initial_input)
+        return task
+
+    def get_run(self, task_id: str) -> Optional[RunTask]:
+        with self._lock:
+            row = self._conn.execute(_SELECT_RUN, (task_id,)).fetchone()
+            if row is None:
+                return None
+            return self._load_run(row[0])
+
+    def _load_run(self, data: str) -> RunTask:
+        task = RunTask.model_validate_json(data)
+        task.logs = [
+            LogEntry.model_validate_json(r[0])
+            for r in self._conn.execute(_SELECT_LOGS, (task.id,))
+        ]
+        task.input_buffer = [
+            r[0] for r in self._conn.execute(_SELECT_INPUTS, (task.id,))
+        ]
+        task.artifacts = [
+            RunArtifact.model_validate_json(r[0])
+            for r in self._conn.execute(_SELECT_RUN_ARTIFACTS, (task.id,))
+        ]
+        return task
+
+    def delete_run(self, task_id: str) -> bool:
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM runs WHERE id = ?", (task_id,))
+            for table in ("run_logs", "run_inputs", "run_artifacts"):
+                self._conn.execute(f"DELETE FROM {table} WHERE task_id = ?", (task_id,))
+            self._mark_dirty()
+            return cur.rowcount > 0
+
+    def update_run(self, task_id: str, **fields: Any) -> None:
+        with self._lock:
+            row = self._conn.execute(_SELECT_RUN, (task_id,)).fetchone()
+            if row is None:
+                raise KeyError(task_id)
+            task = RunTask.model_validate_json(row[0])
+            for key, value in fields.items():
+                if key in _RUN_LIST_FIELDS:
+                    raise ValueError(f"'{key}' is append-only; use the append methods")
+                setattr(task, key, value)
+            self._write(
+                _UPDATE_RUN,
+                (task.status, task.model_dump_json(exclude=_RUN_LIST_FIELDS), task_id),
+            )
+
+    def append_run_input(self, task_id: str, text: str) -> None:
+        with self._lock:
+            if not self._exists(_RUN_EXISTS, task_id):
+                raise KeyError(task_id)
+            self._write(_APPEND_INPUT, (task_id, text, task_id))
+
+    def append_run_log(self, task_id: str, log: LogEntry) -> None:
+        with self._lock:
+            if not self._exists(_RUN_EXISTS, task_id):
+                raise KeyError(task_id)
+            self._write(_APPEND_LOG, (task_id, log.model_dump_json(), task_id))
+
+    def append_run_logs(self, task_id: str, logs: List[LogEntry]) -> None:
+        with self._lock:
+            if not self._exists(_RUN_EXISTS, task_id):
+                raise KeyError(task_id)
+            if not logs:
+                return
+            self._conn.executemany(
+                _APPEND_LOG,
+                [(task_id, log.model_dump_json(), task_id) for log in logs],
+            )
+            self._mark_dirty()
+
+    def add_run_artifact(self, task_id: str, artifact: RunArtifact) -> None:
+        if not artifact.id:
+            artifact.id = str(uuid.uuid4())
+        with self._lock:
+            if not self._exists(_RUN_EXISTS, task_id):
+                raise KeyError(task_id)
+            self._write(
+                _APPEND_RUN_ARTIFACT,
+                (task_id, artifact.id, artifact.model_dump_json(), task_id),
+            )
+
+    def append_run_output(self, task_id: str, text: str) -> None:
+        with self._lock:
+            if self._write(_APPEND_OUTPUT, (text, task_id)).rowcount == 0:
+                raise KeyError(task_id)
+
+    def get_run_artifacts(self, task_id: str) -> Optional[List[RunArtifact]]:
+        with self._lock:
+            if not self._exists(_RUN_EXISTS, task_id):
+                return None
+            return [
+                RunArtifact.model_validate_json(r[0])
+                for r in self._conn.execute(_SELECT_RUN_ARTIFACTS, (task_id,))
+            ]
+
+    def get_single_run_artifact(
+        self, task_id: str, artifact_id: str
+    ) -> Optional[RunArtifact]:
+        with self._lock:
+            row = self._conn.execute(
+                _SELECT_RUN_ARTIFACT, (task_id, artifact_id)
+            ).fetchone()
+            return None if row is None else RunArtifact.model_validate_json(row[0])
+
+    def list_runs(self) -> List[RunTask]:
+        with self._lock:
+            tasks: Dict[str, RunTask] = {}
+            for (data,) in self._conn.execute(_SELECT_RUNS):
+                task = RunTask.model_validate_json(data)
+                tasks[task.id] = task
+            # Load children with one scan per table instead of one query per run
+            for task_id, data in self._conn.execute(
+                "SELECT task_id, data FROM run_logs ORDER BY task_id, seq"
+            ):
+                if task_id in tasks:
+                    tasks[task_id].logs.append(LogEntry.model_validate_json(data))
+            for task_id, value in self._conn.execute(
+                "SELECT task_id, value FROM run_inputs ORDER BY task_id, seq"
+            ):
+                if task_id in tasks:
+                    tasks[task_id].input_buffer.append(value)
+            for task_id, data in self._conn.execute(
+                "SELECT task_id, data FROM run_artifacts ORDER BY task_id, seq"
+            ):
+                if task_id in tasks:
+                    tasks[task_id].artifacts.append(
+                        RunArtifact.model_validate_json(data)
+                    )
+            return list(tasks.values())
+
+    def get_run_updates(
+        self,
+        task_id: str,
+        *,
+        logs_after: Optional[int] = None,
+        inputs_after: Optional[int] = None,
+        artifacts_after: Optional[int] = None,
+        output_after: Optional[int] = None,
+        limit: Optional[int] = None,
+    ) -> Optional[RunUpdates]:
+        with self._lock:
+            row = self._conn.execute(_SELECT_RUN, (task_id,)).fetchone()
+            if row is None:
+                return None
+            task = RunTask.model_validate_json(row[0])
+            counts = self._conn.execute(
+                _SELECT_RUN_CURSORS, (task_id, task_id, task_id)
+            ).fetchone()
+            # SQLite treats a negative LIMIT as unbounded
+            n = -1 if limit is None else max(0, limit)
+            updates = RunUpdates(
+                id=task.id,
+                status=task.status,
+                estimated_completion_time=task.estimated_completion_time,
+                result_text=task.result_text,
+                input_prompt=task.input_prompt,
+                log_cursor=counts[0],
+                input_cursor=counts[1],
+                artifact_cursor=counts[2],
+                output_cursor=len(task.partial_result or ""),
+            )
+            if output_after is not None:
+                updates.output = (task.partial_result or "")[max(0, output_after) :]
+            if logs_after is not None:
+                updates.logs = [
+                    LogEntry.model_validate_json(r[0])
+                    for r in self._conn.execute(
+                        _SELECT_LOGS_AFTER, (task_id, max(0, logs_after), n)
+                    )
+                ]
+                updates.log_cursor = max(0, logs_after) + len(updates.logs)
+            if inputs_after is not None:
+                updates.inputs = [
+                    r[0]
+                    for r in self._conn.execute(
+                        _SELECT_INPUTS_AFTER, (task_id, max(0, inputs_after), n)
+                    )
+                ]
+                updates.input_cursor = max(0, inputs_after) + len(updates.inputs)
+            if artifacts_after is not None:
+                updates.artifacts = [
+                    RunArtifact.model_validate_json(r[0])
+                    for r in self._conn.execute(
+                        _SELECT_RUN_ARTIFACTS_AFTER,
+                        (task_id, max(0, artifacts_after), n),
+                    )
+                ]
+                updates.artifact_cursor = max(0, artifacts_after) + len(
+                    updates.artifacts
+                )
+            return updates
+
+    # Duration sketches
+    def load_run_durations(self) -> Dict[str, dict]:
+        with self._lock:
+            return {
+                key: json.loads(data)
+                for key, data in self._conn.execute(
+                    "SELECT key, data FROM run_durations"
+                )
+            }
+
+    def save_run_duration(self, key: str, sketch: dict) -> None:
+        self._write(_SAVE_DURATION, (key, json.dumps(sketch)))
+
+    # Change notifications between processes sharing the file
+    def notify_run(self, task_id: str) -> None:
+        self._write(_NOTIFY_RUN, (task_id, time.time()))
+
+    def listen_runs(
+        self,
+        callback: Callable[[str], None],
+        stop: threading.Event,
+        interval: float = 0.1,
+    ) -> None:
+        """Poll `run_events` every `interval` seconds, calling `callback` per run.
+
+        Only notifications made after the call are reported; several for the
+        same run within one poll are delivered once.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT MAX(seq) FROM run_events").fetchone()
+        last = row[0] or 0
+        pruned_at = time.monotonic()
+        while not stop.wait(interval):
+            with self._lock:
+                rows = self._conn.execute(_SELECT_EVENTS, (last,)).fetchall()
+            if rows:
+                last = rows[-1][0]
+                for task_id in dict.fromkeys(r[1] for r in rows):
+                    callback(task_id)
+            if time.monotonic() - pruned_at > _EVENT_RETENTION:
+                pruned_at = time.monotonic()
+                self._write(_PRUNE_EVENTS, (time.time() - _EVENT_RETENTION,))
@@ -2,9 +2,12 @@ from __future__ import annotations
 
 import importlib
 import os
+import threading
+import time
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Optional, Tuple
+from types import ModuleType
+from typing import Any, Dict, Optional, Tuple
 
 
 @dataclass
@@ -14,6 +17,20 @@ class AgentConfig:
     adapter: Optional[str]
     raw: dict
     base_dir: str
+    path: Optional[str] = None
+
+
+@dataclass
+class _CachedConfig:
+    cfg: AgentConfig
+    stamp: Tuple[int, int]  # (st_mtime_ns, st_size) of the parsed file
+    checked_at: float
+
+
+# Parsed configs by resolved file path, and the file each lookup last resolved to
+_config_cache: Dict[str, _CachedConfig] = {}
+_config_lookup: Dict[Tuple[Optional[str], Optional[str], str], str] = {}
+_config_lock = threading.Lock()
 
 
 def _read_toml(path: Path) -> dict:
@@ -25,15 +42,14 @@ def _read_toml(path: Path) -> dict:
         return tomllib.load(f)
 
 
-def load_kosmos_agent_config(path: Optional[str] = None) -> AgentConfig:
-    """Load kosmos.toml and return AgentConfig.
+def _reload_interval() -> float:
+    try:
+        return float(os.getenv("UAI_CONFIG_RELOAD_INTERVAL", "1.0"))
+    except ValueError:
+        return 1.0
 
-    Order of resolution:
-    - explicit `path` if provided
-    - env var `KOSMOS_TOML`
-    - `./kosmos.toml` if exists
-    - `./examples/kosmos.toml` if exists
-    """
+
+def _find_config(path: Optional[str]) -> Path:
     candidates = []
     if path:
         candidates.append(Path(path))
@@ -43,14 +59,13 @@ def load_kosmos_agent_config(path: Optional[str] = None) -> AgentConfig:
     candidates.append(Path("kosmos.toml"))
     candidates.append(Path("examples") / "kosmos.toml")
 
-    chosen: Optional[Path] = None
     for p in candidates:
         if p and p.exists():
-            chosen = p
-            break
-    if not chosen:
-        raise FileNotFoundError("kosmos.toml not found in expected locations")
+            return p
+    raise FileNotFoundError("kosmos.toml not found in expected locations")
+
 
+def _parse_config(chosen: Path) -> AgentConfig:
     data = _read_toml(chosen)
     agent_section = data.get("agent") or {}
     runtime = agent_section.get("runtime")
@@ -66,13 +81,89 @@ def load_kosmos_agent_config(path: Optional[str] = None) -> AgentConfig:
         adapter=str(adapter) if adapter else None,
         raw=agent_section,
         base_dir=str(chosen.parent.resolve()),
+        path=str(chosen.resolve()),
     )
 
 
+def load_kosmos_agent_config(path: Optional[str] = None) -> AgentConfig:
+    """Load kosmos.toml and return AgentConfig.
+
+    Order of resolution:
+    - explicit `path` if provided
+    - env var `KOSMOS_TOML`
+    - `./kosmos.toml` if exists
+    - `./examples/kosmos.toml` if exists
+
+    Parsed configs are cached per file and shared by all callers. At most once
+    per `UAI_CONFIG_RELOAD_INTERVAL` seconds (default 1) the file's mtime and
+    size are checked; a change swaps in a freshly parsed object, and a file
+    that fails to parse leaves the previous config in place.
+    """
+    lookup = (path, os.getenv("KOSMOS_TOML"), os.getcwd())
+    now = time.monotonic()
+    interval = _reload_interval()
+    with _config_lock:
+        key = _config_lookup.get(lookup)
+        cached = _config_cache.get(key) if key else None
+        if cached is not None and now - cached.checked_at < interval:
+            return cached.cfg
+
+    chosen = _find_config(path)
+    key = str(chosen.resolve())
+    st = chosen.stat()
+    stamp = (st.st_mtime_ns, st.st_size)
+    with _config_lock:
+        _config_lookup[lookup] = key
+        cached = _config_cache.get(key)
+        if cached is not None and cached.stamp == stamp:
+            cached.checked_at = now
+            return cached.cfg
+    try:
+        cfg = _parse_config(chosen)
+    except Exception:
+        if cached is None:
+            raise
+        # Keep serving the last good config while the file is mid-edit
+        with _config_lock:
+            cached.checked_at = now
+        return cached.cfg
+    with _config_lock:
+        _config_cache[key] = _CachedConfig(cfg, stamp, now)
+    return cfg
+
+
+def current_config(cfg: AgentConfig) -> AgentConfig:
+    """Latest version of a loaded config, picking up edits to its file."""
+    if not cfg.path:
+        return cfg
+    try:
+        return load_kosmos_agent_config(cfg.path)
+    except Exception:
+        return cfg
+
+
+def clear_config_cache() -> None:
+    """Forget parsed configs so the next load reads kosmos.toml again."""
+    with _config_lock:
+        _config_cache.clear()
+        _config_lookup.clear()
+
+
 def import_entrypoint(
     entrypoint: str, base_dir: Optional[str] = None
 ) -> Tuple[Any, str, str]:
     """Import `module:attr` and return (obj, module_name, attr_name)."""
+    mod, mod_name, attr_path = import_entrypoint_module(entrypoint, base_dir)
+    obj = mod
+    for part in attr_path.split("."):
+        obj = getattr(obj, part)
+    return obj, mod_name, attr_path
+
+
+def import_entrypoint_module(
+    entrypoint: str, base_dir: Optional[str] = None
+) -> Tuple[ModuleType, str, str]:
+    """Import the module part of `module:attr`; return (module, module_name, attr_name)."""
     if ":" not in entrypoint:
         raise ValueError("entrypoint must be in 'module:attr' format")
     mod_name, attr_path = entrypoint.split(":", 1)
@@ -121,7 +212,4 @@ def import_entrypoint(
         raise ModuleNotFoundError(
             f"Could not import '{mod_name}' from entrypoint '{entrypoint}'"
         )
-    obj = mod
-    for part in attr_path.split("."):
-        obj = getattr(obj, part)
-    return obj, mod_name, attr_path
+    return mod, mod_name, attr_path
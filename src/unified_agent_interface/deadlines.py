@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import heapq
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+def _parse_deadline(value: Any) -> float:
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).strip()
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    dt = datetime.fromisoformat(text.replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def resolve_deadline(
+    params: Dict[str, Any],
+    default_timeout: Optional[float] = None,
+    now: Optional[float] = None,
+) -> Optional[float]:
+    """Absolute deadline (epoch seconds) for a run, or None when unbounded.
+
+    `params["timeout"]` (seconds from now) replaces `default_timeout`;
+    `params["deadline"]` (ISO 8601 or epoch seconds) also applies, and the
+    earlier of the two wins. Raises ValueError for malformed values.
+    """
+    now = time.time() if now is None else now
+    timeout = params.get("timeout", default_timeout)
+    candidates: List[float] = []
+    if timeout is not None:
+        try:
+            seconds = float(timeout)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid timeout: {timeout!r}")
+        if seconds <= 0:
+            raise ValueError("timeout must be positive")
+        candidates.append(now + seconds)
+    if params.get("deadline") is not None:
+        try:
+            candidates.append(_parse_deadline(params["deadline"]))
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid deadline: {params['deadline']!r}")
+    return min(candidates) if candidates else None
+
+
+def default_run_timeout(raw: Dict[str, Any]) -> Optional[float]:
+    """`UAI_RUN_TIMEOUT`, else `[agent] timeout` in kosmos.toml (seconds)."""
+    value = os.getenv("UAI_RUN_TIMEOUT") or raw.get("timeout")
+    return float(value) if value else None
+
+
+class DeadlineWatchdog:
+    """One background thread that fires callbacks when run deadlines pass.
+
+    `schedule` replaces any earlier entry for the same run; `discard` drops it.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.time) -> None:
+        self._clock = clock
+        self._cond = threading.Condition()
+        self._heap: List[Tuple[float, str]] = []
+        self._callbacks: Dict[str, Tuple[float, Callable[[], Any]]] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    def schedule(
+        self, task_id: str, deadline: float, callback: Callable[[], Any]
+    ) -> None:
+        with self._cond:
+            previous = self._callbacks.get(task_id)
+            self._callbacks[task_id] = (deadline, callback)
+            # The same deadline keeps its heap entry; only the callback changes
+            if previous is None or previous[0] != deadline:
+                heapq.heappush(self._heap, (deadline, task_id))
+                self._prune()
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="uai-deadlines", daemon=True
+                )
+                self._thread.start()
+            self._cond.notify()
+
+    def discard(self, task_id: str) -> None:
+        with self._cond:
+            self._callbacks.pop(task_id, None)
+            self._prune()
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._callbacks)
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+
+    def _prune(self) -> None:
+        # Discarded and rescheduled runs leave entries behind until their
+        # deadline; rebuild the heap once they make up more than half of it
+        if len(self._heap) <= 2 * len(self._callbacks):
+            return
+        self._heap = [
+            (deadline, task_id)
+            for deadline, task_id in self._heap
+            if task_id in self._callbacks and self._callbacks[task_id][0] == deadline
+        ]
+        heapq.heapify(self._heap)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._closed:
+                    if self._heap:
+                        wait = self._heap[0][0] - self._clock()
+                        if wait <= 0:
+                            break
+                        self._cond.wait(wait)
+                    else:
+                        self._cond.wait()
+                if self._closed:
+                    return
+                deadline, task_id = heapq.heappop(self._heap)
+                entry = self._callbacks.get(task_id)
+                # Skip entries that were discarded or rescheduled
+                if entry is None or entry[0] != deadline:
+                    continue
+                del self._callbacks[task_id]
+            try:
+                entry[1]()
+            except Exception:
+                pass
+
+
+_watchdog: Optional[DeadlineWatchdog] = None
+_watchdog_lock = threading.Lock()
+
+
+def get_deadline_watchdog() -> DeadlineWatchdog:
+    """Process-wide watchdog used by the server to expire runs on time."""
+    global _watchdog
+    with _watchdog_lock:
+        if _watchdog is None:
+            _watchdog = DeadlineWatchdog()
+        return _watchdog
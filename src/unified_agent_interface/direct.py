@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import atexit
+import os
+import threading
+from typing import Any, Dict, Optional
+
+from .config import AgentConfig
+
+
+def direct_storage_enabled(cfg: Optional[AgentConfig] = None) -> bool:
+    """`UAI_DIRECT_STORAGE=1`, else `[agent.worker] direct_storage = true`."""
+    env = os.getenv("UAI_DIRECT_STORAGE")
+    if env is not None:
+        return env.lower() in ("1", "true", "yes")
+    if cfg is None:
+        try:
+            from .config import load_kosmos_agent_config
+
+            cfg = load_kosmos_agent_config()
+        except Exception:
+            return False
+    return bool((cfg.raw.get("worker") or {}).get("direct_storage"))
+
+
+class _StorageNotifier:
+    # Stands in for the server's RunEventHub: "publishing" a change notifies
+    # the other processes sharing the backend
+    def __init__(self, storage: Any) -> None:
+        self._storage = storage
+
+    def publish(self, task_id: str) -> None:
+        try:
+            self._storage.notify_run(task_id)
+        except Exception:
+            pass
+
+
+_storage: Any = None
+_storage_pid: Optional[int] = None
+_storage_lock = threading.Lock()
+
+
+def direct_storage() -> Optional[Any]:
+    """Shared storage this worker writes to directly, or None to use HTTP.
+
+    Enabled by `direct_storage_enabled()` and built from the same
+    `[agent.storage]`/`UAI_STORAGE` settings as the server. Every run
+    mutation made through it also calls the backend's `notify_run`, which
+    the server listens to in order to wake its watchers. Backends that cannot
+    be shared between processes (in-memory) leave direct mode off.
+    """
+    global _storage, _storage_pid
+    pid = os.getpid()
+    if _storage_pid == pid:
+        return _storage
+    with _storage_lock:
+        if _storage_pid != pid:
+            _storage, _storage_pid = None, pid
+            try:
+                from .config import load_kosmos_agent_config
+
+                cfg = load_kosmos_agent_config()
+                if direct_storage_enabled(cfg):
+                    from .components.events import NotifyingStorage
+                    from .components.storage import create_storage
+
+                    inner = create_storage(cfg)
+                    if callable(getattr(inner, "notify_run", None)):
+                        _storage = NotifyingStorage(inner, _StorageNotifier(inner))
+            except Exception:
+                _storage = None
+        return _storage
+
+
+def reset_direct_storage() -> None:
+    """Close and forget the direct storage; the next call builds a new one."""
+    global _storage, _storage_pid
+    with _storage_lock:
+        storage, _storage, _storage_pid = _storage, None, None
+    close = getattr(storage, "close", None)
+    if callable(close):
+        close()
+
+
+# Persist batched writes (SQLite) before the worker process exits
+atexit.register(reset_direct_storage)
+
+
+def complete_run_direct(storage: Any, task_id: str, payload: Dict[str, Any]) -> bool:
+    """Apply a completion like `POST /run/{id}/complete`; False if the run is gone.
+
+    A run that already reached a terminal status keeps it. The execution
+    `duration` is kept in the run's params for the server's ETA model.
+    """
+    from .models.run import TERMINAL_STATUSES
+
+    task = storage.get_run(task_id)
+    if task is None:
+        return False
+    if task.status in TERMINAL_STATUSES:
+        return True
+    fields: Dict[str, Any] = {
+        "status": payload["status"],
+        "result_text": payload.get("result_text"),
+        "estimated_completion_time": None,
+    }
+    if payload.get("duration") is not None:
+        fields["params"] = {**task.params, "duration": payload["duration"]}
+    storage.update_run(task_id, **fields)
+    return True
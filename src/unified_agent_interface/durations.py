@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import math
+import threading
+from typing import Any, Dict, Optional
+
+
+class QuantileSketch:
+    """Streaming quantile sketch with bounded relative error (DDSketch-style).
+
+    Values are counted in logarithmic buckets, so any quantile is answered
+    within `relative_accuracy` of the true value in constant memory, and the
+    sketch serializes to a small dict for storage. Values at or below
+    `min_value` share one bucket.
+    """
+
+    def __init__(
+        self,
+        relative_accuracy: float = 0.01,
+        *,
+        min_value: float = 1e-3,
+        max_buckets: int = 2048,
+    ) -> None:
+        self.relative_accuracy = float(relative_accuracy)
+        self.min_value = float(min_value)
+        self.max_buckets = max(2, int(max_buckets))
+        self._gamma = (1 + self.relative_accuracy) / (1 - self.relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self.buckets: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float) -> None:
+        value = max(0.0, float(value))
+        if value <= self.min_value:
+            self.zero_count += 1
+        else:
+            key = math.ceil(math.log(value) / self._log_gamma)
+            self.buckets[key] = self.buckets.get(key, 0) + 1
+            if len(self.buckets) > self.max_buckets:
+                self._collapse()
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def _collapse(self) -> None:
+        # Fold the two lowest buckets: only the smallest values lose accuracy
+        low, nxt = sorted(self.buckets)[:2]
+        self.buckets[nxt] += self.buckets.pop(low)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Value at quantile `q` (0..1); None while the sketch is empty."""
+        if not self.count:
+            return None
+        rank = min(max(q, 0.0), 1.0) * (self.count - 1)
+        seen = self.zero_count
+        if seen > rank:
+            return self.min
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen > rank:
+                value = 2 * self._gamma**key / (self._gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.sum / self.count if self.count else None
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "min_value": self.min_value,
+            "buckets": {str(k): v for k, v in self.buckets.items()},
+            "zero_count": self.zero_count,
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "QuantileSketch":
+        sketch = cls(
+            data.get("relative_accuracy", 0.01),
+            min_value=data.get("min_value", 1e-3),
+        )
+        sketch.buckets = {
+            int(k): int(v) for k, v in (data.get("buckets") or {}).items()
+        }
+        sketch.zero_count = int(data.get("zero_count", 0))
+        sketch.count = int(data.get("count", 0))
+        sketch.sum = float(data.get("sum", 0.0))
+        if sketch.count:
+            sketch.min = float(data["min"])
+            sketch.max = float(data["max"])
+        return sketch
+
+
+def _runtime_key(runtime: str) -> str:
+    return f"runtime:{(runtime or '').lower()}"
+
+
+def _entrypoint_key(runtime: str, entrypoint: str) -> str:
+    return f"entrypoint:{(runtime or '').lower()}:{entrypoint}"
+
+
+class DurationModel:
+    """Run durations per runtime and per entrypoint, persisted through storage.
+
+    Each completed run updates two sketches: one for its entrypoint and one
+    for its runtime. Estimates use the entrypoint's sketch once it has
+    `min_samples` runs, then the runtime's, and otherwise `default_seconds`.
+    Sketches are loaded from storage on first use and written back after each
+    update; only the server process records durations.
+    """
+
+    def __init__(
+        self,
+        storage: Any = None,
+        *,
+        default_seconds: float = 5.0,
+        min_samples: int = 5,
+    ) -> None:
+        self._storage = storage
+        self.default_seconds = float(default_seconds)
+        self.min_samples = max(1, int(min_samples))
+        self._lock = threading.Lock()
+        self._sketches: Optional[Dict[str, QuantileSketch]] = None
+
+    def _loaded(self) -> Dict[str, QuantileSketch]:
+        # Caller holds self._lock
+        if self._sketches is None:
+            self._sketches = {}
+            load = getattr(self._storage, "load_run_durations", None)
+            if callable(load):
+                try:
+                    for key, data in (load() or {}).items():
+                        self._sketches[key] = QuantileSketch.from_dict(data)
+                except Exception:
+                    # Start empty rather than fail run creation
+                    pass
+        return self._sketches
+
+    def record(self, runtime: str, entrypoint: str, seconds: float) -> None:
+        keys = (_entrypoint_key(runtime, entrypoint), _runtime_key(runtime))
+        with self._lock:
+            sketches = self._loaded()
+            updated = {}
+            for key in keys:
+                sketch = sketches.setdefault(key, QuantileSketch())
+                sketch.add(seconds)
+                updated[key] = sketch.to_dict()
+        save = getattr(self._storage, "save_run_duration", None)
+        if callable(save):
+            for key, data in updated.items():
+                try:
+                    save(key, data)
+                except Exception:
+                    pass
+
+    def sketch_for(self, runtime: str, entrypoint: str) -> Optional[QuantileSketch]:
+        """Best sketch with enough samples for this agent, if any."""
+        with self._lock:
+            sketches = self._loaded()
+            for key in (_entrypoint_key(runtime, entrypoint), _runtime_key(runtime)):
+                sketch = sketches.get(key)
+                if sketch is not None and sketch.count >= self.min_samples:
+                    return sketch
+        return None
+
+    def estimate(
+        self,
+        runtime: str,
+        entrypoint: str,
+        *,
+        ahead: int = 0,
+        capacity: int = 1,
+    ) -> float:
+        """Seconds until a new run finishes, given the runs ahead of it.
+
+        `ahead` counts runs already running or queued and `capacity` the runs
+        executed at once. With a free slot the run starts at once; otherwise
+        each full round of runs ahead adds one median duration.
+        """
+        sketch = self.sketch_for(runtime, entrypoint)
+        median = sketch.quantile(0.5) if sketch is not None else None
+        if median is None:
+            median = self.default_seconds
+        rounds = max(0, int(ahead)) // max(1, int(capacity))
+        return (rounds + 1) * median
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {key: s.summary() for key, s in sorted(self._loaded().items())}
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import os
+import sys
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from .config import AgentConfig, import_entrypoint_module
+from .frameworks import clear_adapter_cache, get_adapter
+from .frameworks.base import RuntimeAdapter
+
+
+def _mtime(path: Optional[str]) -> Optional[float]:
+    if not path:
+        return None
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+@dataclass
+class _Entry:
+    obj: Any
+    adapter: RuntimeAdapter
+    module_name: str
+    path: Optional[str]
+    mtime: Optional[float]
+
+
+class EntrypointCache:
+    """Resolved entrypoint objects and adapters, reused across jobs.
+
+    Entries are keyed by (entrypoint, config_dir, adapter) and remember the
+    mtime of the entrypoint's source file; editing that file makes the next
+    lookup import it afresh. `invalidate` drops entries explicitly. `.env`
+    files next to kosmos.toml are loaded once per config directory.
+    """
+
+    def __init__(self, enabled: bool = True) -> None:
+        self.enabled = enabled
+        self._lock = threading.RLock()
+        self._entries: Dict[Tuple[str, str, str, str], _Entry] = {}
+        self._env_loaded: set[str] = set()
+        self._counters = {"hits": 0, "misses": 0, "reloads": 0}
+
+    def resolve(
+        self,
+        runtime: str,
+        entrypoint: str,
+        *,
+        adapter_path: Optional[str] = None,
+        config_dir: Optional[str] = None,
+    ) -> Tuple[Any, RuntimeAdapter]:
+        """Return (entrypoint object, adapter), importing only on a miss."""
+        key = (runtime, entrypoint, str(config_dir or ""), str(adapter_path or ""))
+        with self._lock:
+            entry = self._entries.get(key) if self.enabled else None
+            if entry is not None:
+                if _mtime(entry.path) == entry.mtime:
+                    self._counters["hits"] += 1
+                    return entry.obj, entry.adapter
+                # Source changed on disk: re-import instead of serving stale code
+                self._counters["reloads"] += 1
+                self._discard(key)
+            self._counters["misses"] += 1
+            entry = self._load(runtime, entrypoint, adapter_path, config_dir)
+            if self.enabled:
+                self._entries[key] = entry
+            return entry.obj, entry.adapter
+
+    def _load(
+        self,
+        runtime: str,
+        entrypoint: str,
+        adapter_path: Optional[str],
+        config_dir: Optional[str],
+    ) -> _Entry:
+        mod, mod_name, attr_path = import_entrypoint_module(
+            entrypoint, base_dir=config_dir
+        )
+        obj: Any = mod
+        for part in attr_path.split("."):
+            obj = getattr(obj, part)
+        adapter = get_adapter(runtime, adapter_path=adapter_path, base_dir=config_dir)
+        path = getattr(mod, "__file__", None)
+        return _Entry(obj, adapter, mod.__name__ or mod_name, path, _mtime(path))
+
+    def _discard(self, key: Tuple[str, str, str, str]) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        # Forget the module so the next import executes the new source
+        mod = sys.modules.get(entry.module_name)
+        if mod is not None and getattr(mod, "__file__", None) == entry.path:
+            del sys.modules[entry.module_name]
+        clear_adapter_cache()
+
+    def load_env(self, config_dir: Optional[str]) -> None:
+        """Load `.env` next to kosmos.toml, once per directory."""
+        if not config_dir:
+            return
+        with self._lock:
+            if config_dir in self._env_loaded and self.enabled:
+                return
+            self._env_loaded.add(config_dir)
+        try:
+            from dotenv import load_dotenv  # type: ignore
+
+            env_path = Path(config_dir) / ".env"
+            if env_path.exists():
+                load_dotenv(env_path)
+        except Exception:
+            pass
+
+    def preload(self, cfg: AgentConfig) -> None:
+        """Import the configured entrypoint ahead of the first job."""
+        self.load_env(cfg.base_dir)
+        self.resolve(
+            cfg.runtime,
+            cfg.entrypoint,
+            adapter_path=cfg.adapter
+            or cfg.raw.get("adapter")
+            or cfg.raw.get("adopter"),
+            config_dir=cfg.base_dir,
+        )
+
+    def invalidate(
+        self, entrypoint: Optional[str] = None, config_dir: Optional[str] = None
+    ) -> int:
+        """Drop matching entries (all when no filter is given); returns the count."""
+        with self._lock:
+            keys = [
+                k
+                for k in self._entries
+                if (entrypoint is None or k[1] == entrypoint)
+                and (config_dir is None or k[2] == str(config_dir))
+            ]
+            for key in keys:
+                self._discard(key)
+            if entrypoint is None and config_dir is None:
+                self._env_loaded.clear()
+                clear_adapter_cache()
+            return len(keys)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), **self._counters}
+
+
+_cache: Optional[EntrypointCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_entrypoint_cache() -> EntrypointCache:
+    """Process-wide cache; `UAI_ENTRYPOINT_CACHE=0` turns reuse off."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = EntrypointCache(
+                enabled=os.getenv("UAI_ENTRYPOINT_CACHE", "1") != "0"
+            )
+        return _cache
+
+
+def invalidate_entrypoint_cache(
+    entrypoint: Optional[str] = None, config_dir: Optional[str] = None
+) -> int:
+    """Drop cached entrypoints so the next job imports them again."""
+    return get_entrypoint_cache().invalidate(entrypoint, config_dir)
@@ -0,0 +1,363 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional
+
+from .config import AgentConfig
+
+
+class QueueFullError(RuntimeError):
+    """Raised when an executor already holds `max_queue` waiting runs."""
+
+
+class ComputeSlots:
+    """Counts runs that are computing, as opposed to parked waiting for input.
+
+    `acquire` blocks while `limit` runs compute. A run that parks (see
+    `parked()`) gives its slot back and takes one again when it resumes;
+    resuming runs go before runs that have not started yet. At most
+    `max_parked` runs are parked at once; beyond that a waiting run keeps its
+    slot.
+    """
+
+    def __init__(self, limit: int, max_parked: int = 100) -> None:
+        self.limit = max(1, int(limit))
+        self.max_parked = max(0, int(max_parked))
+        self._cond = threading.Condition()
+        self._active = 0
+        self._parked = 0
+        self._resuming = 0
+
+    def acquire(self) -> None:
+        with self._cond:
+            self._cond.wait_for(
+                lambda: self._active < self.limit and not self._resuming
+            )
+            self._active += 1
+
+    def release(self) -> None:
+        with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
+    def try_park(self) -> bool:
+        """Give the caller's slot back; False if the parking limit is reached."""
+        with self._cond:
+            if self._parked >= self.max_parked:
+                return False
+            self._parked += 1
+            self._active -= 1
+            self._cond.notify_all()
+            return True
+
+    def resume(self) -> None:
+        """Take a slot again after `try_park`, ahead of runs not yet started."""
+        with self._cond:
+            self._parked -= 1
+            self._resuming += 1
+            try:
+                self._cond.wait_for(lambda: self._active < self.limit)
+                self._active += 1
+            finally:
+                self._resuming -= 1
+                self._cond.notify_all()
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {
+                "limit": self.limit,
+                "active": self._active,
+                "parked": self._parked,
+                "max_parked": self.max_parked,
+            }
+
+
+# Slots held by the run on this thread, and who to tell when it parks
+_current_slots: ContextVar[Optional[ComputeSlots]] = ContextVar(
+    "uai_compute_slots", default=None
+)
+_park_listener: ContextVar[Optional[Callable[[], Any]]] = ContextVar(
+    "uai_park_listener", default=None
+)
+
+
+@contextmanager
+def parked() -> Iterator[None]:
+    """Mark the current run as idle (e.g. waiting for human input).
+
+    Inside an executor job its compute slot is released for the duration, so
+    other runs can use it; elsewhere this is a no-op.
+    """
+    slots = _current_slots.get()
+    if slots is None or not slots.try_park():
+        yield
+        return
+    listener = _park_listener.get()
+    if listener is not None:
+        listener()
+    try:
+        yield
+    finally:
+        slots.resume()
+
+
+class InlineExecutor:
+    """Bounded thread pool running jobs in this process.
+
+    At most `workers` jobs compute at once; up to `max_queue` more wait for a
+    free slot. Submitting beyond that raises `QueueFullError` instead of
+    letting the backlog grow without bound. Jobs parked on human input (see
+    `parked()`) do not count against `workers`; up to `max_parked` of them
+    keep their thread while others run.
+    """
+
+    def __init__(
+        self, workers: int = 4, max_queue: int = 100, max_parked: int = 100
+    ) -> None:
+        self.workers = max(1, int(workers))
+        self.max_queue = max(0, int(max_queue))
+        self.slots = ComputeSlots(self.workers, max_parked)
+        self._pool = ThreadPoolExecutor(
+            max_workers=self.workers + self.slots.max_parked,
+            thread_name_prefix="uai-inline",
+        )
+        self._lock = threading.Lock()
+        self._queued = 0
+
+    def submit(
+        self, fn: Callable[[], Any], on_park: Optional[Callable[[], Any]] = None
+    ) -> Future:
+        """Run `fn` on the pool; `on_park` is called if it parks."""
+        with self._lock:
+            if self._queued >= self.max_queue:
+                raise QueueFullError(
+                    f"Inline queue is full ({self._queued} runs waiting)"
+                )
+            self._queued += 1
+
+        def _job() -> Any:
+            self.slots.acquire()
+            with self._lock:
+                self._queued -= 1
+            slots_token = _current_slots.set(self.slots)
+            listener_token = _park_listener.set(on_park)
+            try:
+                return fn()
+            finally:
+                _park_listener.reset(listener_token)
+                _current_slots.reset(slots_token)
+                self.slots.release()
+
+        try:
+            return self._pool.submit(_job)
+        except RuntimeError:
+            with self._lock:
+                self._queued -= 1
+            raise
+
+    def stats(self) -> Dict[str, int]:
+        slots = self.slots.stats()
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "running": slots["active"],
+                "parked": slots["parked"],
+                "queued": self._queued,
+                "max_queue": self.max_queue,
+                "max_parked": slots["max_parked"],
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait)
+
+
+_executor: Optional[InlineExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def inline_mode() -> bool:
+    """True when runs execute in the server process instead of a worker."""
+    return os.getenv("UAI_PROCRASTINATE_INLINE") == "1"
+
+
+def get_inline_executor(cfg: Optional[AgentConfig] = None) -> InlineExecutor:
+    """Return the process-wide inline executor, creating it on first use.
+
+    Sizes come from `UAI_INLINE_WORKERS`/`UAI_INLINE_MAX_QUEUE`/
+    `UAI_INLINE_MAX_PARKED`, falling back to `[agent.inline] workers`/
+    `max_queue`/`max_parked` in kosmos.toml (defaults 4/100/100).
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            section = (cfg.raw.get("inline") if cfg else None) or {}
+            _executor = InlineExecutor(
+                workers=int(
+                    os.getenv("UAI_INLINE_WORKERS") or section.get("workers", 4)
+                ),
+                max_queue=int(
+                    os.getenv("UAI_INLINE_MAX_QUEUE") or section.get("max_queue", 100)
+                ),
+                max_parked=int(
+                    os.getenv("UAI_INLINE_MAX_PARKED") or section.get("max_parked", 100)
+                ),
+            )
+        return _executor
+
+
+def shutdown_inline_executor(wait: bool = True) -> None:
+    """Stop the inline executor; the next run creates a fresh one."""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=wait)
+
+
+class LoopExecutor:
+    """Runs async agent runs concurrently on one event-loop thread.
+
+    Runs that mostly wait on the network (LLM calls) need no thread each:
+    up to `max_concurrency` of them interleave on the loop, and up to
+    `max_queue` more wait for a turn; `submit` raises `QueueFullError`
+    beyond that. Blocking code inside a run stalls every run on the loop,
+    so adapters hand sync work to `asyncio.to_thread`.
+    """
+
+    def __init__(self, max_concurrency: int = 100, max_queue: int = 1000) -> None:
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.max_queue = max(0, int(max_queue))
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(
+            target=self._serve, name="uai-loop", daemon=True
+        )
+        self._thread.start()
+        self._ready.wait()
+
+    def _serve(self) -> None:
+        asyncio.set_event_loop(self._loop)
+        self._sem = asyncio.Semaphore(self.max_concurrency)
+        self._ready.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._loop.close()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        return self._loop
+
+    def submit(
+        self,
+        fn: Callable[[], Awaitable[Any]],
+        on_start: Optional[Callable[[], None]] = None,
+    ) -> Future:
+        """Schedule `fn()` on the loop; `on_start` runs once it gets a turn."""
+        with self._lock:
+            if self._queued >= self.max_queue:
+                raise QueueFullError(
+                    f"Async queue is full ({self.max_queue} runs waiting)"
+                )
+            self._queued += 1
+        return asyncio.run_coroutine_threadsafe(self._guard(fn, on_start), self._loop)
+
+    def run(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run `fn()` on the loop and block the calling thread for its result."""
+        return self.submit(fn).result()
+
+    async def _guard(
+        self, fn: Callable[[], Awaitable[Any]], on_start: Optional[Callable[[], None]]
+    ) -> Any:
+        async with self._sem:
+            with self._lock:
+                self._queued -= 1
+                self._running += 1
+            try:
+                if on_start is not None:
+                    on_start()
+                return await fn()
+            finally:
+                with self._lock:
+                    self._running -= 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "max_concurrency": self.max_concurrency,
+                "running": self._running,
+                "queued": self._queued,
+                "max_queue": self.max_queue,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the loop once the runs on it finish; `wait` blocks until then."""
+
+        async def _drain() -> None:
+            tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+            self._loop.stop()
+
+        if not self._thread.is_alive():
+            return
+        asyncio.run_coroutine_threadsafe(_drain(), self._loop)
+        if wait:
+            self._thread.join()
+
+
+_loop_executor: Optional[LoopExecutor] = None
+
+
+def get_loop_executor(cfg: Optional[AgentConfig] = None) -> LoopExecutor:
+    """Return the process-wide event-loop executor for async runs.
+
+    Sizes come from `UAI_ASYNC_CONCURRENCY`/`UAI_ASYNC_MAX_QUEUE`, falling
+    back to `[agent.async] concurrency`/`max_queue` (defaults 100/1000).
+    """
+    global _loop_executor
+    with _executor_lock:
+        if _loop_executor is None:
+            section = (cfg.raw.get("async") if cfg else None) or {}
+            _loop_executor = LoopExecutor(
+                max_concurrency=int(
+                    os.getenv("UAI_ASYNC_CONCURRENCY")
+                    or section.get("concurrency", 100)
+                ),
+                max_queue=int(
+                    os.getenv("UAI_ASYNC_MAX_QUEUE") or section.get("max_queue", 1000)
+                ),
+            )
+        return _loop_executor
+
+
+def shutdown_loop_executor(wait: bool = True) -> None:
+    """Stop the event-loop executor; the next async run creates a fresh one."""
+    global _loop_executor
+    with _executor_lock:
+        executor, _loop_executor = _loop_executor, None
+    if executor is not None:
+        executor.shutdown(wait=wait)
+
+
+def agent_thread_limit(cfg: Optional[AgentConfig] = None) -> int:
+    """Threads the server lends to agent work inside request handlers.
+
+    Chat turns and run dispatch take these instead of Starlette's shared
+    threadpool, so slow agents cannot hold up status, log and input
+    requests. From `UAI_AGENT_THREADS`, else `[agent.server] agent_threads`
+    (default 40); 0 shares the default threadpool instead.
+    """
+    section = (cfg.raw.get("server") if cfg else None) or {}
+    value = os.getenv("UAI_AGENT_THREADS")
+    if value is None:
+        value = section.get("agent_threads", 40)
+    return max(0, int(value))
@@ -18,6 +18,11 @@ _adapters: Dict[str, RuntimeAdapter] = {
 _dynamic_cache: Dict[Tuple[str, str], RuntimeAdapter] = {}
 
 
+def clear_adapter_cache() -> None:
+    """Forget custom adapter instances so they are imported again on next use."""
+    _dynamic_cache.clear()
+
+
 def get_adapter(
     runtime: str, adapter_path: Optional[str] = None, base_dir: Optional[str] = None
 ) -> RuntimeAdapter:
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from typing import Any, Protocol, runtime_checkable
+import os
+from typing import Any, AsyncIterator, Iterator, Protocol, runtime_checkable
 
 
 @runtime_checkable
@@ -34,3 +35,92 @@ class RuntimeAdapter(Protocol):
         state: dict | None,
         config_dir: str | None = None,
     ) -> str: ...
+
+
+class AsyncRuntimeAdapter(RuntimeAdapter, Protocol):
+    """Adapter that can also run natively on an event loop.
+
+    `aexecute`/`achat_respond` mirror `execute`/`chat_respond` as coroutines.
+    They run on the shared event-loop executor, so anything blocking inside
+    them must be handed off with `asyncio.to_thread`. `is_async(obj)` tells
+    whether an entrypoint is worth running this way.
+    """
+
+    def is_async(self, entrypoint_obj: Any) -> bool: ...
+
+    async def aexecute(
+        self,
+        entrypoint_obj: Any,
+        *,
+        task_id: str,
+        initial_payload: Any | None,
+        config_dir: str | None = None,
+    ) -> str: ...
+
+    async def achat_respond(
+        self,
+        entrypoint_obj: Any,
+        *,
+        session_id: str,
+        user_input: str,
+        state: dict | None,
+        config_dir: str | None = None,
+    ) -> str: ...
+
+
+class StreamingChatAdapter(RuntimeAdapter, Protocol):
+    """Adapter whose chat replies can be streamed as they are generated.
+
+    `chat_stream` yields the reply's text in order; the chunks joined are the
+    whole reply. `achat_stream` is the event-loop variant, used like
+    `achat_respond`. Adapters without them reply in one piece.
+    """
+
+    def chat_stream(
+        self,
+        entrypoint_obj: Any,
+        *,
+        session_id: str,
+        user_input: str,
+        state: dict | None,
+        config_dir: str | None = None,
+    ) -> Iterator[str]: ...
+
+    def achat_stream(
+        self,
+        entrypoint_obj: Any,
+        *,
+        session_id: str,
+        user_input: str,
+        state: dict | None,
+        config_dir: str | None = None,
+    ) -> AsyncIterator[str]: ...
+
+
+EXECUTION_MODES = ("auto", "async", "thread")
+
+
+def execution_mode(raw: dict | None = None) -> str:
+    """`UAI_EXECUTION`, else `[agent] execution`: auto (default), async or thread."""
+    mode = os.getenv("UAI_EXECUTION") or (raw or {}).get("execution") or "auto"
+    mode = str(mode).lower()
+    return mode if mode in EXECUTION_MODES else "auto"
+
+
+def use_async(adapter: Any, entrypoint_obj: Any, mode: str = "auto") -> bool:
+    """Whether to run `entrypoint_obj` through the adapter's `aexecute`.
+
+    "thread" never does; "async" does whenever the adapter has `aexecute`;
+    "auto" also asks the adapter's `is_async(entrypoint_obj)`.
+    """
+    if mode == "thread" or not callable(getattr(adapter, "aexecute", None)):
+        return False
+    if mode == "async":
+        return True
+    is_async = getattr(adapter, "is_async", None)
+    if not callable(is_async):
+        return False
+    try:
+        return bool(is_async(entrypoint_obj))
+    except Exception:
+        return False
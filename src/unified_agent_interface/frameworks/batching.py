@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import contextvars
+import inspect
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+from ..cancellation import RunCancelled, check_cancelled
+from ..config import AgentConfig
+
+# How often a run waiting on its batch checks for its own cancellation
+_WAIT_POLL = 0.1
+# Batch result slot of a run whose batch the leader abandoned
+_RERUN = object()
+
+
+def batch_settings(cfg: Optional[AgentConfig] = None) -> Dict[str, Any]:
+    """Micro-batching options from kosmos.toml and env.
+
+    `[agent.batching]` sets `max_size` (runs per `batch` call, default 1 =
+    off) and `max_latency_ms` (how long the first run waits for others,
+    default 10), overridable via `UAI_BATCH_MAX_SIZE` and
+    `UAI_BATCH_MAX_LATENCY_MS`. Without `cfg` only env and defaults apply.
+    """
+    section = (cfg.raw.get("batching") if cfg else None) or {}
+
+    def _opt(env: str, key: str, default: Any) -> Any:
+        value = os.getenv(env)
+        if value is None:
+            value = section.get(key)
+        return default if value is None else value
+
+    latency_ms = float(_opt("UAI_BATCH_MAX_LATENCY_MS", "max_latency_ms", 10))
+    return {
+        "max_size": int(_opt("UAI_BATCH_MAX_SIZE", "max_size", 1)),
+        "max_latency": latency_ms / 1000.0,
+    }
+
+
+class _ItemCancelled(Exception):
+    """Batch result of an input whose own run was cancelled mid-`invoke`."""
+
+
+class _RunContexts:
+    """Stands in for the runnable while the leader's `batch` call runs.
+
+    An `invoke` of one of the batch's inputs (LangChain's default `batch`
+    makes one per input) runs in the context of the run that submitted it,
+    so its logs, output and cancellation belong to that run. Every other
+    attribute is the runnable's own.
+    """
+
+    def __init__(self, runnable: Any, batch: "_Batch") -> None:
+        self._runnable = runnable
+        self._contexts = {id(x): c for x, c in zip(batch.inputs, batch.contexts)}
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._runnable, name)
+
+    def invoke(self, inputs: Any, *args: Any, **kwargs: Any) -> Any:
+        context = self._contexts.get(id(inputs))
+        if context is None:
+            return self._runnable.invoke(inputs, *args, **kwargs)
+        try:
+            return context.copy().run(self._runnable.invoke, inputs, *args, **kwargs)
+        except RunCancelled as e:
+            # Only that input's run stops, not the batch around it
+            raise _ItemCancelled() from e
+
+
+def _call_batch(runnable: Any, batch: "_Batch") -> List[Any]:
+    method = inspect.getattr_static(type(runnable), "batch", None)
+    # A plain method runs with the stand-in as `self`, so its `self.invoke`
+    # calls reach each input's run context
+    if inspect.isfunction(method):
+        out = method(
+            _RunContexts(runnable, batch), batch.inputs, return_exceptions=True
+        )
+    else:
+        out = runnable.batch(batch.inputs, return_exceptions=True)
+    return list(out)
+
+
+class _Batch:
+    def __init__(self) -> None:
+        self.inputs: List[Any] = []
+        self.contexts: List[contextvars.Context] = []
+        self.results: List[Any] = []
+        self.full = threading.Event()
+        self.done = threading.Event()
+
+
+class MicroBatcher:
+    """Coalesces concurrent `invoke` calls on one runnable into `batch` calls.
+
+    The first run to arrive opens a batch and waits up to `max_latency`
+    seconds for other runs of the same runnable to join; the batch closes
+    early once it holds `max_size` inputs. That run then calls
+    `runnable.batch(inputs, return_exceptions=True)` and every run gets its
+    own result back (or its own exception raised). Runs only meet in a batch
+    while they execute at the same time, so batches are at most as large as
+    the executor's concurrency.
+
+    Each run hands its context to the batch along with its input, and the
+    `invoke` of that input runs in it (see `_RunContexts`); work that
+    `batch` does for all inputs at once runs in the leader's context. When
+    the leader is cancelled or times out, the other runs of its batch are
+    not: each one sends its input again in a batch of its own. A run waiting
+    on its batch stops once it is cancelled or its deadline passes.
+    """
+
+    def __init__(self, max_size: int = 1, max_latency: float = 0.01) -> None:
+        self.max_size = max(1, int(max_size))
+        self.max_latency = max(0.0, float(max_latency))
+        self._lock = threading.Lock()
+        self._open: Dict[int, _Batch] = {}
+        self._batches = 0
+        self._items = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 1
+
+    def invoke(self, runnable: Any, inputs: Any) -> Any:
+        """Result of `runnable` for `inputs`, computed within a batch."""
+        key = id(runnable)
+        with self._lock:
+            batch = self._open.get(key)
+            leader = batch is None
+            if batch is None:
+                batch = self._open[key] = _Batch()
+            index = len(batch.inputs)
+            batch.inputs.append(inputs)
+            batch.contexts.append(contextvars.copy_context())
+            if len(batch.inputs) >= self.max_size:
+                del self._open[key]
+                batch.full.set()
+
+        if leader:
+            batch.full.wait(self.max_latency)
+            with self._lock:
+                if self._open.get(key) is batch:
+                    del self._open[key]
+                self._batches += 1
+                self._items += len(batch.inputs)
+            size = len(batch.inputs)
+            # Left as is if the leader's own cancellation escapes the call
+            results: List[Any] = [_RERUN] * size
+            try:
+                out = _call_batch(runnable, batch)
+                if len(out) != size:
+                    raise RuntimeError(
+                        f"batch returned {len(out)} results for {size} inputs"
+                    )
+                results = out
+            except Exception as e:
+                results = [e] * size
+            finally:
+                batch.results = results
+                batch.done.set()
+        else:
+            while not batch.done.wait(_WAIT_POLL):
+                check_cancelled()
+
+        result = batch.results[index]
+        if result is _RERUN or isinstance(result, (RunCancelled, _ItemCancelled)):
+            # Raises if this run was cancelled; the leader's own says nothing
+            check_cancelled()
+            result = list(runnable.batch([inputs], return_exceptions=True))[0]
+        if isinstance(result, BaseException):
+            raise result
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_size": self.max_size,
+                "max_latency_ms": self.max_latency * 1000.0,
+                "batches": self._batches,
+                "items": self._items,
+                "mean_size": self._items / self._batches if self._batches else None,
+            }
+
+
+_batcher: Optional[MicroBatcher] = None
+_batcher_lock = threading.Lock()
+
+
+def get_micro_batcher(cfg: Optional[AgentConfig] = None) -> MicroBatcher:
+    """Process-wide batcher, sized by `batch_settings` on first use.
+
+    Without `cfg` the current kosmos.toml is read, if there is one.
+    """
+    global _batcher
+    with _batcher_lock:
+        if _batcher is None:
+            if cfg is None:
+                try:
+                    from ..config import load_kosmos_agent_config
+
+                    cfg = load_kosmos_agent_config()
+                except Exception:
+                    cfg = None
+            _batcher = MicroBatcher(**batch_settings(cfg))
+        return _batcher
+
+
+def reset_micro_batcher() -> None:
+    """Forget the batcher; the next run builds one from current settings."""
+    global _batcher
+    with _batcher_lock:
+        _batcher = None
@@ -1,17 +1,75 @@
 from __future__ import annotations
 
+import asyncio
+import inspect
 from typing import Any
 
 from .base import RuntimeAdapter
 
 
+def _is_coroutine_callable(obj: Any) -> bool:
+    # Async generator functions count too: they are consumed on the event loop
+    def _async(fn: Any) -> bool:
+        return inspect.iscoroutinefunction(fn) or inspect.isasyncgenfunction(fn)
+
+    if _async(obj):
+        return True
+    call = getattr(obj, "__call__", None)
+    return call is not None and _async(call)
+
+
+def _drain(chunks: Any, task_id: str) -> str:
+    # Stream each yielded chunk; the result is their concatenation
+    from ..cancellation import check_cancelled
+    from .utils import post_output
+
+    parts = []
+    for chunk in chunks:
+        check_cancelled()
+        text = "" if chunk is None else str(chunk)
+        parts.append(text)
+        post_output(task_id, text)
+    return "".join(parts)
+
+
+async def _adrain(chunks: Any, task_id: str) -> str:
+    from .utils import post_output
+
+    parts = []
+    async for chunk in chunks:
+        text = "" if chunk is None else str(chunk)
+        parts.append(text)
+        post_output(task_id, text)
+    return "".join(parts)
+
+
 class CallableAdapter(RuntimeAdapter):
+    """Calls a Python function (or callable object) with the run's input.
+
+    Generator and async-generator entrypoints are consumed as they yield:
+    every chunk is appended to the run's `partial_result` and the final
+    result is all chunks joined.
+    """
+
     def name(self) -> str:
         return "callable"
 
     def supports_chat(self) -> bool:
         return False
 
+    def is_async(self, entrypoint_obj: Any) -> bool:
+        return _is_coroutine_callable(entrypoint_obj)
+
+    def _call(self, entrypoint_obj: Any, initial_payload: Any | None) -> Any:
+        if not callable(entrypoint_obj):
+            raise TypeError("entrypoint is not callable")
+        if isinstance(initial_payload, dict):
+            try:
+                return entrypoint_obj(**initial_payload)
+            except TypeError:
+                return entrypoint_obj(initial_payload)
+        return entrypoint_obj({"input": initial_payload, "params": {}})
+
     def execute(
         self,
         entrypoint_obj: Any,
@@ -20,15 +78,37 @@ class CallableAdapter(RuntimeAdapter):
         initial_payload: Any | None,
         config_dir: str | None = None,
     ) -> str:
-        if not callable(entrypoint_obj):
-            raise TypeError("entrypoint is not callable")
-        if isinstance(initial_payload, dict):
-            try:
-                result = entrypoint_obj(**initial_payload)
-            except TypeError:
-                result = entrypoint_obj(initial_payload)
+        result = self._call(entrypoint_obj, initial_payload)
+        if inspect.isawaitable(result):
+            # An async function run on a worker thread (e.g. UAI_EXECUTION=thread)
+            result = asyncio.run(_awaited(result))
+        elif inspect.isasyncgen(result):
+            result = asyncio.run(_adrain(result, task_id))
+        elif inspect.isgenerator(result):
+            result = _drain(result, task_id)
+        return "" if result is None else str(result)
+
+    async def aexecute(
+        self,
+        entrypoint_obj: Any,
+        *,
+        task_id: str,
+        initial_payload: Any | None,
+        config_dir: str | None = None,
+    ) -> str:
+        if self.is_async(entrypoint_obj):
+            result = self._call(entrypoint_obj, initial_payload)
         else:
-            result = entrypoint_obj({"input": initial_payload, "params": {}})
+            # Keep sync callables off the event loop
+            result = await asyncio.to_thread(
+                self._call, entrypoint_obj, initial_payload
+            )
+        if inspect.isawaitable(result):
+            result = await result
+        elif inspect.isasyncgen(result):
+            result = await _adrain(result, task_id)
+        elif inspect.isgenerator(result):
+            result = await asyncio.to_thread(_drain, result, task_id)
         return "" if result is None else str(result)
 
     def chat_respond(
@@ -41,3 +121,7 @@ class CallableAdapter(RuntimeAdapter):
         config_dir: str | None = None,
     ) -> str:
         raise NotImplementedError("Callable adapter does not support chat mode")
+
+
+async def _awaited(awaitable: Any) -> Any:
+    return await awaitable
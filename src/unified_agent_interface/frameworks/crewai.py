@@ -1,10 +1,10 @@
 from __future__ import annotations
 
-import builtins
 from typing import Any
 
+from ..runtime import input_handler
 from .base import RuntimeAdapter
-from .utils import get_status, poll_for_next_input, post_wait
+from .utils import get_input_cursor, poll_for_next_input, post_wait
 
 
 class CrewAIAdapter(RuntimeAdapter):
@@ -31,13 +31,7 @@ class CrewAIAdapter(RuntimeAdapter):
             kickoff_inputs = {}
 
         # Establish baseline for input consumption
-        baseline_index = 0
-        data = get_status(task_id) or {}
-        buf0 = data.get("input_buffer") or []
-        if isinstance(buf0, list):
-            baseline_index = len(buf0)
-
-        real_input = getattr(builtins, "input")
+        baseline_index = get_input_cursor(task_id)
 
         def _wait_and_get_input(prompt: str = "") -> str:
             nonlocal baseline_index
@@ -46,12 +40,10 @@ class CrewAIAdapter(RuntimeAdapter):
             value, baseline_index = poll_for_next_input(task_id, baseline_index)
             return value
 
-        try:
-            builtins.input = _wait_and_get_input  # type: ignore[assignment]
+        # input() is routed per task, so crews may run concurrently in one process
+        with input_handler(task_id, _wait_and_get_input):
             result = entrypoint_obj.kickoff(inputs=kickoff_inputs)
-            return str(result)
-        finally:
-            builtins.input = real_input  # type: ignore[assignment]
+        return str(result)
 
     def chat_respond(
         self,
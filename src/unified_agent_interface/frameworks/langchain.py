@@ -1,12 +1,11 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Tuple
-import importlib
-import sys
-
-from ..config import import_entrypoint
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Tuple
+import asyncio
+import threading
 
 from .base import RuntimeAdapter
+from .sessions import SessionPool, resolve_factory, session_settings
 
 
 class LangChainAdapter(RuntimeAdapter):
@@ -16,6 +15,60 @@ class LangChainAdapter(RuntimeAdapter):
     def supports_chat(self) -> bool:
         return True
 
+    def is_async(self, entrypoint_obj: Any) -> bool:
+        # Runnables implement ainvoke; string entrypoints are session factories.
+        # Micro-batched runs stay on threads, where the batcher collects them.
+        if self._batching(entrypoint_obj):
+            return False
+        return callable(getattr(entrypoint_obj, "ainvoke", None))
+
+    def _batching(self, entrypoint_obj: Any) -> bool:
+        from .batching import get_micro_batcher
+
+        return get_micro_batcher().enabled and callable(
+            getattr(entrypoint_obj, "batch", None)
+        )
+
+    def _streaming(self, entrypoint_obj: Any, method: str = "stream") -> bool:
+        from .output_stream import streaming_enabled
+
+        return (
+            streaming_enabled()
+            and callable(getattr(entrypoint_obj, method, None))
+            and not self._batching(entrypoint_obj)
+        )
+
+    def _stream_result(self, chunks: Any, task_id: str) -> str:
+        # Post each chunk's text as it arrives and add the chunks up
+        from ..cancellation import check_cancelled
+
+        collector = _ChunkCollector(task_id)
+        for chunk in chunks:
+            check_cancelled()
+            collector.add(chunk)
+        return self._normalize_result(collector.result())
+
+    async def _astream_result(self, chunks: Any, task_id: str) -> str:
+        collector = _ChunkCollector(task_id)
+        async for chunk in chunks:
+            collector.add(chunk)
+        return self._normalize_result(collector.result())
+
+    def _run_inputs(self, initial_payload: Any | None) -> Any:
+        # Determine how to send inputs to the chain/runnable
+        if isinstance(initial_payload, dict):
+            return initial_payload
+        if isinstance(initial_payload, str):
+            # Common convention: map string input to {"text": "..."}
+            return {"text": initial_payload}
+        return {}
+
+    def _chat_inputs(self, user_input: str, state: dict | None) -> Any:
+        # Map user input to expected fields; include state if provided
+        base = state.copy() if isinstance(state, dict) else {}
+        base.setdefault("text", user_input)
+        return base
+
     def execute(
         self,
         entrypoint_obj: Any,
@@ -24,18 +77,18 @@ class LangChainAdapter(RuntimeAdapter):
         initial_payload: Any | None,
         config_dir: str | None = None,
     ) -> str:
-        # Determine how to send inputs to the chain/runnable
-        inputs: Any
-        if isinstance(initial_payload, dict):
-            inputs = initial_payload
-        elif isinstance(initial_payload, str):
-            # Common convention: map string input to {"text": "..."}
-            inputs = {"text": initial_payload}
-        else:
-            inputs = {}
+        inputs = self._run_inputs(initial_payload)
+
+        if self._batching(entrypoint_obj):
+            from .batching import get_micro_batcher
 
+            # Concurrent runs of this runnable share one .batch call
+            result = get_micro_batcher().invoke(entrypoint_obj, inputs)
+        elif self._streaming(entrypoint_obj):
+            # Partial output reaches the run while the chain is still producing
+            return self._stream_result(entrypoint_obj.stream(inputs), task_id)
         # Prefer LangChain Runnable protocol: .invoke
-        if hasattr(entrypoint_obj, "invoke") and callable(
+        elif hasattr(entrypoint_obj, "invoke") and callable(
             getattr(entrypoint_obj, "invoke")
         ):
             result = entrypoint_obj.invoke(inputs)
@@ -54,6 +107,28 @@ class LangChainAdapter(RuntimeAdapter):
 
         return self._normalize_result(result)
 
+    async def aexecute(
+        self,
+        entrypoint_obj: Any,
+        *,
+        task_id: str,
+        initial_payload: Any | None,
+        config_dir: str | None = None,
+    ) -> str:
+        if not self.is_async(entrypoint_obj):
+            return await asyncio.to_thread(
+                self.execute,
+                entrypoint_obj,
+                task_id=task_id,
+                initial_payload=initial_payload,
+                config_dir=config_dir,
+            )
+        inputs = self._run_inputs(initial_payload)
+        if self._streaming(entrypoint_obj, "astream"):
+            return await self._astream_result(entrypoint_obj.astream(inputs), task_id)
+        result = await entrypoint_obj.ainvoke(inputs)
+        return self._normalize_result(result)
+
     def chat_respond(
         self,
         entrypoint_obj: Any,
@@ -63,11 +138,7 @@ class LangChainAdapter(RuntimeAdapter):
         state: dict | None,
         config_dir: str | None = None,
     ) -> str:
-        # Map user input to expected fields; include state if provided
-        inputs: Any
-        base = state.copy() if isinstance(state, dict) else {}
-        base.setdefault("text", user_input)
-        inputs = base
+        inputs = self._chat_inputs(user_input, state)
 
         inst = self._ensure_session_instance(entrypoint_obj, config_dir, session_id)
         if hasattr(inst, "invoke") and callable(getattr(inst, "invoke")):
@@ -82,6 +153,90 @@ class LangChainAdapter(RuntimeAdapter):
 
         return self._normalize_result(result)
 
+    async def achat_respond(
+        self,
+        entrypoint_obj: Any,
+        *,
+        session_id: str,
+        user_input: str,
+        state: dict | None,
+        config_dir: str | None = None,
+    ) -> str:
+        # Building a session instance may import and construct the chain
+        inst = await asyncio.to_thread(
+            self._ensure_session_instance, entrypoint_obj, config_dir, session_id
+        )
+        if not self.is_async(inst):
+            return await asyncio.to_thread(
+                self.chat_respond,
+                inst,
+                session_id=session_id,
+                user_input=user_input,
+                state=state,
+                config_dir=config_dir,
+            )
+        result = await inst.ainvoke(self._chat_inputs(user_input, state))
+        return self._normalize_result(result)
+
+    def chat_stream(
+        self,
+        entrypoint_obj: Any,
+        *,
+        session_id: str,
+        user_input: str,
+        state: dict | None,
+        config_dir: str | None = None,
+    ) -> Iterator[str]:
+        """Reply text as the session's chain `.stream`s it.
+
+        Chains without `.stream` (or with `UAI_STREAM_OUTPUT=0`) reply in one
+        chunk through `chat_respond`.
+        """
+        from .output_stream import chunk_text, streaming_enabled
+
+        inst = self._ensure_session_instance(entrypoint_obj, config_dir, session_id)
+        if not (streaming_enabled() and callable(getattr(inst, "stream", None))):
+            yield self.chat_respond(
+                inst,
+                session_id=session_id,
+                user_input=user_input,
+                state=state,
+                config_dir=config_dir,
+            )
+            return
+        for chunk in inst.stream(self._chat_inputs(user_input, state)):
+            text = chunk_text(chunk)
+            if text:
+                yield text
+
+    async def achat_stream(
+        self,
+        entrypoint_obj: Any,
+        *,
+        session_id: str,
+        user_input: str,
+        state: dict | None,
+        config_dir: str | None = None,
+    ) -> AsyncIterator[str]:
+        from .output_stream import chunk_text, streaming_enabled
+
+        inst = await asyncio.to_thread(
+            self._ensure_session_instance, entrypoint_obj, config_dir, session_id
+        )
+        if not (streaming_enabled() and callable(getattr(inst, "astream", None))):
+            yield await self.achat_respond(
+                inst,
+                session_id=session_id,
+                user_input=user_input,
+                state=state,
+                config_dir=config_dir,
+            )
+            return
+        async for chunk in inst.astream(self._chat_inputs(user_input, state)):
+            text = chunk_text(chunk)
+            if text:
+                yield text
+
     def _normalize_result(self, result: Any) -> str:
         # Normalize result to string
         try:
@@ -97,32 +252,102 @@ class LangChainAdapter(RuntimeAdapter):
 
     # Session-scoped instance management
     def __init__(self) -> None:
-        self._instances: Dict[Tuple[str, str, str], Any] = {}
+        # (config_dir, entrypoint) -> pool of per-session instances
+        self._pools: Dict[Tuple[str, str], SessionPool] = {}
+        self._factories: Dict[Tuple[str, str], Optional[str]] = {}
+        self._lock = threading.Lock()
+
+    def configure_sessions(
+        self,
+        entrypoint: str,
+        *,
+        config_dir: str | None = None,
+        factory: Optional[str] = None,
+        max_instances: int = 256,
+        idle_timeout: float = 1800.0,
+    ) -> None:
+        """Apply `[agent] factory` / `[agent.sessions]` settings for an entrypoint.
+
+        Changing the factory drops existing sessions; changing only the limits
+        keeps them.
+        """
+        key = (str(config_dir or ""), entrypoint)
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is not None and self._factories.get(key) == factory:
+                pool.resize(max_instances, idle_timeout)
+                return
+            self._factories[key] = factory
+            self._pools[key] = SessionPool(
+                resolve_factory(entrypoint, factory, config_dir),
+                max_instances=max_instances,
+                idle_timeout=idle_timeout,
+            )
+
+    def end_session(self, session_id: str) -> None:
+        """Release the instances held for a deleted chat session."""
+        with self._lock:
+            pools = list(self._pools.values())
+        for pool in pools:
+            pool.discard(session_id)
+
+    def session_stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            pools = dict(self._pools)
+        return {f"{ep} ({d})" if d else ep: p.stats() for (d, ep), p in pools.items()}
 
     def _ensure_session_instance(
         self, entrypoint_obj: Any, config_dir: str | None, session_id: str
     ) -> Any:
-        # When given a string entrypoint, import a fresh instance per (config_dir, entrypoint, session_id)
+        # When given a string entrypoint, keep one instance per (config_dir, entrypoint, session_id)
         if isinstance(entrypoint_obj, str):
-            key = (str(config_dir or ""), entrypoint_obj, session_id)
-            if key in self._instances:
-                return self._instances[key]
-            obj, mod_name, attr_path = import_entrypoint(
-                entrypoint_obj, base_dir=config_dir
-            )
-            try:
-                if mod_name in sys.modules:
-                    m = sys.modules[mod_name]
-                    importlib.reload(m)
-                    # Re-resolve attribute after reload
-                    obj2 = m
-                    for part in attr_path.split("."):
-                        obj2 = getattr(obj2, part)
-                    obj = obj2
-            except Exception:
-                pass
-            self._instances[key] = obj
-            return obj
+            key = (str(config_dir or ""), entrypoint_obj)
+            pool = self._pools.get(key)
+            if pool is None:
+                with self._lock:
+                    pool = self._pools.get(key)
+                    if pool is None:
+                        # Not configured through a profile: env and defaults only
+                        opts = session_settings()
+                        factory = opts.pop("factory")
+                        pool = self._pools[key] = SessionPool(
+                            resolve_factory(entrypoint_obj, factory, config_dir),
+                            **opts,
+                        )
+                        self._factories[key] = factory
+            return pool.get(session_id)
 
         # If given an object, best-effort reuse (cannot guarantee isolation without factory)
         return entrypoint_obj
+
+
+class _ChunkCollector:
+    """Posts the text of streamed chunks and assembles the final result.
+
+    LangChain chunks (message chunks, dicts, strings) support `+`, which
+    merges them into what `invoke` would have returned; chunks that do not
+    fall back to their concatenated text.
+    """
+
+    def __init__(self, task_id: str) -> None:
+        self._task_id = task_id
+        self._final: Any = None
+        self._texts: list = []
+        self._addable = True
+
+    def add(self, chunk: Any) -> None:
+        from .output_stream import chunk_text
+        from .utils import post_output
+
+        text = chunk_text(chunk)
+        self._texts.append(text)
+        post_output(self._task_id, text)
+        if not self._addable:
+            return
+        try:
+            self._final = chunk if self._final is None else self._final + chunk
+        except TypeError:
+            self._addable = False
+
+    def result(self) -> Any:
+        return self._final if self._addable else "".join(self._texts)
@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+import atexit
+import os
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+OVERFLOW_POLICIES = ("drop_oldest", "drop_newest", "block")
+
+# (sequence number, task id, log entry)
+_Item = Tuple[int, str, Dict[str, Any]]
+
+
+def _post_batch(task_id: str, entries: List[Dict[str, Any]]) -> bool:
+    from ..direct import direct_storage
+    from .utils import CONTROL_TIMEOUT, http_client, server_base_url
+
+    storage = direct_storage()
+    if storage is not None:
+        from ..models.run import LogEntry
+
+        try:
+            storage.append_run_logs(task_id, [LogEntry(**e) for e in entries])
+        except KeyError:
+            pass  # run deleted: nothing to keep
+        return True
+
+    r = http_client().post(
+        f"{server_base_url()}/run/{task_id}/logs/batch",
+        json={"logs": entries},
+        timeout=CONTROL_TIMEOUT,
+    )
+    return r.status_code == 200
+
+
+class LogShipper:
+    """Buffers run log entries and posts them in batches from a background thread.
+
+    A batch is sent once `batch_size` entries are waiting or `flush_interval`
+    seconds after the first one arrived. At most `max_buffer` entries are held;
+    when full, `overflow` decides what happens to a new entry:
+
+    - ``drop_oldest``: discard the oldest buffered entry (default)
+    - ``drop_newest``: discard the new entry
+    - ``block``: wait up to `block_timeout` seconds for room, then discard it
+    """
+
+    def __init__(
+        self,
+        *,
+        batch_size: int = 100,
+        flush_interval: float = 0.2,
+        max_buffer: int = 10_000,
+        overflow: str = "drop_oldest",
+        block_timeout: float = 1.0,
+        send: Optional[Callable[[str, List[Dict[str, Any]]], bool]] = None,
+    ) -> None:
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unsupported log overflow policy: {overflow}")
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = max(0.0, float(flush_interval))
+        self.max_buffer = max(1, int(max_buffer))
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self._send = send or _post_batch
+        self._buf: Deque[_Item] = deque()
+        self._cond = threading.Condition()
+        self._seq = 0  # last sequence number handed out
+        self._done = 0  # every entry up to this one was sent or dropped
+        self._flush_requested = False
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        self._counters = {"enqueued": 0, "sent": 0, "dropped": 0, "failed": 0}
+
+    def enqueue(self, task_id: str, level: str, message: str) -> bool:
+        """Buffer one entry; False if it was dropped because the buffer is full."""
+        entry = {
+            # Stamp now so batching does not shift the server-side timestamp
+            "timestamp": datetime.utcnow().isoformat(),
+            "level": level,
+            "message": message,
+        }
+        with self._cond:
+            if self._closed:
+                return False
+            if len(self._buf) >= self.max_buffer:
+                if self.overflow == "drop_oldest":
+                    self._buf.popleft()
+                    self._counters["dropped"] += 1
+                elif self.overflow == "block":
+                    self._cond.wait_for(
+                        lambda: len(self._buf) < self.max_buffer or self._closed,
+                        timeout=self.block_timeout,
+                    )
+                if len(self._buf) >= self.max_buffer or self._closed:
+                    self._counters["dropped"] += 1
+                    return False
+            self._seq += 1
+            self._buf.append((self._seq, task_id, entry))
+            self._counters["enqueued"] += 1
+            self._ensure_thread()
+            self._cond.notify_all()
+        return True
+
+    def flush(self, timeout: Optional[float] = 5.0) -> bool:
+        """Send everything buffered so far; False if `timeout` ran out first."""
+        with self._cond:
+            target = self._seq
+            if self._done >= target:
+                return True
+            self._flush_requested = True
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: self._done >= target, timeout=timeout)
+
+    def close(self, timeout: Optional[float] = 5.0) -> None:
+        """Flush, then stop the background thread."""
+        self.flush(timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {"buffered": len(self._buf), **self._counters}
+
+    def _ensure_thread(self) -> None:
+        # Caller holds self._cond
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=self._run, name="uai-log-shipper", daemon=True
+            )
+            self._thread.start()
+
+    def _next_batch(self) -> Optional[List[_Item]]:
+        with self._cond:
+            self._cond.wait_for(lambda: self._buf or self._closed)
+            if not self._buf:
+                return None
+            # Give the batch a chance to fill up unless someone is waiting on it
+            self._cond.wait_for(
+                lambda: len(self._buf) >= self.batch_size
+                or self._flush_requested
+                or self._closed,
+                timeout=self.flush_interval,
+            )
+            n = min(self.batch_size, len(self._buf))
+            batch = [self._buf.popleft() for _ in range(n)]
+            if not self._buf:
+                self._flush_requested = False
+            # Room was freed for producers blocked by the `block` policy
+            self._cond.notify_all()
+            return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            groups: Dict[str, List[Dict[str, Any]]] = {}
+            for _, task_id, entry in batch:
+                groups.setdefault(task_id, []).append(entry)
+            sent = failed = 0
+            for task_id, entries in groups.items():
+                try:
+                    ok = self._send(task_id, entries)
+                except Exception:
+                    ok = False
+                if ok:
+                    sent += len(entries)
+                else:
+                    failed += len(entries)
+            with self._cond:
+                self._counters["sent"] += sent
+                self._counters["failed"] += failed
+                self._done = max(self._done, batch[-1][0])
+                self._cond.notify_all()
+
+
+_shipper: Optional[LogShipper] = None
+_shipper_lock = threading.Lock()
+
+
+def get_log_shipper() -> Optional[LogShipper]:
+    """Process-wide shipper used by `post_log`; None when `UAI_LOG_BATCH=0`.
+
+    Tuned via `UAI_LOG_BATCH_SIZE` (100), `UAI_LOG_FLUSH_INTERVAL` (0.2 s),
+    `UAI_LOG_BUFFER` (10000 entries) and `UAI_LOG_OVERFLOW` (drop_oldest).
+    """
+    global _shipper
+    if os.getenv("UAI_LOG_BATCH", "1") == "0":
+        return None
+    shipper = _shipper
+    if shipper is not None:
+        return shipper
+    with _shipper_lock:
+        if _shipper is None:
+            _shipper = LogShipper(
+                batch_size=int(os.getenv("UAI_LOG_BATCH_SIZE", "100")),
+                flush_interval=float(os.getenv("UAI_LOG_FLUSH_INTERVAL", "0.2")),
+                max_buffer=int(os.getenv("UAI_LOG_BUFFER", "10000")),
+                overflow=os.getenv("UAI_LOG_OVERFLOW", "drop_oldest"),
+            )
+        return _shipper
+
+
+def flush_logs(timeout: Optional[float] = 5.0) -> bool:
+    """Flush buffered logs if a shipper is running; True when nothing is left."""
+    shipper = _shipper
+    return True if shipper is None else shipper.flush(timeout)
+
+
+def _close_shipper() -> None:
+    shipper = _shipper
+    if shipper is not None:
+        shipper.close(timeout=2.0)
+
+
+def _forget_shipper_after_fork() -> None:
+    # The sender thread does not survive fork; the child starts a fresh shipper
+    global _shipper
+    _shipper = None
+
+
+atexit.register(_close_shipper)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_shipper_after_fork)
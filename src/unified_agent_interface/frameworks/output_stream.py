@@ -0,0 +1,283 @@
+from __future__ import annotations
+
+import atexit
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Set
+
+# Server-side writer for runs executing in the server process (inline mode)
+_local_sink: Optional[Callable[[str, str], None]] = None
+
+
+def streaming_enabled() -> bool:
+    """Whether adapters stream results as they are produced (`UAI_STREAM_OUTPUT`)."""
+    return os.getenv("UAI_STREAM_OUTPUT", "1").lower() not in ("0", "false", "no")
+
+
+def set_local_output_sink(sink: Optional[Callable[[str, str], None]]) -> None:
+    """Route streamed output of in-process runs to `sink(task_id, text)`.
+
+    The server installs its storage's `append_run_output` here, so inline
+    runs skip the HTTP round trip; None removes it.
+    """
+    global _local_sink
+    _local_sink = sink
+
+
+def _post_output(task_id: str, text: str) -> bool:
+    from ..direct import direct_storage
+    from .utils import CONTROL_TIMEOUT, http_client, server_base_url
+
+    storage = direct_storage()
+    write = _local_sink or (storage.append_run_output if storage else None)
+    if write is not None:
+        try:
+            write(task_id, text)
+        except KeyError:
+            pass  # run deleted: nothing to keep
+        return True
+
+    r = http_client().post(
+        f"{server_base_url()}/run/{task_id}/output",
+        json={"text": text},
+        timeout=CONTROL_TIMEOUT,
+    )
+    return r.status_code in (200, 404)
+
+
+class _Pending:
+    def __init__(self) -> None:
+        self.parts: List[str] = []
+        self.size = 0
+        self.since = time.monotonic()
+        self.failures = 0
+
+
+class OutputShipper:
+    """Coalesces streamed result text per run and posts it from a background thread.
+
+    The first chunk of a run is sent at once, so the first bytes show up as
+    soon as the agent produces them. Later chunks are joined and sent once
+    `flush_interval` seconds passed since the oldest unsent one, or earlier
+    when `max_chars` are waiting. Chunks of one run are always sent in order;
+    a failed send is retried up to `retries` times before it is dropped.
+    """
+
+    def __init__(
+        self,
+        *,
+        flush_interval: float = 0.1,
+        max_chars: int = 4096,
+        retries: int = 3,
+        send: Optional[Callable[[str, str], bool]] = None,
+    ) -> None:
+        self.flush_interval = max(0.0, float(flush_interval))
+        self.max_chars = max(1, int(max_chars))
+        self.retries = max(0, int(retries))
+        self._send = send or _post_output
+        self._pending: Dict[str, _Pending] = {}
+        self._sending: Set[str] = set()
+        self._started: Set[str] = set()  # runs whose first chunk went out
+        self._cond = threading.Condition()
+        self._flush_requested: Set[str] = set()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        self._counters = {"chunks": 0, "posts": 0, "dropped": 0, "failed": 0}
+
+    def enqueue(self, task_id: str, text: str) -> bool:
+        """Buffer `text` for the run; False once the shipper is closed."""
+        if not text:
+            return True
+        with self._cond:
+            if self._closed:
+                return False
+            pending = self._pending.get(task_id)
+            if pending is None:
+                pending = self._pending[task_id] = _Pending()
+            pending.parts.append(text)
+            pending.size += len(text)
+            self._counters["chunks"] += 1
+            self._ensure_thread()
+            self._cond.notify_all()
+        return True
+
+    def flush(
+        self, task_id: Optional[str] = None, timeout: Optional[float] = 5.0
+    ) -> bool:
+        """Send what is buffered for `task_id` (or every run); False on timeout.
+
+        Flushing a run also ends it: its next chunk counts as a first chunk.
+        """
+
+        def _idle() -> bool:
+            if task_id is None:
+                return not self._pending and not self._sending
+            return task_id not in self._pending and task_id not in self._sending
+
+        with self._cond:
+            if task_id is None:
+                self._flush_requested.update(self._pending)
+            elif task_id in self._pending:
+                self._flush_requested.add(task_id)
+            self._cond.notify_all()
+            done = self._cond.wait_for(_idle, timeout=timeout)
+            if task_id is None:
+                self._started.clear()
+            else:
+                self._started.discard(task_id)
+            return done
+
+    def close(self, timeout: Optional[float] = 5.0) -> None:
+        """Flush, then stop the background thread."""
+        self.flush(timeout=timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {
+                "buffered": sum(p.size for p in self._pending.values()),
+                **self._counters,
+            }
+
+    def _ensure_thread(self) -> None:
+        # Caller holds self._cond
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=self._run, name="uai-output-shipper", daemon=True
+            )
+            self._thread.start()
+
+    def _due(self, now: float) -> List[str]:
+        # Caller holds self._cond
+        return [
+            task_id
+            for task_id, p in self._pending.items()
+            if task_id not in self._sending
+            and (
+                task_id not in self._started
+                or task_id in self._flush_requested
+                or p.size >= self.max_chars
+                or now - p.since >= self.flush_interval
+                or self._closed
+            )
+        ]
+
+    def _next_wait(self, now: float) -> Optional[float]:
+        # Caller holds self._cond; None: nothing pending
+        waits = [
+            p.since + self.flush_interval - now
+            for task_id, p in self._pending.items()
+            if task_id not in self._sending
+        ]
+        return max(0.0, min(waits)) if waits else None
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while True:
+                    now = time.monotonic()
+                    due = self._due(now)
+                    if due:
+                        break
+                    if self._closed and not self._pending:
+                        return
+                    self._cond.wait(self._next_wait(now))
+                batch = {task_id: self._pending.pop(task_id) for task_id in due}
+                for task_id in due:
+                    self._sending.add(task_id)
+                    self._started.add(task_id)
+                    self._flush_requested.discard(task_id)
+            for task_id, pending in batch.items():
+                text = "".join(pending.parts)
+                try:
+                    ok = self._send(task_id, text)
+                except Exception:
+                    ok = False
+                with self._cond:
+                    self._sending.discard(task_id)
+                    if ok:
+                        self._counters["posts"] += 1
+                    elif pending.failures < self.retries:
+                        # Put it back ahead of anything buffered since
+                        pending.failures += 1
+                        pending.since = time.monotonic()
+                        newer = self._pending.get(task_id)
+                        if newer is not None:
+                            pending.parts.extend(newer.parts)
+                            pending.size += newer.size
+                        pending.parts = ["".join(pending.parts)]
+                        self._pending[task_id] = pending
+                        self._counters["failed"] += 1
+                    else:
+                        self._counters["dropped"] += 1
+                    self._cond.notify_all()
+
+
+_shipper: Optional[OutputShipper] = None
+_shipper_lock = threading.Lock()
+
+
+def get_output_shipper() -> OutputShipper:
+    """Process-wide shipper used by `post_output`.
+
+    Tuned via `UAI_OUTPUT_FLUSH_INTERVAL` (0.1 s), `UAI_OUTPUT_MAX_CHARS`
+    (4096) and `UAI_OUTPUT_RETRIES` (3).
+    """
+    global _shipper
+    shipper = _shipper
+    if shipper is not None:
+        return shipper
+    with _shipper_lock:
+        if _shipper is None:
+            _shipper = OutputShipper(
+                flush_interval=float(os.getenv("UAI_OUTPUT_FLUSH_INTERVAL", "0.1")),
+                max_chars=int(os.getenv("UAI_OUTPUT_MAX_CHARS", "4096")),
+                retries=int(os.getenv("UAI_OUTPUT_RETRIES", "3")),
+            )
+        return _shipper
+
+
+def flush_output(task_id: Optional[str] = None, timeout: Optional[float] = 5.0) -> bool:
+    """Flush streamed output if a shipper is running; True when nothing is left."""
+    shipper = _shipper
+    return True if shipper is None else shipper.flush(task_id, timeout)
+
+
+def _close_shipper() -> None:
+    shipper = _shipper
+    if shipper is not None:
+        shipper.close(timeout=2.0)
+
+
+def _forget_shipper_after_fork() -> None:
+    # The sender thread does not survive fork; the child starts a fresh shipper
+    global _shipper
+    _shipper = None
+
+
+atexit.register(_close_shipper)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_shipper_after_fork)
+
+
+def chunk_text(chunk: Any) -> str:
+    """Text carried by one streamed chunk; "" for chunks without any."""
+    if chunk is None:
+        return ""
+    if isinstance(chunk, str):
+        return chunk
+    content = getattr(chunk, "content", None)
+    if isinstance(content, str):
+        return content
+    if isinstance(chunk, dict):
+        for key in ("text", "output_text", "output", "result", "answer"):
+            value = chunk.get(key)
+            if isinstance(value, str):
+                return value
+    return ""
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from ..config import AgentConfig, import_entrypoint
+
+_log = logging.getLogger(__name__)
+
+
+class SessionPool:
+    """Per-session instances built by `factory`, bounded by count and idle time.
+
+    At most `max_instances` sessions are kept; the least recently used one is
+    evicted to make room. Sessions unused for `idle_timeout` seconds are
+    dropped on the next access (0 disables the timeout). An evicted session
+    simply gets a fresh instance if it comes back.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], Any],
+        *,
+        max_instances: int = 256,
+        idle_timeout: float = 1800.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.factory = factory
+        self.max_instances = max(1, int(max_instances))
+        self.idle_timeout = max(0.0, float(idle_timeout))
+        self._clock = clock
+        self._lock = threading.Lock()
+        # session id -> (instance, last used); oldest first
+        self._items: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._counters = {"hits": 0, "misses": 0, "evicted": 0, "expired": 0}
+
+    def get(self, session_id: str) -> Any:
+        """Instance for `session_id`, created on first use."""
+        now = self._clock()
+        with self._lock:
+            self._expire(now)
+            item = self._items.get(session_id)
+            if item is not None:
+                self._items[session_id] = (item[0], now)
+                self._items.move_to_end(session_id)
+                self._counters["hits"] += 1
+                return item[0]
+            self._counters["misses"] += 1
+        # Build outside the lock: factories may construct LLM clients
+        inst = self.factory()
+        with self._lock:
+            item = self._items.get(session_id)
+            if item is not None:
+                # Another turn of the same session won the race; keep its instance
+                return item[0]
+            self._items[session_id] = (inst, now)
+            while len(self._items) > self.max_instances:
+                self._items.popitem(last=False)
+                self._counters["evicted"] += 1
+        return inst
+
+    def discard(self, session_id: str) -> bool:
+        with self._lock:
+            return self._items.pop(session_id, None) is not None
+
+    def resize(self, max_instances: int, idle_timeout: float) -> None:
+        with self._lock:
+            self.max_instances = max(1, int(max_instances))
+            self.idle_timeout = max(0.0, float(idle_timeout))
+            while len(self._items) > self.max_instances:
+                self._items.popitem(last=False)
+                self._counters["evicted"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"sessions": len(self._items), **self._counters}
+
+    def _expire(self, now: float) -> None:
+        # Caller holds self._lock; entries are ordered by last use
+        if not self.idle_timeout:
+            return
+        while self._items:
+            session_id, (_, last_used) = next(iter(self._items.items()))
+            if now - last_used < self.idle_timeout:
+                break
+            del self._items[session_id]
+            self._counters["expired"] += 1
+
+
+def session_settings(cfg: Optional[AgentConfig] = None) -> Dict[str, Any]:
+    """Session pool options from kosmos.toml and env.
+
+    `[agent] factory = "module:fn"` names a zero-argument callable returning a
+    fresh chain per session. `[agent.sessions]` sets `max_instances` (256) and
+    `idle_timeout` seconds (1800), overridable via `UAI_SESSION_MAX_INSTANCES`
+    and `UAI_SESSION_IDLE_TIMEOUT`. Without `cfg` only env and defaults apply.
+    """
+    raw = cfg.raw if cfg is not None else {}
+    sessions = raw.get("sessions") or {}
+
+    def _opt(env: str, key: str, default: Any) -> Any:
+        value = os.getenv(env)
+        if value is None:
+            value = sessions.get(key)
+        return default if value is None else value
+
+    return {
+        "factory": raw.get("factory") or sessions.get("factory"),
+        "max_instances": int(_opt("UAI_SESSION_MAX_INSTANCES", "max_instances", 256)),
+        "idle_timeout": float(_opt("UAI_SESSION_IDLE_TIMEOUT", "idle_timeout", 1800)),
+    }
+
+
+def resolve_factory(
+    entrypoint: str, factory: Optional[str], config_dir: Optional[str]
+) -> Callable[[], Any]:
+    """Callable producing a new per-session instance.
+
+    With `factory`, that callable is used as is. Without it, every session
+    shares the one entrypoint object, so state kept on it (e.g. chain memory)
+    is shared too; a warning says so once per entrypoint. The user's module
+    is never executed again for a new session.
+    """
+    if factory:
+        fn, _, _ = import_entrypoint(factory, base_dir=config_dir)
+        if not callable(fn):
+            raise TypeError(f"Session factory '{factory}' is not callable")
+        return fn
+
+    shared, _, _ = import_entrypoint(entrypoint, base_dir=config_dir)
+    _log.warning(
+        "No session factory configured for %s: chat sessions share one "
+        'instance. Set `factory = "module:fn"` in [agent] to isolate them.',
+        entrypoint,
+    )
+    return lambda: shared
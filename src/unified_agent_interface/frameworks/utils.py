@@ -1,31 +1,183 @@
 from __future__ import annotations
 
+import atexit
 import os
+import threading
 import time
 from typing import Any, Optional
 from ..runtime import get_current_task_id, get_current_session_id
 
 import httpx
 
+# Upper bound for one server-side wait in `poll_for_next_input`
+LONG_POLL_SECONDS = 30.0
+
+# Per-call timeouts: quick control calls vs. uploads that may carry content
+CONTROL_TIMEOUT = httpx.Timeout(10.0, connect=5.0)
+UPLOAD_TIMEOUT = httpx.Timeout(60.0, connect=5.0)
+# How often input waits re-read shared storage in direct mode
+DIRECT_POLL_INTERVAL = 0.2
+
+_client: Optional[httpx.Client] = None
+_client_pid: Optional[int] = None
+_client_lock = threading.Lock()
+
 
 def server_base_url() -> str:
     return os.getenv("UAI_BASE_URL", "http://localhost:8000").rstrip("/")
 
 
+def _http2_available() -> bool:
+    try:
+        import h2  # type: ignore  # noqa: F401
+    except Exception:
+        return False
+    return True
+
+
+def http_client() -> httpx.Client:
+    """Process-wide pooled client used for all calls back to the UAI server.
+
+    Connections are kept alive and reused across calls. `UAI_HTTP2=1` enables
+    HTTP/2 when the `h2` package is installed; `UAI_HTTP_MAX_CONNECTIONS`
+    bounds the pool (default 20). A forked child gets its own client instead
+    of sharing the parent's sockets.
+    """
+    global _client, _client_pid
+    pid = os.getpid()
+    client = _client
+    if client is not None and _client_pid == pid:
+        return client
+    with _client_lock:
+        if _client is None or _client_pid != pid:
+            max_conn = int(os.getenv("UAI_HTTP_MAX_CONNECTIONS", "20"))
+            _client = httpx.Client(
+                http2=os.getenv("UAI_HTTP2") == "1" and _http2_available(),
+                limits=httpx.Limits(
+                    max_connections=max_conn,
+                    max_keepalive_connections=max_conn,
+                    keepalive_expiry=30.0,
+                ),
+                timeout=CONTROL_TIMEOUT,
+            )
+            _client_pid = pid
+        return _client
+
+
+def close_http_client() -> None:
+    """Close the shared client; the next call opens a new one."""
+    global _client, _client_pid
+    with _client_lock:
+        client, _client, _client_pid = _client, None, None
+    if client is not None:
+        client.close()
+
+
+def _forget_client_after_fork() -> None:
+    # The parent still owns these sockets; the child must not reuse or close them
+    global _client, _client_pid
+    _client, _client_pid = None, None
+
+
+atexit.register(close_http_client)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_client_after_fork)
+
+
+def _direct_storage() -> Any:
+    # Shared storage when the worker writes directly (`UAI_DIRECT_STORAGE`)
+    from ..direct import direct_storage
+
+    return direct_storage()
+
+
 def post_wait(task_id: str, prompt: str) -> None:
+    storage = _direct_storage()
+    if storage is not None:
+        from ..models.run import TERMINAL_STATUSES
+
+        try:
+            task = storage.get_run(task_id)
+            if task is not None and task.status not in TERMINAL_STATUSES:
+                storage.update_run(
+                    task_id,
+                    status="waiting_input",
+                    estimated_completion_time=None,
+                    input_prompt=str(prompt or ""),
+                )
+        except Exception:
+            pass
+        return
     try:
-        httpx.post(
+        http_client().post(
             f"{server_base_url()}/run/{task_id}/wait",
             json={"prompt": prompt},
-            timeout=30,
+            timeout=CONTROL_TIMEOUT,
         )
     except Exception:
         pass
 
 
 def get_status(task_id: str) -> dict[str, Any] | None:
+    storage = _direct_storage()
+    if storage is not None:
+        try:
+            task = storage.get_run(task_id)
+            return None if task is None else task.model_dump(mode="json")
+        except Exception:
+            return None
+    try:
+        r = http_client().get(
+            f"{server_base_url()}/run/{task_id}", timeout=CONTROL_TIMEOUT
+        )
+        if r.status_code == 200:
+            return r.json()
+    except Exception:
+        pass
+    return None
+
+
+def get_updates(
+    task_id: str,
+    *,
+    logs_after: Optional[int] = None,
+    inputs_after: Optional[int] = None,
+    artifacts_after: Optional[int] = None,
+    output_after: Optional[int] = None,
+    limit: Optional[int] = None,
+) -> dict[str, Any] | None:
+    """Fetch status plus entries past the given cursors (see `GET /run/{id}/updates`)."""
+    storage = _direct_storage()
+    if storage is not None:
+        try:
+            up = storage.get_run_updates(
+                task_id,
+                logs_after=logs_after,
+                inputs_after=inputs_after,
+                artifacts_after=artifacts_after,
+                output_after=output_after,
+                limit=limit,
+            )
+            return None if up is None else up.model_dump(mode="json")
+        except Exception:
+            return None
+    params = {
+        key: value
+        for key, value in (
+            ("logs_after", logs_after),
+            ("inputs_after", inputs_after),
+            ("artifacts_after", artifacts_after),
+            ("output_after", output_after),
+            ("limit", limit),
+        )
+        if value is not None
+    }
     try:
-        r = httpx.get(f"{server_base_url()}/run/{task_id}", timeout=10)
+        r = http_client().get(
+            f"{server_base_url()}/run/{task_id}/updates",
+            params=params,
+            timeout=CONTROL_TIMEOUT,
+        )
         if r.status_code == 200:
             return r.json()
     except Exception:
@@ -33,46 +185,193 @@ def get_status(task_id: str) -> dict[str, Any] | None:
     return None
 
 
+def get_input_cursor(task_id: str) -> int:
+    """Number of inputs received so far, i.e. the baseline for the next one."""
+    data = get_updates(task_id) or {}
+    return int(data.get("input_cursor") or 0)
+
+
+def _next_input(
+    task_id: str, baseline_index: int, wait: float
+) -> tuple[Optional[str], Optional[str]]:
+    """One long-poll for the input at `baseline_index`: (value, run status)."""
+    storage = _direct_storage()
+    if storage is not None:
+        return _next_input_direct(storage, task_id, baseline_index, wait)
+    try:
+        r = http_client().get(
+            f"{server_base_url()}/run/{task_id}/input/next",
+            params={"after": baseline_index, "timeout": wait},
+            timeout=httpx.Timeout(wait + 10, connect=5.0),
+        )
+        if r.status_code == 404:
+            return None, "deleted"
+        if r.status_code == 200:
+            data = r.json()
+            if data.get("input") is not None:
+                return str(data["input"]), data.get("status")
+            return None, data.get("status")
+    except Exception:
+        pass
+    data = get_updates(task_id, inputs_after=baseline_index, limit=1)
+    if data:
+        inputs = data.get("inputs") or []
+        if inputs:
+            return str(inputs[0]), data.get("status")
+    time.sleep(min(0.5, wait))
+    return None, None
+
+
+def _next_input_direct(
+    storage: Any, task_id: str, baseline_index: int, wait: float
+) -> tuple[Optional[str], Optional[str]]:
+    # Other processes' inputs are only visible by reading; poll the store
+    from ..models.run import TERMINAL_STATUSES
+
+    deadline = time.monotonic() + wait
+    while True:
+        try:
+            up = storage.get_run_updates(task_id, inputs_after=baseline_index, limit=1)
+        except Exception:
+            up = None
+            status = None
+        else:
+            if up is None:
+                return None, "deleted"
+            if up.inputs:
+                return str(up.inputs[0]), up.status
+            status = up.status
+            if status in TERMINAL_STATUSES:
+                return None, status
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None, status
+        time.sleep(min(DIRECT_POLL_INTERVAL, remaining))
+
+
 def poll_for_next_input(
     task_id: str, baseline_index: int, timeout_seconds: int = 300
 ) -> tuple[str, int]:
-    """Poll the server for a new input. Returns (value, new_index)."""
+    """Wait for the input at `baseline_index`. Returns (value, new_index).
+
+    Long-polls `GET /run/{id}/input/next` so the server holds the request
+    until input arrives; falls back to polling `/updates` if that fails.
+    Unless the input is already there, the run is parked meanwhile: inside a
+    worker or the inline executor its compute slot goes to another run.
+    Raises `RunCancelled` if the run is cancelled or deleted while waiting
+    (`RunTimedOut` once its deadline passes).
+    """
+    from ..cancellation import RunCancelled, RunTimedOut, check_cancelled
+    from ..executor import parked
+
+    def _poll(wait: float) -> tuple[Optional[str], bool]:
+        check_cancelled()
+        value, status = _next_input(task_id, baseline_index, wait)
+        if value is not None:
+            return value, False
+        if status == "timed_out":
+            raise RunTimedOut(task_id)
+        if status in ("cancelled", "deleted"):
+            raise RunCancelled(task_id)
+        return None, status in ("completed", "failed")
+
+    value, finished = _poll(0)
+    if value is not None:
+        return value, baseline_index + 1
+    if finished:
+        return "", baseline_index
     deadline = time.time() + timeout_seconds
-    while time.time() < deadline:
-        data = get_status(task_id)
-        if data:
-            buf = data.get("input_buffer") or []
-            if isinstance(buf, list) and len(buf) > baseline_index:
-                value = str(buf[baseline_index])
+    with parked():
+        while True:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return "", baseline_index
+            value, finished = _poll(min(LONG_POLL_SECONDS, remaining))
+            if value is not None:
                 return value, baseline_index + 1
-        time.sleep(0.5)
-    return "", baseline_index
+            if finished:
+                return "", baseline_index
 
 
 # Convenience helpers for user adapters/agents
 def post_log(task_id: Optional[str], level: str, message: str) -> None:
+    """Append a log entry to a run.
+
+    Entries are handed to the background `LogShipper` and sent in batches, so
+    the caller does not wait on the server; `UAI_LOG_BATCH=0` posts each
+    entry synchronously instead.
+    """
     task_id = task_id or get_current_task_id() or ""
     if not task_id:
         return
+    from ..cancellation import check_cancelled
+
+    # Logging is frequent inside agents, which makes it a cheap cancellation point
+    check_cancelled()
+    from .log_shipper import get_log_shipper
+
+    shipper = get_log_shipper()
+    if shipper is not None:
+        shipper.enqueue(task_id, level, message)
+        return
+    storage = _direct_storage()
+    if storage is not None:
+        from ..models.run import LogEntry
+
+        try:
+            storage.append_run_log(task_id, LogEntry(level=level, message=message))
+        except Exception:
+            pass
+        return
     try:
-        httpx.post(
+        http_client().post(
             f"{server_base_url()}/run/{task_id}/logs",
             json={"level": level, "message": message},
-            timeout=30,
+            timeout=CONTROL_TIMEOUT,
         )
     except Exception:
         pass
 
 
+def post_output(task_id: Optional[str], text: str) -> None:
+    """Append streamed result text to a run's `partial_result`.
+
+    Chunks go through the background `OutputShipper`: the first one of a
+    run is sent at once, later ones are coalesced into fewer posts.
+    """
+    task_id = task_id or get_current_task_id() or ""
+    if not task_id or not text:
+        return
+    from .output_stream import get_output_shipper
+
+    get_output_shipper().enqueue(task_id, text)
+
+
 def add_run_artifact(
     task_id: Optional[str], artifact: dict[str, Any]
 ) -> Optional[dict[str, Any]]:
     task_id = task_id or get_current_task_id() or ""
     if not task_id:
         return None
+    storage = _direct_storage()
+    if storage is not None:
+        import uuid
+
+        from ..models.run import RunArtifact
+
+        data = dict(artifact or {})
+        data["id"] = data.get("id") or str(uuid.uuid4())
+        try:
+            art = RunArtifact(**data)
+            storage.add_run_artifact(task_id, art)
+            return art.model_dump(mode="json")
+        except Exception:
+            return None
     try:
-        r = httpx.post(
-            f"{server_base_url()}/run/{task_id}/artifacts", json=artifact, timeout=60
+        r = http_client().post(
+            f"{server_base_url()}/run/{task_id}/artifacts",
+            json=artifact,
+            timeout=UPLOAD_TIMEOUT,
         )
         if r.status_code == 200:
             return r.json()
@@ -88,10 +387,10 @@ def add_chat_artifact(
     if not session_id:
         return None
     try:
-        r = httpx.post(
+        r = http_client().post(
             f"{server_base_url()}/chat/{session_id}/artifacts",
             json=artifact,
-            timeout=60,
+            timeout=UPLOAD_TIMEOUT,
         )
         if r.status_code == 200:
             return r.json()
@@ -107,15 +406,13 @@ def request_human_input(
 ) -> tuple[str, int]:
     """Notify server we're waiting for input, then poll until a reply arrives.
 
-    Returns (value, new_baseline_index). If baseline_index is None, it is computed from
-    current input_buffer length.
+    Returns (value, new_baseline_index). If baseline_index is None, it is the number of
+    inputs received so far.
     """
     task_id = task_id or get_current_task_id() or ""
     if not task_id:
         return "", baseline_index or 0
     if baseline_index is None:
-        data = get_status(task_id) or {}
-        buf = data.get("input_buffer") or []
-        baseline_index = len(buf) if isinstance(buf, list) else 0
+        baseline_index = get_input_cursor(task_id)
     post_wait(task_id, prompt)
     return poll_for_next_input(task_id, baseline_index)
@@ -5,6 +5,7 @@ from contextlib import contextmanager
 from functools import wraps
 from typing import Any, Callable, Iterator, Optional, Tuple
 
+from .cancellation import check_cancelled
 from .frameworks.utils import post_log
 
 
@@ -79,6 +80,8 @@ def _make_wrapper(
             )
         except Exception:
             pass
+        # Stop before spending another LLM/tool call on a cancelled run
+        check_cancelled()
         try:
             result = fn(*args, **kwargs)
         except Exception as e:  # log and re-raise
@@ -6,6 +6,10 @@ from typing import Any, List, Optional
 from pydantic import BaseModel, Field
 
 
+# Statuses after which a run no longer changes
+TERMINAL_STATUSES = ("completed", "failed", "cancelled", "timed_out")
+
+
 class RunArtifact(BaseModel):
     id: str
     type: str = "generic"
@@ -20,12 +24,18 @@ class LogEntry(BaseModel):
     message: str
 
 
+class LogBatch(BaseModel):
+    logs: List[LogEntry] = Field(default_factory=list)
+
+
 class RunTask(BaseModel):
     id: str
-    status: str = "pending"  # pending|running|completed|failed|cancelled
+    status: str = "pending"  # pending|running|completed|failed|cancelled|timed_out
     created_at: datetime = Field(default_factory=datetime.utcnow)
     estimated_completion_time: Optional[datetime] = None
     result_text: Optional[str] = None
+    # Output streamed so far while the run executes; result_text is final
+    partial_result: Optional[str] = None
     input_prompt: Optional[str] = None
     artifacts: List[RunArtifact] = Field(default_factory=list)
     logs: List[LogEntry] = Field(default_factory=list)
@@ -33,6 +43,46 @@ class RunTask(BaseModel):
     params: dict[str, Any] = Field(default_factory=dict)
 
 
+class RunUpdates(BaseModel):
+    """Incremental view of a run: only entries past the caller's cursors.
+
+    A cursor is the number of entries already seen; pass the returned
+    `*_cursor` back as the matching `*_after` on the next call. Streamed
+    output is counted in characters: `output` is the text past
+    `output_after`.
+    """
+
+    id: str
+    status: str
+    estimated_completion_time: Optional[datetime] = None
+    result_text: Optional[str] = None
+    input_prompt: Optional[str] = None
+    logs: List[LogEntry] = Field(default_factory=list)
+    inputs: List[str] = Field(default_factory=list)
+    artifacts: List[RunArtifact] = Field(default_factory=list)
+    output: str = ""
+    log_cursor: int = 0
+    input_cursor: int = 0
+    artifact_cursor: int = 0
+    output_cursor: int = 0
+
+
+class OutputChunk(BaseModel):
+    text: str
+
+
+class NextInputResponse(BaseModel):
+    """Result of a long-poll for the next human input.
+
+    `input` is None when the wait timed out or the run already finished;
+    `cursor` is the `after` value to use on the next call.
+    """
+
+    input: Optional[str] = None
+    cursor: int
+    status: str
+
+
 class CreateRunRequest(BaseModel):
     input: Optional[Any] = None
     params: Optional[dict[str, Any]] = None
@@ -49,6 +99,7 @@ class RunStatusResponse(BaseModel):
     created_at: datetime
     estimated_completion_time: Optional[datetime] = None
     result_text: Optional[str] = None
+    partial_result: Optional[str] = None
     artifacts: List[RunArtifact]
     logs: List[LogEntry]
     input_prompt: Optional[str] = None
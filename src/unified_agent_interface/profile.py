@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from .config import AgentConfig
+from .frameworks.base import RuntimeAdapter, execution_mode, use_async
+
+
+_ARTIFACT_ENV = (
+    "UAI_ARTIFACTS",
+    "UAI_ARTIFACTS_INCLUDE",
+    "UAI_ARTIFACTS_EXCLUDE",
+    "UAI_ARTIFACTS_BASEDIR",
+)
+
+
+def _split(value: Optional[str]) -> Optional[List[str]]:
+    return [s.strip() for s in value.split(",") if s.strip()] if value else None
+
+
+@dataclass(frozen=True)
+class ArtifactSettings:
+    """Artifact tracking settings from `[agent.artifacts]` and `UAI_ARTIFACTS*`."""
+
+    enabled: bool
+    include: Optional[List[str]]
+    exclude: Optional[List[str]]
+    base_dir: str
+
+    @classmethod
+    def from_config(cls, cfg: AgentConfig) -> "ArtifactSettings":
+        env_mode, include, exclude, base_dir = (
+            os.getenv(name) for name in _ARTIFACT_ENV
+        )
+        arts = cfg.raw.get("artifacts") or {}
+        enabled = str(arts.get("tracking") or "").lower() == "auto"
+        if env_mode is not None:
+            enabled = env_mode.lower() == "auto"
+        return cls(
+            enabled=enabled,
+            include=_split(include),
+            exclude=_split(exclude),
+            base_dir=str(base_dir or arts.get("base_dir") or cfg.base_dir),
+        )
+
+
+class ExecutionProfile:
+    """Everything needed to dispatch a run or chat turn, resolved once per config.
+
+    Holds the adapter and artifact filters; the entrypoint object is resolved
+    lazily through the `EntrypointCache`, which also notices source edits.
+    Obtain one with `get_execution_profile(cfg)`.
+    """
+
+    def __init__(self, cfg: AgentConfig) -> None:
+        self.cfg = cfg
+        self.runtime = (cfg.runtime or "").lower()
+        self.entrypoint = cfg.entrypoint
+        self.adapter_path: Optional[str] = (
+            cfg.adapter or cfg.raw.get("adapter") or cfg.raw.get("adopter")
+        )
+        self.config_dir = cfg.base_dir
+        self.artifacts = ArtifactSettings.from_config(cfg)
+        self.execution = execution_mode(cfg.raw)
+        self._adapter: Optional[RuntimeAdapter] = None
+
+    @property
+    def adapter(self) -> RuntimeAdapter:
+        if self._adapter is not None:
+            return self._adapter
+        from .frameworks import get_adapter
+
+        adapter = get_adapter(
+            self.runtime, adapter_path=self.adapter_path, base_dir=self.config_dir
+        )
+        # Custom adapters stay in get_adapter's cache, which the entrypoint
+        # cache clears when their source changes; built-ins never change.
+        if not self.adapter_path:
+            configure = getattr(adapter, "configure_sessions", None)
+            if callable(configure):
+                from .frameworks.sessions import session_settings
+
+                configure(
+                    self.entrypoint,
+                    config_dir=self.config_dir,
+                    **session_settings(self.cfg),
+                )
+            self._adapter = adapter
+        return adapter
+
+    @property
+    def entrypoint_obj(self) -> Any:
+        from .entrypoints import get_entrypoint_cache
+
+        obj, _ = get_entrypoint_cache().resolve(
+            self.runtime,
+            self.entrypoint,
+            adapter_path=self.adapter_path,
+            config_dir=self.config_dir,
+        )
+        return obj
+
+    @property
+    def is_async(self) -> bool:
+        """Whether runs and chat turns go through the adapter's coroutines."""
+        adapter = self.adapter
+        if self.execution == "thread" or not callable(
+            getattr(adapter, "aexecute", None)
+        ):
+            return False
+        return use_async(adapter, self.entrypoint_obj, self.execution)
+
+    def artifact_context(self):
+        from .artifacts import artifact_tracking_context
+
+        return artifact_tracking_context(
+            self.artifacts.enabled,
+            include=self.artifacts.include,
+            exclude=self.artifacts.exclude,
+            base_dir=self.artifacts.base_dir,
+        )
+
+    def job_kwargs(self) -> Dict[str, Any]:
+        """Arguments for `queue.execute_run` / the `uai.run.execute` job."""
+        return {
+            "runtime": self.cfg.runtime,
+            "entrypoint": self.entrypoint,
+            "adapter_path": self.adapter_path,
+            "artifacts_enabled": self.artifacts.enabled,
+            "artifacts_include": self.artifacts.include,
+            "artifacts_exclude": self.artifacts.exclude,
+            "artifacts_base_dir": self.artifacts.base_dir,
+            "config_dir": self.config_dir,
+            "execution": self.execution,
+        }
+
+
+# Profiles of the most recently loaded configs, by config identity. A reload
+# produces a new AgentConfig object and therefore a new profile.
+_profiles: List[Tuple[AgentConfig, ExecutionProfile]] = []
+_profiles_lock = threading.Lock()
+_MAX_PROFILES = 8
+
+
+def get_execution_profile(cfg: AgentConfig) -> ExecutionProfile:
+    """Profile for `cfg`, built on first use and reused until the config reloads.
+
+    `UAI_ARTIFACTS*` and `UAI_EXECUTION` are read when the profile is built; call
+    `clear_execution_profiles()` after changing them in a running process.
+    """
+    with _profiles_lock:
+        for known, profile in _profiles:
+            if known is cfg:
+                return profile
+        profile = ExecutionProfile(cfg)
+        _profiles.insert(0, (cfg, profile))
+        del _profiles[_MAX_PROFILES:]
+        return profile
+
+
+def clear_execution_profiles() -> None:
+    """Drop all cached profiles."""
+    with _profiles_lock:
+        _profiles.clear()
@@ -1,12 +1,76 @@
 from __future__ import annotations
 
+import asyncio
 import os
-from typing import Optional, Callable, Any
+import threading
+import time
+from typing import Optional, Callable, Any, cast
 
-from .config import import_entrypoint, load_kosmos_agent_config
-from .frameworks import get_adapter
+from .cancellation import (
+    RunCancelled,
+    RunTimedOut,
+    _check_interval,
+    check_cancelled,
+    get_cancel_token,
+)
+from .config import AgentConfig, load_kosmos_agent_config
+from .entrypoints import get_entrypoint_cache
+from .executor import (
+    InlineExecutor,
+    QueueFullError,
+    get_inline_executor,
+    get_loop_executor,
+    inline_mode,
+)
+from .profile import get_execution_profile
 
 _app = None  # procrastinate.App, initialized lazily
+_pool = None  # psycopg_pool.ConnectionPool shared by Procrastinate and storage
+_pool_lock = threading.Lock()
+
+
+def postgres_pool_args() -> dict[str, Any]:
+    """Connection arguments for `psycopg_pool` from env.
+
+    Uses `PROCRASTINATE_DSN`/`DATABASE_URL` when set, otherwise the local defaults
+    overridable via `PROCRASTINATE_HOST/PORT/USER/PASSWORD/DB`.
+    """
+    dsn = os.getenv("PROCRASTINATE_DSN") or os.getenv("DATABASE_URL")
+    if dsn:
+        return {"conninfo": dsn}
+    return {
+        "kwargs": {
+            "host": os.getenv("PROCRASTINATE_HOST", "localhost"),
+            "port": int(os.getenv("PROCRASTINATE_PORT", "5432")),
+            "user": os.getenv("PROCRASTINATE_USER", "postgres"),
+            "password": os.getenv("PROCRASTINATE_PASSWORD", "password"),
+            "dbname": os.getenv("PROCRASTINATE_DB", "postgres"),
+        }
+    }
+
+
+def get_connection_pool():  # pragma: no cover - requires Postgres
+    """Return the process-wide sync connection pool, opening it on first use.
+
+    The same pool backs `PostgresStorage` and is handed to Procrastinate when
+    deferring jobs, so the server keeps one set of Postgres connections.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            try:
+                from psycopg_pool import ConnectionPool  # type: ignore
+            except Exception as e:  # pragma: no cover - env-specific
+                raise RuntimeError(f"psycopg_pool not available: {e}")
+            _pool = ConnectionPool(
+                **postgres_pool_args(),
+                min_size=int(os.getenv("UAI_PG_POOL_MIN", "1")),
+                max_size=int(os.getenv("UAI_PG_POOL_MAX", "10")),
+                open=False,
+                check=ConnectionPool.check_connection,
+            )
+            _pool.open(wait=True)
+        return _pool
 
 
 def _load_connector():  # pragma: no cover - exercised via integration usage
@@ -14,13 +78,7 @@ def _load_connector():  # pragma: no cover - exercised via integration usage
         from procrastinate import PsycopgConnector  # type: ignore
     except Exception as e:  # pragma: no cover - env-specific
         raise RuntimeError(f"psycopg connector not available: {e}")
-    return PsycopgConnector(
-        kwargs={
-            "host": "localhost",
-            "user": "postgres",
-            "password": "password",
-        }
-    )
+    return PsycopgConnector(**postgres_pool_args())
 
 
 def get_procrastinate_app():  # pragma: no cover - thin wrapper
@@ -47,175 +105,427 @@ def get_procrastinate_app():  # pragma: no cover - thin wrapper
         artifacts_exclude: Optional[list[str]] = None,
         artifacts_base_dir: Optional[str] = None,
         config_dir: Optional[str] = None,
+        deadline: Optional[float] = None,
+        execution: Optional[str] = None,
         **kwargs,
     ) -> None:
         # Perform the configured run, then call back to server to update status
-        status = "completed"
-        result_text: Optional[str] = None
-        try:
-            # Load .env next to kosmos.toml if available
-            if config_dir is None:
-                config_dir = kwargs.get("config_dir")
+        if config_dir is None:
+            config_dir = kwargs.get("config_dir")
+        job: dict[str, Any] = {
+            "runtime": runtime,
+            "entrypoint": entrypoint,
+            "adapter_path": adapter_path,
+            "artifacts_enabled": artifacts_enabled,
+            "artifacts_include": artifacts_include,
+            "artifacts_exclude": artifacts_exclude,
+            "artifacts_base_dir": artifacts_base_dir,
+            "config_dir": config_dir,
+            "deadline": deadline,
+        }
+        finished = threading.Event()
+        reported = threading.Lock()
+
+        def _report(
+            status: str, result_text: Optional[str], duration: Optional[float] = None
+        ) -> None:
+            # The run thread and the deadline below race; the first one reports
+            if reported.acquire(blocking=False):
+                _post_complete(task_id, status, result_text, duration)
+
+        def _run() -> None:
+            status = "completed"
+            result_text: Optional[str] = None
+            started = time.monotonic()
             try:
-                if config_dir:
-                    from dotenv import load_dotenv  # type: ignore
-                    from pathlib import Path
-
-                    env_path = Path(config_dir) / ".env"
-                    if env_path.exists():
-                        load_dotenv(env_path)
-            except Exception:
-                pass
-
-            obj, _, _ = import_entrypoint(entrypoint, base_dir=config_dir)
-            adapter = get_adapter(
-                runtime, adapter_path=adapter_path, base_dir=config_dir
+                # Load .env next to kosmos.toml if available (once per worker)
+                get_entrypoint_cache().load_env(config_dir)
+
+                result_text = execute_run(task_id, initial_input, **job)
+            except RunTimedOut:
+                status = "timed_out"
+            except RunCancelled:
+                status = "cancelled"
+            except Exception as e:  # pragma: no cover - integration error path
+                import traceback as _tb
+
+                status = "failed"
+                result_text = f"Error: {e}\n" + _tb.format_exc()
+
+            # Notify server via callback; the duration feeds its ETA model
+            try:
+                _report(status, result_text, time.monotonic() - started)
+            finally:
+                finished.set()
+
+        async def _arun() -> None:
+            status = "completed"
+            result_text: Optional[str] = None
+            started = time.monotonic()
+            try:
+                result_text = await aexecute_run(task_id, initial_input, **job)
+            except RunTimedOut:
+                status = "timed_out"
+            except RunCancelled:
+                status = "cancelled"
+            except Exception as e:  # pragma: no cover - integration error path
+                import traceback as _tb
+
+                status = "failed"
+                result_text = f"Error: {e}\n" + _tb.format_exc()
+            # Delivery retries with backoff; keep it off the event loop
+            await asyncio.to_thread(
+                _report, status, result_text, time.monotonic() - started
             )
-            from .runtime import task_context
-            from .artifacts import artifact_tracking_context
-
-            with (
-                task_context(task_id),
-                artifact_tracking_context(
-                    bool(artifacts_enabled),
-                    include=artifacts_include,
-                    exclude=artifacts_exclude,
-                    base_dir=artifacts_base_dir,
-                ),
-            ):
-                result_text = adapter.execute(
+
+        # Async agents run on the worker's event loop. The job returns once
+        # the run has started, so one worker interleaves many of them; their
+        # deadline is enforced on the loop.
+        if _wants_async(job, execution):
+            try:
+                get_loop_executor().submit(_arun, on_start=finished.set)
+                finished.wait()
+                return
+            except QueueFullError:
+                pass  # loop saturated: this run takes a thread instead
+
+        # The job returns once the run finishes or parks waiting for input; a
+        # parked run continues on the worker executor and reports completion
+        # through the callback, so its Procrastinate slot is free meanwhile.
+        try:
+            get_worker_executor().submit(_run, on_park=finished.set)
+        except QueueFullError as e:
+            # Runs abandoned at their deadline can still occupy the queue
+            _report("failed", f"Error: {e}")
+            return
+        remaining = None if deadline is None else max(0.0, deadline - time.time())
+        if not finished.wait(remaining):
+            # Past the deadline with the agent still busy: report it now and free
+            # the job; the agent thread stops at its next cancellation point.
+            _report("timed_out", None)
+
+    return _app
+
+
+def _post_complete(
+    task_id: str,
+    status: str,
+    result_text: Optional[str],
+    duration: Optional[float] = None,
+) -> None:
+    # Retried with backoff; spooled to disk for replay if the server stays away
+    from .completion import deliver_completion
+
+    payload: dict[str, Any] = {"status": status, "result_text": result_text}
+    if duration is not None:
+        payload["duration"] = duration
+    deliver_completion(task_id, payload)
+
+
+def execute_run(
+    task_id: str,
+    initial_input: Optional[Any],
+    *,
+    runtime: str,
+    entrypoint: str,
+    adapter_path: Optional[str] = None,
+    artifacts_enabled: Optional[bool] = None,
+    artifacts_include: Optional[list[str]] = None,
+    artifacts_exclude: Optional[list[str]] = None,
+    artifacts_base_dir: Optional[str] = None,
+    config_dir: Optional[str] = None,
+    deadline: Optional[float] = None,
+    execution: Optional[str] = None,
+) -> str:
+    """Resolve the entrypoint and adapter and run one task; returns the result text.
+
+    Resolution goes through the process-wide `EntrypointCache`, so only the
+    first job (or the first after the source changes) pays for the import.
+    Past `deadline` (epoch seconds) the run's cancellation points raise
+    `RunTimedOut`. The run executes on the calling thread whatever
+    `execution` says; `aexecute_run` is the event-loop variant.
+    """
+    obj, adapter = get_entrypoint_cache().resolve(
+        runtime, entrypoint, adapter_path=adapter_path, config_dir=config_dir
+    )
+    from .runtime import task_context
+    from .artifacts import artifact_tracking_context
+
+    with (
+        task_context(task_id, deadline),
+        artifact_tracking_context(
+            bool(artifacts_enabled),
+            include=artifacts_include,
+            exclude=artifacts_exclude,
+            base_dir=artifacts_base_dir,
+        ),
+    ):
+        # Cancelled or expired while queued: do not start the agent at all
+        check_cancelled(refresh=True)
+        return adapter.execute(
+            obj,
+            task_id=task_id,
+            initial_payload=initial_input,
+            config_dir=config_dir,
+        )
+
+
+def runs_async(cfg: AgentConfig) -> bool:
+    """Whether runs of this config go to the event-loop executor."""
+    try:
+        return get_execution_profile(cfg).is_async
+    except Exception:
+        return False
+
+
+def _wants_async(job: dict[str, Any], execution: Optional[str]) -> bool:
+    # Resolution failures fall through to the thread path, which reports them
+    from .frameworks.base import use_async
+
+    if (execution or "auto") == "thread":
+        return False
+    try:
+        get_entrypoint_cache().load_env(job["config_dir"])
+        obj, adapter = get_entrypoint_cache().resolve(
+            job["runtime"],
+            job["entrypoint"],
+            adapter_path=job["adapter_path"],
+            config_dir=job["config_dir"],
+        )
+    except Exception:
+        return False
+    return use_async(adapter, obj, execution or "auto")
+
+
+async def _watch_remote(token: Any) -> None:
+    # Worker runs learn about a cancel from the server; `is_cancelled` polls it
+    # (at most once per check interval) and fires the token's callbacks
+    while not await asyncio.to_thread(token.is_cancelled):
+        await asyncio.sleep(_check_interval())
+
+
+async def aexecute_run(
+    task_id: str,
+    initial_input: Optional[Any],
+    *,
+    runtime: str,
+    entrypoint: str,
+    adapter_path: Optional[str] = None,
+    artifacts_enabled: Optional[bool] = None,
+    artifacts_include: Optional[list[str]] = None,
+    artifacts_exclude: Optional[list[str]] = None,
+    artifacts_base_dir: Optional[str] = None,
+    config_dir: Optional[str] = None,
+    deadline: Optional[float] = None,
+    execution: Optional[str] = None,
+) -> str:
+    """`execute_run` as a coroutine, awaiting the adapter's `aexecute`.
+
+    Runs on the `LoopExecutor`. A cancel interrupts the awaiting agent at
+    once (its task is cancelled) and raises `RunCancelled`; `deadline` is
+    enforced with a real timeout and raises `RunTimedOut`. Blocking steps
+    (entrypoint resolution, server calls) run in threads.
+    """
+    obj, adapter = await asyncio.to_thread(
+        get_entrypoint_cache().resolve,
+        runtime,
+        entrypoint,
+        adapter_path=adapter_path,
+        config_dir=config_dir,
+    )
+    from .runtime import task_context
+    from .artifacts import artifact_tracking_context
+    from .frameworks.base import AsyncRuntimeAdapter
+    from .frameworks.log_shipper import flush_logs
+    from .frameworks.output_stream import flush_output
+
+    loop = asyncio.get_running_loop()
+    try:
+        with (
+            task_context(task_id, deadline, flush=False),
+            artifact_tracking_context(
+                bool(artifacts_enabled),
+                include=artifacts_include,
+                exclude=artifacts_exclude,
+                base_dir=artifacts_base_dir,
+            ),
+        ):
+            token = get_cancel_token()
+            assert token is not None  # installed by task_context for task_id
+            # Cancelled or expired while queued: do not start the agent at all
+            await asyncio.to_thread(check_cancelled, True)
+            run = asyncio.ensure_future(
+                cast(AsyncRuntimeAdapter, adapter).aexecute(
                     obj,
                     task_id=task_id,
                     initial_payload=initial_input,
                     config_dir=config_dir,
                 )
-        except Exception as e:  # pragma: no cover - integration error path
-            import traceback as _tb
+            )
 
-            status = "failed"
-            result_text = f"Error: {e}\n" + _tb.format_exc()
+            def _cancel_run() -> None:
+                loop.call_soon_threadsafe(run.cancel)
 
-        # Notify server via callback
-        base_url = os.getenv("UAI_BASE_URL", "http://localhost:8000").rstrip("/")
-        try:
-            import httpx
+            token.add_callback(_cancel_run)
+            watch = None
+            if token.remote:
+                watch = asyncio.ensure_future(_watch_remote(token))
+            timeout = None if deadline is None else max(0.0, deadline - time.time())
+            try:
+                return await asyncio.wait_for(run, timeout)
+            except asyncio.TimeoutError:
+                raise RunTimedOut(task_id)
+            except asyncio.CancelledError:
+                if not run.cancelled() or not token.is_cancelled():
+                    raise  # the executor itself is shutting down
+                raise (RunTimedOut if token.timed_out else RunCancelled)(task_id)
+            finally:
+                if watch is not None:
+                    watch.cancel()
+    finally:
+        # Deliver batched logs and output before the run is reported as finished
+        await asyncio.to_thread(flush_logs)
+        await asyncio.to_thread(flush_output, task_id)
 
-            httpx.post(
-                f"{base_url}/run/{task_id}/complete",
-                json={"status": status, "result_text": result_text},
-                timeout=120,
-            ).raise_for_status()
-        except Exception:
-            # As a last resort, nothing we can do here
-            pass
 
-    return _app
+def worker_concurrency(cfg: Optional[AgentConfig] = None) -> int:
+    """Jobs a worker process runs at once.
+
+    From `UAI_WORKER_CONCURRENCY`, else `[agent.worker] concurrency` (default 1).
+    Sync jobs run on threads, and `input()` is routed per run, so crews can
+    share a process.
+    """
+    section = (cfg.raw.get("worker") if cfg else None) or {}
+    return max(
+        1, int(os.getenv("UAI_WORKER_CONCURRENCY") or section.get("concurrency", 1))
+    )
+
+
+_worker_executor: Optional[InlineExecutor] = None
+
+
+def get_worker_executor(
+    cfg: Optional[AgentConfig] = None, concurrency: Optional[int] = None
+) -> InlineExecutor:
+    """Threads that execute runs inside a Procrastinate worker.
+
+    Runs computing at once are capped at the worker concurrency; runs parked
+    on human input do not count, up to `UAI_WORKER_MAX_PARKED` /
+    `[agent.worker] max_parked` (default 100).
+    """
+    global _worker_executor
+    with _pool_lock:
+        if _worker_executor is None:
+            section = (cfg.raw.get("worker") if cfg else None) or {}
+            workers = concurrency or worker_concurrency(cfg)
+            _worker_executor = InlineExecutor(
+                workers=workers,
+                # Each waiting job holds a Procrastinate slot, but runs whose
+                # job gave up at the deadline may still be queued; a job that
+                # finds the queue full reports its run as failed
+                max_queue=workers,
+                max_parked=int(
+                    os.getenv("UAI_WORKER_MAX_PARKED") or section.get("max_parked", 100)
+                ),
+            )
+        return _worker_executor
 
 
 def enqueue_run_execute(
     task_id: str,
     initial_payload: Optional[Any],
     inline_complete: Optional[Callable[[str, Optional[str]], Any]] = None,
+    inline_start: Optional[Callable[[], Any]] = None,
+    deadline: Optional[float] = None,
 ) -> Optional[str]:
-    """Enqueue or directly execute the run task.
+    """Enqueue the run task.
 
-    If env var `UAI_PROCRASTINATE_INLINE=1`, executes inline in-process
-    (useful for tests or when DB is not accessible). Otherwise, enqueues
-    the job to Postgres via Procrastinate and returns the job id.
+    If env var `UAI_PROCRASTINATE_INLINE=1`, submits it to the in-process
+    bounded executor and returns at once (useful for tests or when DB is not
+    accessible); `inline_start` is called when a thread picks it up. Async
+    agents (see `ExecutionProfile.is_async`) go to the event-loop executor
+    instead. Raises `QueueFullError` when the queue is at capacity. Otherwise,
+    enqueues the job to Postgres via Procrastinate and returns the job id.
+    `deadline` (epoch seconds) bounds the run's wall-clock time in both paths.
     """
-    cfg = load_kosmos_agent_config()
-    runtime = cfg.runtime
-    entrypoint = cfg.entrypoint
-    config_dir = cfg.base_dir
-    adapter_path = (
-        getattr(cfg, "adapter", None)
-        or cfg.raw.get("adapter")
-        or cfg.raw.get("adopter")
-    )
-    arts = cfg.raw.get("artifacts") or {}
-    env_mode = os.getenv("UAI_ARTIFACTS")
-    artifacts_enabled = (
-        True if (str(arts.get("tracking") or "").lower() == "auto") else False
-    )
-    if env_mode is not None:
-        artifacts_enabled = env_mode.lower() == "auto"
-    include_env = os.getenv("UAI_ARTIFACTS_INCLUDE")
-    exclude_env = os.getenv("UAI_ARTIFACTS_EXCLUDE")
-    base_env = os.getenv("UAI_ARTIFACTS_BASEDIR")
-    artifacts_include = (
-        [s.strip() for s in include_env.split(",") if s.strip()]
-        if include_env
-        else None
-    )
-    artifacts_exclude = (
-        [s.strip() for s in exclude_env.split(",") if s.strip()]
-        if exclude_env
-        else None
-    )
-    artifacts_base_dir = str(base_env or arts.get("base_dir") or config_dir)
+    cfg = load_kosmos_agent_config()  # cached; re-read only when the file changes
+    job = get_execution_profile(cfg).job_kwargs()
+    if deadline is not None:
+        job["deadline"] = deadline
 
-    if os.getenv("UAI_PROCRASTINATE_INLINE") == "1":
-        # Inline execution in current process: run logic here and call completion callback
-        status = "completed"
-        result_text: Optional[str] = None
-        try:
-            obj, _, _ = import_entrypoint(entrypoint, base_dir=config_dir)
-            adapter = get_adapter(
-                runtime, adapter_path=adapter_path, base_dir=config_dir
-            )
-            from .runtime import task_context
-            from .artifacts import artifact_tracking_context
-
-            with (
-                task_context(task_id),
-                artifact_tracking_context(
-                    bool(artifacts_enabled),
-                    include=artifacts_include,
-                    exclude=artifacts_exclude,
-                    base_dir=artifacts_base_dir,
-                ),
-            ):
-                result_text = adapter.execute(
-                    obj,
-                    task_id=task_id,
-                    initial_payload=initial_payload,
-                    config_dir=config_dir,
-                )
-        except Exception as e:
-            status = "failed"
-            result_text = f"Error: {e}"
+    if inline_mode():
 
-        if inline_complete:
-            inline_complete(status, result_text)
-            return None
+        def _run_inline() -> None:
+            if inline_start:
+                try:
+                    inline_start()
+                except (KeyError, RunCancelled):
+                    # Run was deleted or cancelled while it waited in the queue
+                    return
+            status = "completed"
+            result_text: Optional[str] = None
+            try:
+                result_text = execute_run(task_id, initial_payload, **job)
+            except RunTimedOut:
+                status = "timed_out"
+            except RunCancelled:
+                status = "cancelled"
+            except Exception as e:
+                status = "failed"
+                result_text = f"Error: {e}"
 
-        # Fallback to HTTP callback if no inline completion available
-        base_url = os.getenv("UAI_BASE_URL", "http://localhost:8000").rstrip("/")
-        try:
-            import httpx
-
-            httpx.post(
-                f"{base_url}/run/{task_id}/complete",
-                json={"status": status, "result_text": result_text},
-                timeout=120,
-            ).raise_for_status()
-        except Exception:
-            pass
+            if inline_complete:
+                inline_complete(status, result_text)
+            else:
+                # Fallback to HTTP callback if no inline completion available
+                _post_complete(task_id, status, result_text)
+
+        async def _arun_inline() -> None:
+            if inline_start:
+                try:
+                    await asyncio.to_thread(inline_start)
+                except (KeyError, RunCancelled):
+                    return
+            status = "completed"
+            result_text: Optional[str] = None
+            try:
+                result_text = await aexecute_run(task_id, initial_payload, **job)
+            except RunTimedOut:
+                status = "timed_out"
+            except RunCancelled:
+                status = "cancelled"
+            except Exception as e:
+                status = "failed"
+                result_text = f"Error: {e}"
+
+            if inline_complete:
+                await asyncio.to_thread(inline_complete, status, result_text)
+            else:
+                await asyncio.to_thread(_post_complete, task_id, status, result_text)
+
+        if runs_async(cfg):
+            get_loop_executor(cfg).submit(_arun_inline)
+        else:
+            get_inline_executor(cfg).submit(_run_inline)
         return None
 
     # Enqueue to worker/DB
     app = get_procrastinate_app()
-    with app.open():
+    with app.open(get_connection_pool()):
         job_id = app.tasks["uai.run.execute"].defer(
-            task_id=task_id,
-            initial_input=initial_payload,
-            runtime=runtime,
-            entrypoint=entrypoint,
-            adapter_path=adapter_path,
-            artifacts_enabled=artifacts_enabled,
-            artifacts_include=artifacts_include,
-            artifacts_exclude=artifacts_exclude,
-            artifacts_base_dir=artifacts_base_dir,
-            config_dir=config_dir,
+            task_id=task_id, initial_input=initial_payload, **job
         )
     return str(job_id)
+
+
+def cancel_run_job(job_id: str) -> bool:  # pragma: no cover - requires Postgres
+    """Cancel a queued `uai.run.execute` job, or request abort if it started.
+
+    Returns False when the job already finished or cannot be reached.
+    """
+    try:
+        app = get_procrastinate_app()
+        with app.open(get_connection_pool()):
+            return bool(app.job_manager.cancel_job_by_id(int(job_id), abort=True))
+    except Exception:
+        return False
@@ -1,8 +1,10 @@
 from __future__ import annotations
 
+import builtins
+import threading
 from contextvars import ContextVar
 from contextlib import contextmanager
-from typing import Iterator, Optional
+from typing import Callable, Dict, Iterator, Optional
 
 
 _current_task_id: ContextVar[Optional[str]] = ContextVar(
@@ -22,12 +24,33 @@ def get_current_session_id() -> Optional[str]:
 
 
 @contextmanager
-def task_context(task_id: Optional[str]) -> Iterator[None]:
+def task_context(
+    task_id: Optional[str], deadline: Optional[float] = None, flush: bool = True
+) -> Iterator[None]:
+    """Mark `task_id` as the current run, with a cancellation token for it.
+
+    `deadline` (epoch seconds) makes the token raise `RunTimedOut` once passed.
+    With `flush=False` the caller flushes batched logs and streamed output
+    itself (async runs do it off the event loop).
+    """
     token = _current_task_id.set(task_id)
     try:
-        yield
+        if task_id:
+            from .cancellation import cancel_scope
+
+            with cancel_scope(task_id, deadline):
+                yield
+        else:
+            yield
     finally:
         _current_task_id.reset(token)
+        if task_id and flush:
+            # Deliver batched logs and output before the run is reported as finished
+            from .frameworks.log_shipper import flush_logs
+            from .frameworks.output_stream import flush_output
+
+            flush_logs()
+            flush_output(task_id)
 
 
 @contextmanager
@@ -37,3 +60,47 @@ def session_context(session_id: Optional[str]) -> Iterator[None]:
         yield
     finally:
         _current_session_id.reset(token)
+
+
+# input() routing: one process-wide shim dispatches to the handler registered
+# for the current task, so concurrent runs never see each other's input.
+_input_handlers: Dict[str, Callable[[str], str]] = {}
+_input_lock = threading.Lock()
+_real_input: Callable[..., str] = builtins.input
+
+
+def _routed_input(prompt: str = "") -> str:
+    task_id = _current_task_id.get()
+    handler = _input_handlers.get(task_id) if task_id else None
+    if handler is not None:
+        return handler(prompt)
+    return _real_input(prompt)
+
+
+def install_input_shim() -> None:
+    """Replace `builtins.input` with the task-routed shim (idempotent)."""
+    global _real_input
+    with _input_lock:
+        if builtins.input is _routed_input:
+            return
+        _real_input = builtins.input
+        builtins.input = _routed_input  # type: ignore[assignment]
+
+
+@contextmanager
+def input_handler(task_id: str, handler: Callable[[str], str]) -> Iterator[None]:
+    """Route `input()` calls made while running `task_id` to `handler`.
+
+    Calls from any other task (or outside a task) reach the original `input`.
+    """
+    install_input_shim()
+    token = _current_task_id.set(task_id)
+    with _input_lock:
+        _input_handlers[task_id] = handler
+    try:
+        yield
+    finally:
+        with _input_lock:
+            if _input_handlers.get(task_id) is handler:
+                del _input_handlers[task_id]
+        _current_task_id.reset(token)
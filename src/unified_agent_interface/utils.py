@@ -5,6 +5,8 @@ from __future__ import annotations
 from .frameworks.utils import (
     post_wait,
     get_status,
+    get_updates,
+    get_input_cursor,
     poll_for_next_input,
     request_human_input,
     post_log,
@@ -12,11 +14,14 @@ from .frameworks.utils import (
     add_chat_artifact,
 )
 from .instrumentation import patch_log, unpatch_log, patch_function, patch_many
+from .cancellation import RunCancelled, RunTimedOut, check_cancelled
 
 __all__ = [
     # Run/chat helpers
     "post_wait",
     "get_status",
+    "get_updates",
+    "get_input_cursor",
     "poll_for_next_input",
     "request_human_input",
     "post_log",
@@ -27,4 +32,8 @@ __all__ = [
     "unpatch_log",
     "patch_function",
     "patch_many",
+    # Cancellation
+    "RunCancelled",
+    "RunTimedOut",
+    "check_cancelled",
 ]
@@ -1,16 +1,23 @@
 from __future__ import annotations
 
 import os
-from contextlib import contextmanager
+import time
+from contextlib import ExitStack, contextmanager
+from typing import Callable, Iterator, Optional
 
 import pytest
+from fastapi import FastAPI
 from fastapi.testclient import TestClient
 
 from unified_agent_interface.app import get_app
+from unified_agent_interface.executor import (
+    shutdown_inline_executor,
+    shutdown_loop_executor,
+)
 
 
 @contextmanager
-def _temp_env(**env):
+def temp_env(**env):
     old = {k: os.getenv(k) for k in env}
     try:
         for k, v in env.items():
@@ -27,10 +34,97 @@ def _temp_env(**env):
                 os.environ[k] = v
 
 
+def wait_for(predicate: Callable[[], object], what: str) -> None:
+    """Poll `predicate` for up to 5 s; fail naming `what` if it never holds."""
+    for _ in range(250):
+        if predicate():
+            return
+        time.sleep(0.02)
+    raise AssertionError(f"timed out waiting for {what}")
+
+
+# Inline, in-memory server; tuning knobs from the caller's shell are cleared
+APP_ENV: dict[str, Optional[str]] = {
+    "UAI_PROCRASTINATE_INLINE": "1",
+    "UAI_STORAGE": "memory",
+    "UAI_RUN_TIMEOUT": None,
+    "UAI_INLINE_WORKERS": None,
+    "UAI_INLINE_MAX_QUEUE": None,
+    "UAI_EXECUTION": None,
+    "UAI_ASYNC_CONCURRENCY": None,
+    "UAI_ASYNC_MAX_QUEUE": None,
+    "UAI_STREAM_OUTPUT": None,
+    "UAI_BATCH_MAX_SIZE": None,
+    "UAI_BATCH_MAX_LATENCY_MS": None,
+    "UAI_AGENT_THREADS": None,
+    "UAI_DIRECT_STORAGE": None,
+}
+
+
+@pytest.fixture()
+def agent_app(tmp_path) -> Iterator[Callable[..., FastAPI]]:
+    """Factory for an app serving an agent written into `tmp_path`.
+
+    `agent_app(source, "mod:attr", runtime=..., toml=..., **env)` writes
+    `source` (if given) to `mod.py`, a kosmos.toml for the entrypoint plus
+    the extra `toml` sections, applies `APP_ENV` and `env`, and returns a
+    new app. Executors are shut down before and after the test.
+    """
+    stack = ExitStack()
+
+    def _make(
+        source: Optional[str],
+        entrypoint: str = "agent_mod:run",
+        *,
+        runtime: str = "callable",
+        toml: str = "",
+        **env: Optional[str],
+    ) -> FastAPI:
+        if source is not None:
+            module = entrypoint.split(":", 1)[0]
+            (tmp_path / f"{module}.py").write_text(source)
+        (tmp_path / "kosmos.toml").write_text(
+            f'[agent]\nruntime = "{runtime}"\nentrypoint = "{entrypoint}"\n{toml}'
+        )
+        stack.enter_context(
+            temp_env(**{**APP_ENV, "KOSMOS_TOML": str(tmp_path / "kosmos.toml"), **env})
+        )
+        return get_app()
+
+    shutdown_inline_executor()
+    shutdown_loop_executor()
+    try:
+        yield _make
+    finally:
+        shutdown_loop_executor()
+        shutdown_inline_executor()
+        stack.close()
+
+
+@pytest.fixture()
+def looping_app(tmp_path, agent_app):
+    # The agent logs in a loop until cancelled or stopped (or released by the test)
+    release = tmp_path / "release"
+    app = agent_app(
+        "import os, time\n"
+        "from unified_agent_interface.utils import post_log\n"
+        "def run(payload):\n"
+        f"    while not os.path.exists({str(release)!r}):\n"
+        "        post_log(None, 'INFO', 'tick')\n"
+        "        time.sleep(0.01)\n"
+        "    return 'done'\n",
+        "loop_agent:run",
+        toml="[agent.inline]\nworkers = 1\nmax_queue = 5\n",
+        UAI_LOG_BATCH="0",
+    )
+    yield app, release
+    release.touch()
+
+
 @pytest.fixture()
 def client() -> TestClient:
     # Point the app to a test kosmos.toml that uses a simple callable entrypoint
-    with _temp_env(
+    with temp_env(
         KOSMOS_TOML=str(os.path.join("examples", "kosmos_callable.toml")),
         UAI_PROCRASTINATE_INLINE="1",
     ):
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import anyio
+import pytest
+from fastapi.testclient import TestClient
+
+from conftest import temp_env, wait_for
+
+from unified_agent_interface.executor import agent_thread_limit
+
+
+def test_agent_thread_limit_default_and_env():
+    with temp_env(UAI_AGENT_THREADS=None):
+        assert agent_thread_limit() == 40
+    with temp_env(UAI_AGENT_THREADS="0"):
+        assert agent_thread_limit() == 0
+
+
+# Starlette's threadpool, shrunk so a few blocked chat turns can fill it
+_POOL_THREADS = 2
+
+
+def _shrink_threadpool() -> None:
+    anyio.to_thread.current_default_thread_limiter().total_tokens = _POOL_THREADS
+
+
+@pytest.mark.parametrize("agent_threads", ["4", "0"])
+def test_storage_reads_stay_fast_while_agent_threads_are_busy(
+    tmp_path, agent_app, agent_threads
+):
+    # Every call marks itself started, then holds its thread until released
+    release = tmp_path / "release"
+    started_dir = tmp_path / "started"
+    started_dir.mkdir()
+    app = agent_app(
+        "import os, time\n"
+        "class Chain:\n"
+        "    def invoke(self, inputs):\n"
+        f"        open(os.path.join({str(started_dir)!r}, inputs['text']), 'w').close()\n"
+        f"        while not os.path.exists({str(release)!r}):\n"
+        "            time.sleep(0.01)\n"
+        "        return {'text': inputs['text'].upper()}\n"
+        "chain = Chain()\n",
+        "slow_chain:chain",
+        runtime="langchain",
+        UAI_STREAM_OUTPUT="0",
+        UAI_BATCH_MAX_SIZE="1",
+        UAI_AGENT_THREADS=agent_threads,
+    )
+    with TestClient(app) as client:
+        client.portal.call(_shrink_threadpool)
+        try:
+            _check_reads_under_chat_load(
+                client, release, started_dir, agent_threads != "0"
+            )
+        finally:
+            # Blocked agents would otherwise hold up the client's shutdown
+            release.touch()
+
+
+def _check_reads_under_chat_load(client, release, started_dir, agent_threads):
+    turns = ("a", "b", "c")  # one more than the threadpool holds
+
+    def started():
+        return sorted(p.name for p in started_dir.iterdir())
+
+    task_id = client.post("/run/", json={"input": "run"}).json()["task_id"]
+    wait_for(lambda: started() == ["run"], "run")
+    sessions = [client.post("/chat/").json()["session_id"] for _ in turns]
+    replies: list = []
+
+    def _chat(session_id, text):
+        r = client.post(f"/chat/{session_id}", json={"user_input": text})
+        replies.append(r.json()["messages"][-1]["content"])
+
+    chats = [
+        threading.Thread(target=_chat, args=args, daemon=True)
+        for args in zip(sessions, turns)
+    ]
+    for t in chats:
+        t.start()
+    reads: list = []
+    reader = None
+
+    def _read():
+        reads.append(client.get(f"/run/{task_id}").json()["status"])
+
+    if agent_threads:
+        # Every turn holds an agent thread; the threadpool stays free
+        wait_for(lambda: len(started()) == 1 + len(turns), "chat turns")
+        began = time.monotonic()
+        for _ in range(20):
+            _read()
+            assert client.get(f"/chat/{sessions[0]}/messages").status_code == 200
+        assert time.monotonic() - began < 2
+        assert reads == ["running"] * 20
+    else:
+        # The turns take every threadpool thread and the read queues behind them
+        wait_for(lambda: len(started()) == 1 + _POOL_THREADS, "chat turns")
+        reader = threading.Thread(target=_read, daemon=True)
+        reader.start()
+        reader.join(0.5)
+        assert reader.is_alive() and reads == []
+
+    release.touch()
+    for t in chats:
+        t.join(10)
+    if reader is not None:
+        reader.join(10)
+        assert len(reads) == 1
+    assert sorted(replies) == [t.upper() for t in turns]
+    wait_for(
+        lambda: client.get(f"/run/{task_id}").json()["status"] == "completed",
+        "run",
+    )
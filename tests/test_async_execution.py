@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from conftest import temp_env, wait_for
+
+from unified_agent_interface.executor import (
+    LoopExecutor,
+    QueueFullError,
+    get_inline_executor,
+    get_loop_executor,
+)
+from unified_agent_interface.frameworks.base import use_async
+from unified_agent_interface.frameworks.callable import CallableAdapter
+
+
+@pytest.fixture()
+def async_app(agent_app):
+    # Each run sleeps, then names its thread; "forever" waits for a cancel
+    return agent_app(
+        "import asyncio, threading\n"
+        "async def run(payload):\n"
+        "    if payload.get('input') == 'forever':\n"
+        "        await asyncio.sleep(3600)\n"
+        "    await asyncio.sleep(0.5)\n"
+        "    return threading.current_thread().name\n",
+        "async_agent:run",
+        toml="[agent.inline]\nworkers = 1\n",
+        UAI_LOG_BATCH="0",
+    )
+
+
+def test_async_runs_interleave_on_one_thread(async_app):
+    with TestClient(async_app) as client:
+        started = time.monotonic()
+        ids = [client.post("/run/", json={}).json()["task_id"] for _ in range(20)]
+        for task_id in ids:
+            wait_for(
+                lambda: client.get(f"/run/{task_id}").json()["status"] == "completed",
+                "async run",
+            )
+        # One inline worker thread would need 10 s for these; the loop overlaps them
+        assert time.monotonic() - started < 5
+        # All of them ran on the loop thread, none on the inline workers
+        assert {
+            client.get(f"/run/{task_id}").json()["result_text"] for task_id in ids
+        } == {"uai-loop"}
+        assert get_inline_executor().stats()["running"] == 0
+
+
+def test_cancel_interrupts_an_awaiting_run(async_app):
+    with TestClient(async_app) as client:
+        task_id = client.post("/run/", json={"input": "forever"}).json()["task_id"]
+        wait_for(lambda: get_loop_executor().stats()["running"] == 1, "run to start")
+        assert client.post(f"/run/{task_id}/cancel").status_code == 200
+        wait_for(lambda: get_loop_executor().stats()["running"] == 0, "run to stop")
+        assert client.get(f"/run/{task_id}").json()["status"] == "cancelled"
+
+
+def test_deadline_times_out_an_awaiting_run(async_app):
+    with TestClient(async_app) as client:
+        r = client.post("/run/", json={"input": "forever", "params": {"timeout": 0.3}})
+        task_id = r.json()["task_id"]
+        wait_for(
+            lambda: client.get(f"/run/{task_id}").json()["status"] == "timed_out",
+            "deadline",
+        )
+        wait_for(lambda: get_loop_executor().stats()["running"] == 0, "run to stop")
+
+
+def test_thread_mode_keeps_async_agents_off_the_loop(async_app):
+    with temp_env(UAI_EXECUTION="thread"), TestClient(async_app) as client:
+        task_id = client.post("/run/", json={}).json()["task_id"]
+        wait_for(
+            lambda: client.get(f"/run/{task_id}").json()["status"] == "completed",
+            "threaded run",
+        )
+        assert client.get(f"/run/{task_id}").json()["result_text"] != "uai-loop"
+
+
+def test_use_async_detects_coroutine_callables():
+    adapter = CallableAdapter()
+
+    async def agent(payload):
+        return payload
+
+    class Agent:
+        async def __call__(self, payload):
+            return payload
+
+    assert use_async(adapter, agent)
+    assert use_async(adapter, Agent())
+    assert not use_async(adapter, lambda payload: payload)
+    assert use_async(adapter, lambda payload: payload, mode="async")
+    assert not use_async(adapter, agent, mode="thread")
+    # Sync entry still works for an async callable
+    assert adapter.execute(agent, task_id="t", initial_payload="x") == str(
+        {"input": "x", "params": {}}
+    )
+
+
+def test_loop_executor_bounds_its_queue():
+    executor = LoopExecutor(max_concurrency=1, max_queue=1)
+    gate = threading.Event()
+
+    async def blocked():
+        await asyncio.to_thread(gate.wait)
+        return "ok"
+
+    try:
+        first = executor.submit(blocked)
+        wait_for(lambda: executor.stats()["running"] == 1, "first run")
+        second = executor.submit(blocked)
+        with pytest.raises(QueueFullError):
+            executor.submit(blocked)
+        assert executor.stats()["queued"] == 1
+        gate.set()
+        assert first.result(timeout=5) == "ok"
+        assert second.result(timeout=5) == "ok"
+    finally:
+        gate.set()
+        executor.shutdown()
+
+
+def test_chat_awaits_ainvoke_on_the_loop(agent_app):
+    app = agent_app(
+        "import asyncio, threading\n"
+        "class Chain:\n"
+        "    def __init__(self):\n"
+        "        self.history = []\n"
+        "    def invoke(self, inputs):\n"
+        "        raise AssertionError('sync path used')\n"
+        "    async def ainvoke(self, inputs):\n"
+        "        await asyncio.sleep(0)\n"
+        "        self.history.append(inputs['text'])\n"
+        "        name = threading.current_thread().name\n"
+        "        return {'text': name + ':' + '|'.join(self.history)}\n"
+        "chain = Chain()\n",
+        "async_chain:chain",
+        runtime="langchain",
+        toml='factory = "async_chain:Chain"\n',
+    )
+    with TestClient(app) as client:
+        session_id = client.post("/chat/").json()["session_id"]
+        for text in ("a", "b"):
+            r = client.post(f"/chat/{session_id}", json={"user_input": text})
+            assert r.status_code == 200
+        assert r.json()["messages"][-1]["content"] == "uai-loop:a|b"
@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi.testclient import TestClient
+
+from conftest import temp_env, wait_for
+
+from unified_agent_interface.cancellation import (
+    RunCancelled,
+    cancel_local,
+    cancel_scope,
+    check_cancelled,
+)
+from unified_agent_interface.frameworks import utils
+from unified_agent_interface.frameworks.batching import (
+    MicroBatcher,
+    get_micro_batcher,
+    reset_micro_batcher,
+)
+
+
+class FakeRunnable:
+    def __init__(self, delay: float = 0.0) -> None:
+        self.delay = delay
+        self.calls: list = []
+        self._lock = threading.Lock()
+
+    def invoke(self, inputs):
+        raise AssertionError("invoke should not be called while batching")
+
+    def batch(self, inputs, return_exceptions=False):
+        with self._lock:
+            self.calls.append(list(inputs))
+        time.sleep(self.delay)
+        out = []
+        for item in inputs:
+            if item.get("text") == "boom":
+                out.append(ValueError("boom"))
+            else:
+                out.append({"text": item["text"].upper()})
+        return out
+
+
+def test_concurrent_invokes_share_a_batch():
+    runnable = FakeRunnable()
+    batcher = MicroBatcher(max_size=4, max_latency=1.0)
+    with ThreadPoolExecutor(4) as pool:
+        results = list(
+            pool.map(
+                lambda t: batcher.invoke(runnable, {"text": t}), ["a", "b", "c", "d"]
+            )
+        )
+    # A full batch closes without waiting out the latency window
+    assert results == [{"text": t} for t in "ABCD"]
+    assert len(runnable.calls) == 1
+    assert sorted(i["text"] for i in runnable.calls[0]) == ["a", "b", "c", "d"]
+    assert batcher.stats()["mean_size"] == 4
+
+
+def test_errors_stay_with_their_run():
+    runnable = FakeRunnable()
+    batcher = MicroBatcher(max_size=2, max_latency=1.0)
+    with ThreadPoolExecutor(2) as pool:
+        ok = pool.submit(batcher.invoke, runnable, {"text": "x"})
+        bad = pool.submit(batcher.invoke, runnable, {"text": "boom"})
+        assert ok.result() == {"text": "X"}
+        with pytest.raises(ValueError):
+            bad.result()
+    assert len(runnable.calls) == 1
+
+
+def test_lone_run_waits_at_most_the_latency():
+    runnable = FakeRunnable()
+    batcher = MicroBatcher(max_size=8, max_latency=0.05)
+    started = time.monotonic()
+    assert batcher.invoke(runnable, {"text": "solo"}) == {"text": "SOLO"}
+    assert time.monotonic() - started < 1
+    assert runnable.calls == [[{"text": "solo"}]]
+
+
+class CheckingRunnable(FakeRunnable):
+    # Agents hit cancellation points (e.g. post_log) inside `batch`
+    def batch(self, inputs, return_exceptions=False):
+        check_cancelled()
+        return super().batch(inputs, return_exceptions)
+
+
+def _run_in_scope(task_id, fn, out):
+    def target():
+        with cancel_scope(task_id):
+            try:
+                out[task_id] = fn()
+            except RunCancelled as e:
+                out[task_id] = e
+
+    t = threading.Thread(target=target, daemon=True)
+    t.start()
+    return t
+
+
+def test_leader_cancellation_does_not_fail_its_batch():
+    runnable = CheckingRunnable()
+    batcher = MicroBatcher(max_size=2, max_latency=5.0)
+    out: dict = {}
+    with temp_env(UAI_PROCRASTINATE_INLINE="1"):
+        lead = _run_in_scope(
+            "lead", lambda: batcher.invoke(runnable, {"text": "a"}), out
+        )
+        wait_for(lambda: batcher._open, "open batch")
+        cancel_local("lead")
+        follow = _run_in_scope(
+            "follow", lambda: batcher.invoke(runnable, {"text": "b"}), out
+        )
+        lead.join(5)
+        follow.join(5)
+    assert not lead.is_alive() and not follow.is_alive()
+    assert isinstance(out["lead"], RunCancelled)
+    # The follower sent its input again on its own
+    assert out["follow"] == {"text": "B"}
+    assert runnable.calls == [[{"text": "b"}]]
+
+
+def test_waiting_run_stops_when_cancelled():
+    runnable = FakeRunnable(delay=1.0)
+    batcher = MicroBatcher(max_size=2, max_latency=5.0)
+    out: dict = {}
+    with temp_env(UAI_PROCRASTINATE_INLINE="1"):
+        lead = _run_in_scope(
+            "lead", lambda: batcher.invoke(runnable, {"text": "a"}), out
+        )
+        wait_for(lambda: batcher._open, "open batch")
+        follow = _run_in_scope(
+            "follow", lambda: batcher.invoke(runnable, {"text": "b"}), out
+        )
+        wait_for(lambda: runnable.calls, "batch call")
+        # The follower gives up while the leader's batch is still running
+        cancel_local("follow")
+        follow.join(0.5)
+        assert not follow.is_alive() and "lead" not in out
+        assert isinstance(out["follow"], RunCancelled)
+        lead.join(5)
+    assert out["lead"] == {"text": "A"}
+
+
+class FanOutRunnable:
+    # Like LangChain's default `batch`: one `invoke` per input
+    def invoke(self, inputs):
+        check_cancelled()
+        return {"text": inputs["text"].upper()}
+
+    def batch(self, inputs, return_exceptions=False):
+        out = []
+        for item in inputs:
+            try:
+                out.append(self.invoke(item))
+            except Exception as e:
+                out.append(e)
+        return out
+
+
+def test_cancelled_input_does_not_stop_the_batch():
+    runnable = FanOutRunnable()
+    batcher = MicroBatcher(max_size=3, max_latency=5.0)
+    out: dict = {}
+    with temp_env(UAI_PROCRASTINATE_INLINE="1"):
+        lead = _run_in_scope(
+            "lead", lambda: batcher.invoke(runnable, {"text": "a"}), out
+        )
+        wait_for(lambda: batcher._open, "open batch")
+        follow = _run_in_scope(
+            "follow", lambda: batcher.invoke(runnable, {"text": "b"}), out
+        )
+        wait_for(lambda: len(batcher._open[id(runnable)].inputs) == 2, "follower")
+        cancel_local("follow")
+        follow.join(5)
+        # The third input closes the batch; the cancelled one is still in it
+        last = _run_in_scope(
+            "last", lambda: batcher.invoke(runnable, {"text": "c"}), out
+        )
+        lead.join(5)
+        last.join(5)
+    assert isinstance(out["follow"], RunCancelled)
+    assert out["lead"] == {"text": "A"} and out["last"] == {"text": "C"}
+
+
+def test_inline_langchain_runs_are_batched(agent_app):
+    reset_micro_batcher()
+    app = agent_app(
+        "import time\n"
+        "class Chain:\n"
+        "    calls = []\n"
+        "    def invoke(self, inputs):\n"
+        "        raise AssertionError('not batched')\n"
+        "    def batch(self, inputs, return_exceptions=False):\n"
+        "        self.calls.append(len(inputs))\n"
+        "        time.sleep(0.05)\n"
+        "        return [{'text': i['text'][::-1]} for i in inputs]\n"
+        "chain = Chain()\n",
+        "batched_chain:chain",
+        runtime="langchain",
+        toml="[agent.inline]\nworkers = 4\n"
+        "[agent.batching]\nmax_size = 4\nmax_latency_ms = 500\n",
+    )
+    try:
+        with TestClient(app) as client:
+            words = ["abc", "def", "ghi", "jkl"]
+            ids = [
+                client.post("/run/", json={"input": w}).json()["task_id"] for w in words
+            ]
+            for task_id in ids:
+                wait_for(
+                    lambda: client.get(f"/run/{task_id}").json()["status"]
+                    == "completed",
+                    "batched run",
+                )
+            results = [client.get(f"/run/{t}").json()["result_text"] for t in ids]
+            assert results == [w[::-1] for w in words]
+            stats = get_micro_batcher().stats()
+            assert stats["items"] == 4 and stats["batches"] < 4
+    finally:
+        reset_micro_batcher()
+
+
+def test_batched_invokes_log_to_their_own_run(agent_app, monkeypatch):
+    # LangChain's default `batch` calls `invoke` once per input
+    reset_micro_batcher()
+    app = agent_app(
+        "from unified_agent_interface.utils import patch_log\n"
+        "class Chain:\n"
+        "    def invoke(self, inputs):\n"
+        "        return {'text': inputs['text'].upper()}\n"
+        "    def batch(self, inputs, return_exceptions=False):\n"
+        "        return [self.invoke(i) for i in inputs]\n"
+        "patch_log(Chain.invoke)\n"
+        "chain = Chain()\n",
+        "logged_chain:chain",
+        runtime="langchain",
+        toml="[agent.inline]\nworkers = 2\n"
+        "[agent.batching]\nmax_size = 2\nmax_latency_ms = 5000\n",
+        UAI_LOG_BATCH="0",
+    )
+    try:
+        with TestClient(app) as client:
+            # Inline agents post their logs over HTTP
+            monkeypatch.setattr(utils, "http_client", lambda: client)
+            monkeypatch.setattr(utils, "server_base_url", lambda: "http://testserver")
+            ids = {
+                w: client.post("/run/", json={"input": w}).json()["task_id"]
+                for w in ("lead", "follow")
+            }
+            for task_id in ids.values():
+                wait_for(
+                    lambda: client.get(f"/run/{task_id}").json()["status"]
+                    == "completed",
+                    "batched run",
+                )
+            assert get_micro_batcher().stats()["batches"] == 1
+            for word, task_id in ids.items():
+                up = client.get(f"/run/{task_id}/updates?logs_after=0").json()
+                calls = [
+                    log["message"] for log in up["logs"] if "call" in log["message"]
+                ]
+                assert len(calls) == 1 and f"'{word}'" in calls[0]
+    finally:
+        reset_micro_batcher()
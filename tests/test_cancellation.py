@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from fastapi.testclient import TestClient
+
+from conftest import wait_for
+
+from unified_agent_interface.executor import get_inline_executor
+
+
+def test_cancel_stops_running_agent(looping_app):
+    app, _ = looping_app
+    with TestClient(app) as client:
+        task_id = client.post("/run/", json={}).json()["task_id"]
+        wait_for(
+            lambda: client.get(f"/run/{task_id}").json()["status"] == "running", "start"
+        )
+
+        r = client.post(f"/run/{task_id}/cancel")
+        assert r.json() == {"ok": True, "status": "cancelled"}
+        # The agent thread leaves at its next post_log
+        wait_for(lambda: get_inline_executor().stats()["running"] == 0, "agent to stop")
+        run = client.get(f"/run/{task_id}").json()
+        assert run["status"] == "cancelled"
+        assert run["result_text"] is None
+
+        # A late completion callback does not revive the run; a second cancel conflicts
+        client.post(f"/run/{task_id}/complete", json={"status": "completed"})
+        assert client.get(f"/run/{task_id}").json()["status"] == "cancelled"
+        assert client.post(f"/run/{task_id}/cancel").status_code == 409
+        assert (
+            client.post(f"/run/{task_id}/input", json={"input": "x"}).status_code == 409
+        )
+
+
+def test_cancelled_queued_run_never_starts(looping_app):
+    app, release = looping_app
+    with TestClient(app) as client:
+        first = client.post("/run/", json={}).json()["task_id"]
+        wait_for(
+            lambda: client.get(f"/run/{first}").json()["status"] == "running", "start"
+        )
+        queued = client.post("/run/", json={}).json()["task_id"]
+        assert client.post(f"/run/{queued}/cancel").status_code == 200
+
+        release.touch()
+        wait_for(
+            lambda: client.get(f"/run/{first}").json()["status"] == "completed", "first"
+        )
+        wait_for(lambda: get_inline_executor().stats()["queued"] == 0, "queue to drain")
+        run = client.get(f"/run/{queued}").json()
+        assert run["status"] == "cancelled"
+        assert run["result_text"] is None
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from conftest import temp_env
+
+from unified_agent_interface import completion
+from unified_agent_interface.completion import (
+    CompletionSpool,
+    backoff_delay,
+    deliver_completion,
+    replay_spool,
+)
+from unified_agent_interface.frameworks import utils
+
+
+@pytest.fixture()
+def spool(tmp_path):
+    with temp_env(
+        UAI_COMPLETION_SPOOL=str(tmp_path / "spool"),
+        UAI_COMPLETION_BACKOFF="0.01",
+        UAI_COMPLETION_RETRIES="4",
+    ):
+        yield CompletionSpool()
+
+
+@pytest.fixture()
+def app(agent_app):
+    return agent_app(None, "agent:run")
+
+
+def _serve(monkeypatch, client: httpx.Client) -> None:
+    monkeypatch.setattr(utils, "http_client", lambda: client)
+    monkeypatch.setattr(utils, "server_base_url", lambda: "http://testserver")
+
+
+def _mock(monkeypatch, responses):
+    # Each call consumes the next status; an exception instance is raised
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        outcome = responses.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return httpx.Response(outcome, json={})
+
+    _serve(monkeypatch, httpx.Client(transport=httpx.MockTransport(handler)))
+    return calls
+
+
+def test_backoff_is_jittered_and_capped():
+    for attempt in range(10):
+        delay = backoff_delay(attempt, 0.5, 4.0)
+        assert 0 <= delay <= min(4.0, 0.5 * 2**attempt)
+
+
+def test_retries_transient_failures(monkeypatch, spool):
+    calls = _mock(monkeypatch, [httpx.ConnectError("down"), 503, 200])
+    delays = []
+    assert deliver_completion("t1", {"status": "completed"}, sleep=delays.append)
+    assert len(calls) == 3
+    assert len(delays) == 2
+    assert spool.pending() == 0
+
+
+def test_undeliverable_completion_is_spooled(monkeypatch, spool):
+    _mock(monkeypatch, [502] * 4)
+    assert not deliver_completion("t1", {"status": "failed"}, sleep=lambda s: None)
+    assert spool.pending() == 1
+
+    # A final rejection (run deleted) is dropped rather than spooled
+    _mock(monkeypatch, [404])
+    assert not deliver_completion("t2", {"status": "completed"}, sleep=lambda s: None)
+    assert spool.pending() == 1
+
+
+def test_spool_replays_into_server(monkeypatch, spool, app):
+    with TestClient(app) as client:
+        storage = app.state.storage
+        task = storage.create_run(None, {})
+        storage.update_run(task.id, status="running")
+        spool.put(task.id, {"status": "completed", "result_text": "late"})
+        spool.put("gone", {"status": "completed"})
+
+        # Server unreachable: everything stays
+        _mock(monkeypatch, [httpx.ConnectError("down")] * 2)
+        assert replay_spool(spool) == 0
+        assert spool.pending() == 2
+
+        _serve(monkeypatch, client)
+        assert replay_spool(spool) == 2
+        assert spool.pending() == 0
+        run = client.get(f"/run/{task.id}").json()
+        assert (run["status"], run["result_text"]) == ("completed", "late")
+
+
+def test_complete_is_idempotent(app):
+    with TestClient(app) as client:
+        task = app.state.storage.create_run(None, {})
+        url = f"/run/{task.id}/complete"
+        assert client.post(
+            url, json={"status": "completed", "result_text": "a"}
+        ).json() == {"ok": True}
+        again = client.post(url, json={"status": "failed", "result_text": "b"})
+        assert again.json() == {"ok": True, "status": "completed"}
+        run = client.get(f"/run/{task.id}").json()
+        assert (run["status"], run["result_text"]) == ("completed", "a")
+        stats = client.get("/run/stats").json()
+        assert stats["durations"]["runtime:" + stats["runtime"]]["count"] == 1
+
+
+def test_spool_dir_defaults_next_to_config(tmp_path):
+    (tmp_path / "kosmos.toml").write_text(
+        '[agent]\nruntime = "callable"\nentrypoint = "a:run"\n'
+        '[agent.worker]\nspool_dir = "state/spool"\n'
+    )
+    with temp_env(KOSMOS_TOML=str(tmp_path / "kosmos.toml"), UAI_COMPLETION_SPOOL=None):
+        assert completion.spool_dir() == tmp_path / "state" / "spool"
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import os
+
+import pytest
+
+from unified_agent_interface.config import clear_config_cache, load_kosmos_agent_config
+
+
+def _write(path, entrypoint: str, mtime: int) -> None:
+    path.write_text(f'[agent]\nruntime = "callable"\nentrypoint = "{entrypoint}"\n')
+    os.utime(path, ns=(mtime, mtime))
+
+
+@pytest.fixture()
+def toml(tmp_path, monkeypatch):
+    path = tmp_path / "kosmos.toml"
+    _write(path, "agent:one", 1_000_000_000)
+    monkeypatch.setenv("KOSMOS_TOML", str(path))
+    monkeypatch.setenv("UAI_CONFIG_RELOAD_INTERVAL", "0")
+    clear_config_cache()
+    yield path
+    clear_config_cache()
+
+
+def test_config_is_shared_until_file_changes(toml):
+    cfg = load_kosmos_agent_config()
+    assert load_kosmos_agent_config() is cfg
+    assert load_kosmos_agent_config(str(toml)) is cfg
+    assert cfg.path == str(toml.resolve())
+
+    _write(toml, "agent:two", 2_000_000_000)
+    reloaded = load_kosmos_agent_config()
+    assert reloaded is not cfg
+    assert reloaded.entrypoint == "agent:two"
+    assert cfg.entrypoint == "agent:one"  # old object is never mutated
+
+
+def test_broken_edit_keeps_last_good_config(toml):
+    cfg = load_kosmos_agent_config()
+    toml.write_text("[agent\n")
+    os.utime(toml, ns=(3_000_000_000, 3_000_000_000))
+    assert load_kosmos_agent_config() is cfg
+
+
+def test_reload_interval_throttles_checks(toml, monkeypatch):
+    monkeypatch.setenv("UAI_CONFIG_RELOAD_INTERVAL", "3600")
+    cfg = load_kosmos_agent_config()
+    _write(toml, "agent:two", 2_000_000_000)
+    assert load_kosmos_agent_config() is cfg
+    clear_config_cache()
+    assert load_kosmos_agent_config().entrypoint == "agent:two"
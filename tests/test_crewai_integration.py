@@ -2,40 +2,23 @@ from __future__ import annotations
 
 import time
 import os
-from contextlib import contextmanager
 
 import pytest
 from fastapi.testclient import TestClient
 
+from conftest import temp_env
+
 
 crewai = pytest.importorskip(
     "crewai", reason="CrewAI not installed; skipping integration test"
 )
 
 
-@contextmanager
-def _temp_env(**env):
-    old = {k: os.getenv(k) for k in env}
-    try:
-        for k, v in env.items():
-            if v is None:
-                os.environ.pop(k, None)
-            else:
-                os.environ[k] = v
-        yield
-    finally:
-        for k, v in old.items():
-            if v is None:
-                os.environ.pop(k, None)
-            else:
-                os.environ[k] = v
-
-
 def test_crewai_example_completes():
     from unified_agent_interface.app import get_app
 
     # Point to CrewAI kosmos file
-    with _temp_env(KOSMOS_TOML=os.path.join("examples", "crewai", "kosmos.toml")):
+    with temp_env(KOSMOS_TOML=os.path.join("examples", "crewai", "kosmos.toml")):
         client = TestClient(get_app())
 
         res = client.post("/run/", json={"input": "AI trends"})
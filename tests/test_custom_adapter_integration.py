@@ -1,33 +1,16 @@
 from __future__ import annotations
 
 import os
-from contextlib import contextmanager
 
 from fastapi.testclient import TestClient
 
-
-@contextmanager
-def _temp_env(**env):
-    old = {k: os.getenv(k) for k in env}
-    try:
-        for k, v in env.items():
-            if v is None:
-                os.environ.pop(k, None)
-            else:
-                os.environ[k] = v
-        yield
-    finally:
-        for k, v in old.items():
-            if v is None:
-                os.environ.pop(k, None)
-            else:
-                os.environ[k] = v
+from conftest import temp_env
 
 
 def test_custom_adapter_chat_session():
     from unified_agent_interface.app import get_app
 
-    with _temp_env(
+    with temp_env(
         KOSMOS_TOML=os.path.join("examples", "custom_adapter", "kosmos.toml"),
         UAI_PROCRASTINATE_INLINE="1",
     ):
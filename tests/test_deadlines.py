@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from conftest import temp_env, wait_for
+
+from unified_agent_interface.deadlines import DeadlineWatchdog, resolve_deadline
+from unified_agent_interface.executor import get_inline_executor
+
+
+def test_run_times_out_and_keeps_logs(looping_app):
+    app, _ = looping_app
+    with TestClient(app) as client:
+        r = client.post("/run/", json={"params": {"timeout": 0.3}})
+        task_id = r.json()["task_id"]
+        # The estimate never lies past the deadline
+        eta = datetime.fromisoformat(r.json()["estimated_completion_time"])
+        assert eta <= datetime.utcnow() + timedelta(seconds=1)
+        client.post(f"/run/{task_id}/logs", json={"level": "INFO", "message": "tick"})
+
+        wait_for(
+            lambda: client.get(f"/run/{task_id}").json()["status"] == "timed_out",
+            "deadline",
+        )
+        wait_for(lambda: get_inline_executor().stats()["running"] == 0, "agent to stop")
+        run = client.get(f"/run/{task_id}").json()
+        assert run["status"] == "timed_out"
+        assert run["estimated_completion_time"] is None
+        assert any(log["message"] == "tick" for log in run["logs"])
+
+        # Terminal: a late completion does not override it, a cancel conflicts
+        r = client.post(f"/run/{task_id}/complete", json={"status": "completed"})
+        assert r.json() == {"ok": True, "status": "timed_out"}
+        assert client.post(f"/run/{task_id}/cancel").status_code == 409
+
+
+def test_config_timeout_applies_to_every_run(looping_app):
+    app, _ = looping_app
+    with temp_env(UAI_RUN_TIMEOUT="0.2"), TestClient(app) as client:
+        task_id = client.post("/run/", json={}).json()["task_id"]
+        wait_for(
+            lambda: client.get(f"/run/{task_id}").json()["status"] == "timed_out",
+            "deadline",
+        )
+
+
+def test_run_expiring_in_queue_never_starts(looping_app):
+    app, release = looping_app
+    with TestClient(app) as client:
+        first = client.post("/run/", json={}).json()["task_id"]
+        second = client.post("/run/", json={"params": {"timeout": 0.2}}).json()[
+            "task_id"
+        ]
+        wait_for(
+            lambda: client.get(f"/run/{second}").json()["status"] == "timed_out",
+            "queued run to expire",
+        )
+        release.touch()
+        wait_for(
+            lambda: client.get(f"/run/{first}").json()["status"] == "completed",
+            "first run",
+        )
+        wait_for(
+            lambda: get_inline_executor().stats()["running"] == 0, "queue to drain"
+        )
+        run = client.get(f"/run/{second}").json()
+        assert run["status"] == "timed_out"
+        assert run["logs"] == []
+
+
+def test_invalid_timeout_is_rejected(looping_app):
+    app, _ = looping_app
+    with TestClient(app) as client:
+        r = client.post("/run/", json={"params": {"timeout": "soon"}})
+        assert r.status_code == 400
+        r = client.post("/run/", json={"params": {"deadline": "tomorrow"}})
+        assert r.status_code == 400
+        assert client.get("/run/").json() == []
+
+
+def test_resolve_deadline():
+    now = 1_000_000.0
+    assert resolve_deadline({}, now=now) is None
+    assert resolve_deadline({}, default_timeout=30, now=now) == now + 30
+    # The request timeout replaces the configured default
+    assert resolve_deadline({"timeout": 5}, default_timeout=30, now=now) == now + 5
+    # The earlier of timeout and deadline wins
+    assert resolve_deadline({"timeout": 5, "deadline": now + 2}, now=now) == now + 2
+    assert resolve_deadline({"deadline": "1970-01-12T13:46:40Z"}, now=now) == now
+    with pytest.raises(ValueError):
+        resolve_deadline({"timeout": 0}, now=now)
+
+
+def test_watchdog_fires_in_deadline_order():
+    dog = DeadlineWatchdog()
+    fired = []
+    done = threading.Event()
+    now = time.time()
+    dog.schedule("b", now + 0.1, lambda: fired.append("b"))
+    dog.schedule("a", now + 0.05, lambda: fired.append("a"))
+    dog.schedule("gone", now + 0.02, lambda: fired.append("gone"))
+    dog.discard("gone")
+    dog.schedule("c", now + 0.15, done.set)
+    assert done.wait(2)
+    assert fired == ["a", "b"]
+    assert dog.pending() == 0
+    dog.close()
+
+
+def test_watchdog_prunes_discarded_entries():
+    dog = DeadlineWatchdog()
+    later = time.time() + 3600
+    for i in range(100):
+        dog.schedule(f"run-{i}", later, lambda: None)
+    for i in range(99):
+        dog.discard(f"run-{i}")
+    # Rescheduling the survivor also leaves a stale entry behind
+    for i in range(10):
+        dog.schedule("run-99", later + i, lambda: None)
+    assert dog.pending() == 1
+    assert len(dog._heap) <= 2
+    dog.close()
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from conftest import temp_env, wait_for
+
+from unified_agent_interface.completion import deliver_completion
+from unified_agent_interface.components.storage.sqlite import SQLiteStorage
+from unified_agent_interface.direct import direct_storage, reset_direct_storage
+from unified_agent_interface.frameworks import utils
+
+
+def test_sqlite_notifications_cross_connections(tmp_path):
+    path = str(tmp_path / "uai.db")
+    server, worker = SQLiteStorage(path), SQLiteStorage(path)
+    seen = []
+    stop = threading.Event()
+    thread = threading.Thread(
+        target=server.listen_runs, args=(seen.append, stop), kwargs={"interval": 0.01}
+    )
+    thread.start()
+    try:
+        time.sleep(0.05)
+        worker.notify_run("a")
+        worker.notify_run("a")
+        worker.notify_run("b")
+        wait_for(lambda: "b" in seen, "notifications")
+        assert seen == ["a", "b"]
+    finally:
+        stop.set()
+        thread.join()
+        worker.close()
+        server.close()
+
+
+@pytest.fixture()
+def shared_app(tmp_path, agent_app):
+    reset_direct_storage()
+    yield agent_app(
+        None,
+        "agent:run",
+        toml="[agent.worker]\ndirect_storage = true\n",
+        UAI_STORAGE="sqlite",
+        UAI_STORAGE_PATH=str(tmp_path / "uai.db"),
+        UAI_LOG_BATCH="0",
+        UAI_BASE_URL="http://127.0.0.1:9",  # no HTTP server: writes must go direct
+    )
+    reset_direct_storage()
+
+
+def test_worker_helpers_write_to_shared_storage(shared_app):
+    app = shared_app
+    with TestClient(app) as client:
+        # Stand-in for a run dispatched to a worker process
+        task = app.state.storage.create_run(None, {})
+        app.state.storage.update_run(task.id, status="running")
+        app.state.storage.flush()
+        app.state.run_agent._active.add(task.id)
+
+        worker = direct_storage()
+        assert worker is not None and worker.inner is not app.state.storage.inner
+
+        utils.post_log(task.id, "INFO", "direct log")
+        assert utils.add_run_artifact(task.id, {"name": "out.txt"})["id"]
+        utils.post_wait(task.id, "Your name?")
+        wait_for(
+            lambda: client.get(f"/run/{task.id}").json()["status"] == "waiting_input",
+            "wait status",
+        )
+        assert (
+            client.post(f"/run/{task.id}/input", json={"input": "Ada"}).status_code
+            == 200
+        )
+        assert utils.poll_for_next_input(task.id, 0, timeout_seconds=5) == ("Ada", 1)
+
+        assert deliver_completion(
+            task.id, {"status": "completed", "result_text": "hi Ada", "duration": 1.5}
+        )
+        wait_for(
+            lambda: client.get(f"/run/{task.id}").json()["status"] == "completed",
+            "completion",
+        )
+        run = client.get(f"/run/{task.id}").json()
+        assert run["result_text"] == "hi Ada"
+        assert [log["message"] for log in run["logs"]] == ["direct log"]
+        assert [a["name"] for a in run["artifacts"]] == ["out.txt"]
+
+        # The listener handed the completion to the ETA model
+        wait_for(
+            lambda: client.get("/run/stats")
+            .json()["durations"]
+            .get("runtime:callable"),
+            "duration record",
+        )
+        stats = client.get("/run/stats").json()["durations"]["runtime:callable"]
+        assert stats["count"] == 1
+        assert stats["p50"] == pytest.approx(1.5, rel=0.02)
+
+
+def test_memory_backend_keeps_http(tmp_path):
+    (tmp_path / "kosmos.toml").write_text(
+        '[agent]\nruntime = "callable"\nentrypoint = "agent:run"\n'
+    )
+    reset_direct_storage()
+    with temp_env(
+        KOSMOS_TOML=str(tmp_path / "kosmos.toml"),
+        UAI_STORAGE="memory",
+        UAI_DIRECT_STORAGE="1",
+    ):
+        assert direct_storage() is None
+    reset_direct_storage()
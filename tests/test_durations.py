@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+from conftest import temp_env, wait_for
+
+from unified_agent_interface.components.storage.memory import InMemoryStorage
+from unified_agent_interface.durations import DurationModel, QuantileSketch
+
+
+def test_sketch_quantiles_within_relative_accuracy():
+    sketch = QuantileSketch(relative_accuracy=0.01)
+    for i in range(1, 1001):
+        sketch.add(i / 10)
+    assert sketch.count == 1000
+    assert sketch.quantile(0.5) == pytest.approx(50.0, rel=0.02)
+    assert sketch.quantile(0.9) == pytest.approx(90.0, rel=0.02)
+    assert sketch.quantile(0.99) == pytest.approx(99.0, rel=0.02)
+    assert sketch.quantile(0) == pytest.approx(0.1)
+    assert sketch.quantile(1) == pytest.approx(100.0)
+
+    restored = QuantileSketch.from_dict(sketch.to_dict())
+    assert restored.summary() == sketch.summary()
+    assert QuantileSketch().quantile(0.5) is None
+
+
+def test_model_prefers_entrypoint_then_runtime_then_default():
+    storage = InMemoryStorage()
+    model = DurationModel(storage, default_seconds=5, min_samples=3)
+    assert model.estimate("callable", "a:run") == 5
+
+    for _ in range(3):
+        model.record("callable", "a:run", 2.0)
+    assert model.estimate("callable", "a:run") == pytest.approx(2.0, rel=0.02)
+    # Another entrypoint of the same runtime falls back to the runtime sketch
+    model.record("callable", "b:run", 20.0)
+    assert model.estimate("callable", "b:run") == pytest.approx(2.0, rel=0.02)
+    # Each full round of runs ahead adds one median
+    assert model.estimate("callable", "a:run", ahead=4, capacity=2) == pytest.approx(
+        6.0, rel=0.02
+    )
+    assert model.estimate("callable", "a:run", ahead=1, capacity=2) == pytest.approx(
+        2.0, rel=0.02
+    )
+
+    # Sketches survive through storage
+    reloaded = DurationModel(storage, min_samples=3)
+    assert reloaded.stats()["entrypoint:callable:a:run"]["count"] == 3
+    assert reloaded.stats()["runtime:callable"]["count"] == 4
+
+
+@pytest.fixture()
+def timed_app(agent_app):
+    return agent_app(
+        "import time\ndef run(payload):\n    time.sleep(0.05)\n    return 'ok'\n",
+        "nap_agent:run",
+        toml="[agent.inline]\nworkers = 1\nmax_queue = 10\n",
+    )
+
+
+def test_eta_learns_from_completed_runs(timed_app):
+    with TestClient(timed_app) as client:
+        stats = client.get("/run/stats").json()
+        assert stats["eta_seconds"] == 5
+        assert stats["durations"] == {}
+
+        for _ in range(5):
+            task_id = client.post("/run/", json={}).json()["task_id"]
+            wait_for(
+                lambda: client.get(f"/run/{task_id}").json()["status"] == "completed",
+                "run",
+            )
+
+        stats = client.get("/run/stats").json()
+        ep = stats["durations"]["entrypoint:callable:nap_agent:run"]
+        assert ep["count"] == 5
+        assert 0.04 <= ep["p50"] <= 1.0
+        assert ep["p50"] <= ep["p90"] <= ep["p99"]
+        assert stats["durations"]["runtime:callable"]["count"] == 5
+        assert stats["queue"] == {"ahead": 0, "capacity": 1}
+        assert stats["eta_seconds"] == pytest.approx(ep["p50"])
+
+        # A new run is now expected within about a second, not the default 5 s
+        r = client.post("/run/", json={}).json()
+        eta = datetime.fromisoformat(r["estimated_completion_time"])
+        assert (eta - datetime.utcnow()).total_seconds() < 2
+
+
+def test_worker_run_completed_before_enqueue_returns_is_not_counted(
+    tmp_path, monkeypatch
+):
+    from unified_agent_interface.components.agents import configured
+    from unified_agent_interface.config import load_kosmos_agent_config
+
+    (tmp_path / "kosmos.toml").write_text(
+        '[agent]\nruntime = "callable"\nentrypoint = "nap_agent:run"\n'
+    )
+    cfg = load_kosmos_agent_config(str(tmp_path / "kosmos.toml"))
+    storage = InMemoryStorage()
+    agent = configured.ConfiguredRunAgent(cfg, storage=storage)
+
+    def fast_worker(task_id, **kwargs):
+        # The worker's /complete lands before the enqueue call returns
+        agent.on_complete(storage.get_run(task_id), "completed", 0.1)
+        return "job-1"
+
+    monkeypatch.setattr(configured, "enqueue_run_execute", fast_worker)
+    with temp_env(UAI_PROCRASTINATE_INLINE=None, UAI_RUN_TIMEOUT=None):
+        task = storage.create_run(None, {})
+        agent.on_create(task, None)
+        assert agent._queue_depth()[0] == 0
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import os
+
+from unified_agent_interface.entrypoints import EntrypointCache
+
+
+def _write_agent(path, value: str, mtime: float) -> None:
+    path.write_text(f"def run(payload):\n    return {value!r}\n")
+    os.utime(path, (mtime, mtime))
+
+
+def test_cache_reuses_and_reloads_on_change(tmp_path):
+    src = tmp_path / "cached_agent.py"
+    _write_agent(src, "v1", 1_000_000)
+    cache = EntrypointCache()
+
+    obj, adapter = cache.resolve(
+        "callable", "cached_agent:run", config_dir=str(tmp_path)
+    )
+    again, _ = cache.resolve("callable", "cached_agent:run", config_dir=str(tmp_path))
+    assert again is obj
+    assert obj({}) == "v1"
+    assert adapter.name() == "callable"
+    assert cache.stats() == {"entries": 1, "hits": 1, "misses": 1, "reloads": 0}
+
+    # A newer file on disk replaces the cached object
+    _write_agent(src, "v2", 2_000_000)
+    obj, _ = cache.resolve("callable", "cached_agent:run", config_dir=str(tmp_path))
+    assert obj({}) == "v2"
+    assert cache.stats()["reloads"] == 1
+
+    assert cache.invalidate("cached_agent:run") == 1
+    assert cache.stats()["entries"] == 0
+
+
+def test_disabled_cache_imports_every_time(tmp_path):
+    _write_agent(tmp_path / "uncached_agent.py", "x", 1_000_000)
+    cache = EntrypointCache(enabled=False)
+    for _ in range(2):
+        cache.resolve("callable", "uncached_agent:run", config_dir=str(tmp_path))
+    assert cache.stats() == {"entries": 0, "hits": 0, "misses": 2, "reloads": 0}
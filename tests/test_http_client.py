@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import os
+
+import pytest
+
+from unified_agent_interface.frameworks import utils
+
+
+def test_client_is_shared_and_reopened_after_close():
+    client = utils.http_client()
+    assert utils.http_client() is client
+    utils.close_http_client()
+    assert client.is_closed
+    assert utils.http_client() is not client
+
+
+def test_client_is_not_shared_with_forked_child():
+    if not hasattr(os, "fork"):
+        pytest.skip("fork not available")
+    parent = utils.http_client()
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:  # child
+        ok = utils.http_client() is not parent and not parent.is_closed
+        os.write(write_fd, b"1" if ok else b"0")
+        os._exit(0)
+    os.close(write_fd)
+    os.waitpid(pid, 0)
+    assert os.read(read_fd, 1) == b"1"
+    os.close(read_fd)
+    assert utils.http_client() is parent
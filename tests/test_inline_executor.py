@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from conftest import wait_for
+
+
+@pytest.fixture()
+def blocking_app(tmp_path, agent_app):
+    # The agent blocks until the test creates the release file
+    release = tmp_path / "release"
+    app = agent_app(
+        "import os, time\n"
+        "def run(payload):\n"
+        f"    while not os.path.exists({str(release)!r}):\n"
+        "        time.sleep(0.01)\n"
+        "    return 'done'\n",
+        toml="[agent.inline]\nworkers = 1\nmax_queue = 1\n",
+    )
+    yield app, release
+    release.touch()
+
+
+def _wait_status(client, task_id, status):
+    wait_for(
+        lambda: client.get(f"/run/{task_id}").json()["status"] == status,
+        f"run {task_id} to reach {status}",
+    )
+
+
+def test_create_returns_before_run_finishes(blocking_app):
+    app, release = blocking_app
+    with TestClient(app) as client:
+        task_id = client.post("/run/", json={"input": "x"}).json()["task_id"]
+        assert client.get(f"/run/{task_id}").json()["status"] in ("pending", "running")
+        _wait_status(client, task_id, "running")
+
+        release.touch()
+        _wait_status(client, task_id, "completed")
+        assert client.get(f"/run/{task_id}").json()["result_text"] == "done"
+
+
+def test_queue_depth_limit(blocking_app):
+    app, release = blocking_app
+    with TestClient(app) as client:
+        first = client.post("/run/", json={}).json()["task_id"]
+        _wait_status(client, first, "running")
+        queued = client.post("/run/", json={}).json()["task_id"]
+        assert client.get(f"/run/{queued}").json()["status"] == "pending"
+
+        r = client.post("/run/", json={})
+        assert r.status_code == 503
+        assert r.headers["retry-after"]
+        assert len(client.get("/run/").json()) == 2
+
+        release.touch()
+        _wait_status(client, queued, "completed")
+
+
+def test_parked_job_gives_back_its_slot():
+    from unified_agent_interface.executor import InlineExecutor, parked
+
+    executor = InlineExecutor(workers=1, max_queue=10, max_parked=1)
+    input_ready = threading.Event()
+    parked_seen = threading.Event()
+    order = []
+
+    def waiting_job():
+        order.append("a:start")
+        with parked():
+            assert executor.stats()["parked"] == 1
+            input_ready.wait(5)
+        order.append("a:resumed")
+
+    def other_job():
+        order.append("b")
+        input_ready.set()
+
+    first = executor.submit(waiting_job, on_park=parked_seen.set)
+    assert parked_seen.wait(5)
+    # The only compute slot is free while the first job waits for input
+    executor.submit(other_job).result(5)
+    first.result(5)
+    assert order == ["a:start", "b", "a:resumed"]
+    assert executor.stats()["running"] == 0 and executor.stats()["parked"] == 0
+    executor.shutdown()
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import builtins
+import threading
+
+from unified_agent_interface import runtime
+from unified_agent_interface.runtime import input_handler, install_input_shim
+
+
+def test_concurrent_runs_get_their_own_input(monkeypatch):
+    install_input_shim()
+    install_input_shim()  # idempotent
+    monkeypatch.setattr(runtime, "_real_input", lambda prompt="": f"stdin:{prompt}")
+    shim = builtins.input
+
+    barrier = threading.Barrier(4)
+    results = {}
+
+    def run(task_id: str) -> None:
+        with input_handler(task_id, lambda prompt: f"{task_id}:{prompt}"):
+            barrier.wait()  # all handlers registered before anyone reads
+            results[task_id] = [input("q1"), input("q2")]
+            barrier.wait()  # nobody unregisters while others still read
+
+    threads = [threading.Thread(target=run, args=(f"t{i}",)) for i in range(4)]
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join(5)
+
+    assert results == {f"t{i}": [f"t{i}:q1", f"t{i}:q2"] for i in range(4)}
+    # The shim stays installed; outside a run input() reaches the original
+    assert builtins.input is shim
+    assert input("hi") == "stdin:hi"
+    assert runtime._input_handlers == {}
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import threading
+import time
+
+from unified_agent_interface.frameworks.log_shipper import LogShipper
+from unified_agent_interface.runtime import task_context
+
+
+class _Recorder:
+    def __init__(self, gate: threading.Event | None = None) -> None:
+        self.batches: list[tuple[str, list[str]]] = []
+        self.gate = gate
+
+    def __call__(self, task_id, entries):
+        if self.gate is not None:
+            self.gate.wait(5)
+        self.batches.append((task_id, [e["message"] for e in entries]))
+        return True
+
+
+def test_batches_by_size_and_groups_by_run():
+    send = _Recorder()
+    shipper = LogShipper(batch_size=3, flush_interval=60, send=send)
+    for i in range(3):
+        shipper.enqueue("a" if i < 2 else "b", "INFO", f"m{i}")
+    # A full batch goes out without waiting for the interval
+    assert shipper.flush(timeout=5)
+    assert send.batches == [("a", ["m0", "m1"]), ("b", ["m2"])]
+    assert shipper.stats()["sent"] == 3
+    shipper.close()
+
+
+def test_overflow_policies():
+    gate = threading.Event()
+    send = _Recorder(gate)
+    shipper = LogShipper(batch_size=1, flush_interval=0, max_buffer=2, send=send)
+    shipper.enqueue("a", "INFO", "first")  # taken by the sender, blocked on gate
+    while shipper.stats()["buffered"]:
+        time.sleep(0.001)
+    for msg in ("x1", "x2", "x3"):
+        shipper.enqueue("a", "INFO", msg)
+    assert shipper.stats()["dropped"] == 1  # x1 evicted as the oldest
+    gate.set()
+    shipper.flush(timeout=5)
+    assert [m for _, msgs in send.batches for m in msgs] == ["first", "x2", "x3"]
+    shipper.close()
+
+    newest = LogShipper(
+        max_buffer=1, flush_interval=60, overflow="drop_newest", send=_Recorder()
+    )
+    assert newest.enqueue("a", "INFO", "kept") is True
+    assert newest.enqueue("a", "INFO", "lost") is False
+    assert newest.stats() == {
+        "buffered": 1,
+        "enqueued": 1,
+        "sent": 0,
+        "dropped": 1,
+        "failed": 0,
+    }
+    newest.close()
+
+
+def test_task_context_flushes_pending_logs(monkeypatch):
+    from unified_agent_interface.frameworks import log_shipper, utils
+
+    send = _Recorder()
+    shipper = LogShipper(flush_interval=60, send=send)
+    monkeypatch.setattr(log_shipper, "_shipper", shipper)
+    with task_context("run-1"):
+        utils.post_log(None, "INFO", "hello")
+    assert send.batches == [("run-1", ["hello"])]
+    shipper.close()
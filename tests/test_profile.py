@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import os
+import time
+
+from unified_agent_interface.components.agents.chat_configured import (
+    ConfiguredChatAgent,
+)
+from unified_agent_interface.config import clear_config_cache, load_kosmos_agent_config
+from unified_agent_interface.profile import (
+    clear_execution_profiles,
+    get_execution_profile,
+)
+
+
+def _write_config(path, tracking: str, mtime: float) -> None:
+    path.write_text(
+        "[agent]\n"
+        'runtime = "custom"\n'
+        'adapter = "adapter:MyCustomAdapter"\n'
+        'entrypoint = "app:chain"\n'
+        f'artifacts = {{ tracking = "{tracking}" }}\n'
+    )
+    os.utime(path, (mtime, mtime))
+
+
+def test_profile_built_once_per_config_load(tmp_path, monkeypatch):
+    monkeypatch.setenv("UAI_CONFIG_RELOAD_INTERVAL", "0")
+    monkeypatch.delenv("UAI_ARTIFACTS", raising=False)
+    adapter_src = os.path.join("examples", "custom_adapter", "adapter.py")
+    (tmp_path / "adapter.py").write_text(open(adapter_src).read())
+    toml = tmp_path / "kosmos.toml"
+    _write_config(toml, "off", 1_000_000)
+    clear_config_cache()
+    clear_execution_profiles()
+
+    cfg = load_kosmos_agent_config(str(toml))
+    profile = get_execution_profile(cfg)
+    assert get_execution_profile(cfg) is profile
+    assert profile.artifacts.enabled is False
+    assert profile.artifacts.base_dir == cfg.base_dir
+    assert profile.job_kwargs()["adapter_path"] == "adapter:MyCustomAdapter"
+
+    agent = ConfiguredChatAgent(cfg)
+    _, reply = agent.respond("s1", "hi")
+    assert reply is not None and reply.content == "echo: hi (n=1)"
+    assert agent.profile is profile
+
+    # Editing kosmos.toml yields a new config object and a new profile
+    _write_config(toml, "auto", 2_000_000)
+    time.sleep(0.01)
+    reloaded = agent.profile
+    assert reloaded is not profile
+    assert reloaded.artifacts.enabled is True
+    clear_config_cache()
+    clear_execution_profiles()
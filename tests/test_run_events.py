@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+from unified_agent_interface.api.run import _run_events
+from unified_agent_interface.models.run import LogEntry
+
+
+@pytest.fixture()
+def app(agent_app):
+    return agent_app("def run(payload):\n    return 'ok'\n")
+
+
+def _events(response):
+    event = None
+    for line in response.iter_lines():
+        if line.startswith("event:"):
+            event = line[6:].strip()
+        elif line.startswith("data:"):
+            yield event, json.loads(line[5:])
+
+
+def test_events_replay_finished_run(app):
+    with TestClient(app) as client:
+        task_id = client.post("/run/", json={"input": "x"}).json()["task_id"]
+        for _ in range(100):
+            if client.get(f"/run/{task_id}").json()["status"] == "completed":
+                break
+            time.sleep(0.02)
+        app.state.storage.append_run_log(task_id, LogEntry(message="done"))
+
+        with client.stream("GET", f"/run/{task_id}/events") as r:
+            assert r.headers["content-type"].startswith("text/event-stream")
+            events = list(_events(r))
+
+    assert [e for e, _ in events] == ["status", "log", "complete"]
+    assert events[1][1]["message"] == "done"
+    assert events[2][1] == {"status": "completed", "result_text": "ok"}
+    assert client.get("/run/missing/events").status_code == 404
+
+
+def test_events_follow_mutations(app):
+    hub = app.state.events
+    task = app.state.storage.create_run(None, {})
+
+    with TestClient(app) as client:
+
+        def drive():
+            # Wait until the stream has subscribed, then mutate through the API
+            while hub.subscriber_count(task.id) == 0:
+                time.sleep(0.01)
+            client.post(f"/run/{task.id}/logs", json={"message": "working"})
+            client.post(f"/run/{task.id}/output", json={"text": "Hi "})
+            client.post(f"/run/{task.id}/wait", json={"prompt": "name?"})
+            client.post(f"/run/{task.id}/input", json={"input": "bob"})
+            client.post(
+                f"/run/{task.id}/complete",
+                json={"status": "completed", "result_text": "hi bob"},
+            )
+
+        t = threading.Thread(target=drive)
+        t.start()
+        with client.stream("GET", f"/run/{task.id}/events") as r:
+            events = list(_events(r))
+        t.join()
+
+    names = [e for e, _ in events]
+    assert names[0] == "status" and names[-1] == "complete"
+    assert ("log", "working") in [(e, d.get("message")) for e, d in events]
+    assert ("waiting_input", {"prompt": "name?"}) in events
+    assert ("output", {"text": "Hi "}) in events
+    assert events[-1][1]["result_text"] == "hi bob"
+    assert hub.subscriber_count() == 0
+
+
+def test_events_repeat_a_prompt_asked_again_after_input(app):
+    storage, hub = app.state.storage, app.state.events
+    task = storage.create_run(None, {})
+    storage.update_run(task.id, status="waiting_input", input_prompt="more?")
+
+    async def prompts():
+        stream = _run_events(task.id, storage, hub, 0, 0)
+        asked = 0
+        async for chunk in stream:
+            if not chunk.startswith("event: waiting_input"):
+                continue
+            asked += 1
+            if asked == 2:
+                await stream.aclose()
+                return asked
+            # Answered and asked the same thing again before the stream woke
+            storage.append_run_input(task.id, "yes")
+            storage.update_run(task.id, status="waiting_input", input_prompt="more?")
+
+    asked = asyncio.run(asyncio.wait_for(prompts(), 5))
+    assert asked == 2
+
+
+def test_input_long_poll(app):
+    hub = app.state.events
+    task = app.state.storage.create_run("first", {})
+
+    with TestClient(app) as client:
+        r = client.get(f"/run/{task.id}/input/next?after=0&timeout=0")
+        assert r.json() == {"input": "first", "cursor": 1, "status": "pending"}
+
+        # Nothing new: returns empty once the timeout elapses
+        r = client.get(f"/run/{task.id}/input/next?after=1&timeout=0.05")
+        assert r.json()["input"] is None and r.json()["cursor"] == 1
+
+        def reply():
+            while hub.subscriber_count(task.id) == 0:
+                time.sleep(0.01)
+            client.post(f"/run/{task.id}/input", json={"input": "second"})
+
+        t = threading.Thread(target=reply)
+        t.start()
+        started = time.monotonic()
+        r = client.get(f"/run/{task.id}/input/next?after=1&timeout=30")
+        t.join()
+        assert r.json() == {"input": "second", "cursor": 2, "status": "running"}
+        assert time.monotonic() - started < 5
+
+        assert client.get("/run/missing/input/next?timeout=0").status_code == 404
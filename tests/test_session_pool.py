@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+from unified_agent_interface.frameworks.langchain import LangChainAdapter
+from unified_agent_interface.frameworks.sessions import SessionPool
+
+CHAIN_MODULE = """
+from pathlib import Path
+
+# Record every execution of this module and every chain built
+_log = Path(__file__).with_name("events.log")
+with _log.open("a") as f:
+    f.write("module\\n")
+
+
+class Chain:
+    def __init__(self):
+        self.history = []
+        with _log.open("a") as f:
+            f.write("chain\\n")
+
+    def invoke(self, inputs):
+        self.history.append(inputs["text"])
+        return {"text": "|".join(self.history)}
+
+
+def make_chain():
+    return Chain()
+
+
+chain = Chain()
+"""
+
+
+def test_pool_lru_and_idle_eviction():
+    now = [0.0]
+    built = []
+
+    def factory():
+        built.append(object())
+        return built[-1]
+
+    pool = SessionPool(factory, max_instances=2, idle_timeout=10, clock=lambda: now[0])
+    a = pool.get("a")
+    b = pool.get("b")
+    assert pool.get("a") is a
+    pool.get("c")  # evicts "b", the least recently used
+    assert pool.get("a") is a
+    assert pool.get("b") is not b
+    assert pool.stats()["evicted"] == 2
+
+    now[0] = 100.0
+    assert pool.get("a") is not a
+    assert pool.stats()["expired"] == 2
+    assert pool.stats()["sessions"] == 1
+    assert pool.discard("a") and not pool.discard("a")
+
+
+def test_langchain_sessions_use_factory(tmp_path):
+    (tmp_path / "lc_factory_app.py").write_text(CHAIN_MODULE)
+    adapter = LangChainAdapter()
+    adapter.configure_sessions(
+        "lc_factory_app:chain",
+        config_dir=str(tmp_path),
+        factory="lc_factory_app:make_chain",
+        max_instances=8,
+        idle_timeout=0,
+    )
+    log = tmp_path / "events.log"
+    # Imported once to resolve the factory
+    assert log.read_text().split() == ["module", "chain"]
+
+    def say(session, text):
+        return adapter.chat_respond(
+            "lc_factory_app:chain",
+            session_id=session,
+            user_input=text,
+            state=None,
+            config_dir=str(tmp_path),
+        )
+
+    assert say("s1", "a") == "a"
+    assert say("s1", "b") == "a|b"
+    assert say("s2", "c") == "c"
+    # One chain per session, module not re-executed
+    assert log.read_text().split() == ["module", "chain", "chain", "chain"]
+
+    adapter.end_session("s1")
+    assert say("s1", "d") == "d"
+
+
+def test_langchain_sessions_without_factory_share_the_entrypoint(tmp_path, caplog):
+    (tmp_path / "lc_plain_app.py").write_text(CHAIN_MODULE)
+    adapter = LangChainAdapter()
+
+    def say(session, text):
+        return adapter.chat_respond(
+            "lc_plain_app:chain",
+            session_id=session,
+            user_input=text,
+            state=None,
+            config_dir=str(tmp_path),
+        )
+
+    with caplog.at_level("WARNING"):
+        assert say("s1", "a") == "a"
+        assert say("s2", "b") == "a|b"
+        assert say("s3", "c") == "a|b|c"
+    # The module ran once; no session re-executes it
+    assert (tmp_path / "events.log").read_text().split() == ["module", "chain"]
+    warnings = [r for r in caplog.records if "No session factory" in r.getMessage()]
+    assert len(warnings) == 1
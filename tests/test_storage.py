@@ -0,0 +1,287 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from conftest import temp_env
+
+from unified_agent_interface.components.storage.memory import InMemoryStorage
+from unified_agent_interface.components.storage.sqlite import SQLiteStorage
+from unified_agent_interface.models.chat import Artifact, Message
+from unified_agent_interface.models.run import LogEntry, RunArtifact
+
+
+@pytest.fixture(scope="session")
+def postgres_dsn(tmp_path_factory):
+    """DSN of a real Postgres: `UAI_TEST_POSTGRES_DSN`, else a local `pgserver`."""
+    dsn = os.getenv("UAI_TEST_POSTGRES_DSN")
+    if dsn:
+        yield dsn
+        return
+    pgserver = pytest.importorskip(
+        "pgserver", reason="Set UAI_TEST_POSTGRES_DSN or install pgserver"
+    )
+    server = pgserver.get_server(
+        str(tmp_path_factory.mktemp("pg")), cleanup_mode="stop"
+    )
+    yield server.get_uri()
+    server.cleanup()
+
+
+@pytest.fixture(params=["memory", "sqlite", "postgres"])
+def storage(request, tmp_path):
+    if request.param == "memory":
+        yield InMemoryStorage()
+    elif request.param == "sqlite":
+        s = SQLiteStorage(str(tmp_path / "uai.db"))
+        yield s
+        s.close()
+    else:
+        from psycopg_pool import ConnectionPool
+
+        from unified_agent_interface.components.storage.postgres import (
+            PostgresStorage,
+        )
+
+        dsn = request.getfixturevalue("postgres_dsn")
+        with ConnectionPool(dsn, min_size=1, max_size=2) as pool:
+            with pool.connection() as conn:
+                conn.execute(
+                    "DROP TABLE IF EXISTS uai_run_logs, uai_run_inputs, "
+                    "uai_run_artifacts, uai_runs, uai_chat_messages, "
+                    "uai_chat_artifacts, uai_chats, uai_run_durations"
+                )
+            yield PostgresStorage(pool)
+
+
+def test_run_roundtrip(storage):
+    task = storage.create_run("hello", {"k": "v"})
+    storage.update_run(task.id, status="running", input_prompt="?")
+    storage.append_run_log(task.id, LogEntry(level="INFO", message="one"))
+    storage.append_run_input(task.id, "reply")
+    storage.add_run_artifact(task.id, RunArtifact(id="", name="out.md"))
+
+    got = storage.get_run(task.id)
+    assert got.status == "running"
+    assert got.input_prompt == "?"
+    assert got.params == {"k": "v"}
+    assert got.input_buffer == ["hello", "reply"]
+    assert [log.message for log in got.logs] == ["one"]
+    art_id = got.artifacts[0].id
+    assert art_id
+    assert storage.get_single_run_artifact(task.id, art_id).name == "out.md"
+    assert [t.id for t in storage.list_runs()] == [task.id]
+
+    assert storage.delete_run(task.id) is True
+    assert storage.get_run(task.id) is None
+    assert storage.get_run_artifacts(task.id) is None
+    with pytest.raises(KeyError):
+        storage.append_run_log(task.id, LogEntry(message="late"))
+
+
+def test_run_updates_cursors(storage):
+    task = storage.create_run("first", {})
+    for i in range(3):
+        storage.append_run_log(task.id, LogEntry(message=f"log{i}"))
+
+    # Omitted cursors return no entries, only the current counts
+    up = storage.get_run_updates(task.id)
+    assert (up.logs, up.inputs, up.artifacts) == ([], [], [])
+    assert (up.log_cursor, up.input_cursor, up.artifact_cursor) == (3, 1, 0)
+
+    up = storage.get_run_updates(task.id, logs_after=1, limit=1)
+    assert [log.message for log in up.logs] == ["log1"]
+    assert up.log_cursor == 2
+
+    storage.append_run_input(task.id, "second")
+    storage.add_run_artifact(task.id, RunArtifact(id="a", name="x"))
+    up = storage.get_run_updates(
+        task.id, logs_after=3, inputs_after=1, artifacts_after=0
+    )
+    assert up.logs == [] and up.log_cursor == 3
+    assert up.inputs == ["second"] and up.input_cursor == 2
+    assert [a.id for a in up.artifacts] == ["a"] and up.artifact_cursor == 1
+    assert storage.get_run_updates("missing") is None
+
+
+def test_run_output_appends(storage):
+    task = storage.create_run(None, {})
+    assert storage.get_run_updates(task.id).output_cursor == 0
+    for text in ("Hello", ", ", "wörld"):
+        storage.append_run_output(task.id, text)
+    assert storage.get_run(task.id).partial_result == "Hello, wörld"
+
+    up = storage.get_run_updates(task.id)
+    assert (up.output, up.output_cursor) == ("", 12)
+    up = storage.get_run_updates(task.id, output_after=7)
+    assert (up.output, up.output_cursor) == ("wörld", 12)
+    # Status updates keep the streamed text
+    storage.update_run(task.id, status="completed", result_text="done")
+    assert storage.get_run(task.id).partial_result == "Hello, wörld"
+    with pytest.raises(KeyError):
+        storage.append_run_output("missing", "x")
+
+
+def test_append_run_logs_batch(storage):
+    task = storage.create_run(None, {})
+    storage.append_run_log(task.id, LogEntry(message="single"))
+    storage.append_run_logs(task.id, [LogEntry(message=f"b{i}") for i in range(3)])
+    storage.append_run_logs(task.id, [])
+
+    got = storage.get_run(task.id)
+    assert [log.message for log in got.logs] == ["single", "b0", "b1", "b2"]
+    assert storage.get_run_updates(task.id).log_cursor == 4
+    with pytest.raises(KeyError):
+        storage.append_run_logs("missing", [LogEntry(message="x")])
+
+
+def test_chat_roundtrip(storage):
+    session = storage.create_chat()
+    storage.add_message(session.id, Message(role="user", content="hi"))
+    storage.add_artifact(session.id, Artifact(id="a1", name="notes"))
+
+    assert [m.content for m in storage.get_messages(session.id)] == ["hi"]
+    assert storage.get_artifact(session.id, "a1").name == "notes"
+    assert [c.id for c in storage.list_chats()] == [session.id]
+    assert storage.delete_chat(session.id) is True
+    assert storage.get_messages(session.id) is None
+
+
+def test_run_duration_sketches_roundtrip(storage):
+    assert storage.load_run_durations() == {}
+    storage.save_run_duration("runtime:callable", {"count": 1, "buckets": {"5": 1}})
+    storage.save_run_duration("runtime:callable", {"count": 2, "buckets": {"5": 2}})
+    assert storage.load_run_durations() == {
+        "runtime:callable": {"count": 2, "buckets": {"5": 2}}
+    }
+
+
+def test_run_notifications(storage):
+    if not hasattr(storage, "listen_runs"):
+        pytest.skip("backend is not shared between processes")
+    seen = []
+    stop = threading.Event()
+    thread = threading.Thread(target=storage.listen_runs, args=(seen.append, stop))
+    thread.start()
+    try:
+        for _ in range(100):
+            storage.notify_run("t1")
+            if seen:
+                break
+            time.sleep(0.05)
+        assert seen and set(seen) == {"t1"}
+    finally:
+        stop.set()
+        thread.join()
+
+
+def test_sqlite_persists_across_reopen(tmp_path):
+    path = str(tmp_path / "uai.db")
+    s = SQLiteStorage(path, batch_size=1000, flush_interval=60)
+    task = s.create_run(None, {})
+    s.append_run_log(task.id, LogEntry(message="kept"))
+    s.close()
+
+    reopened = SQLiteStorage(path)
+    got = reopened.get_run(task.id)
+    assert got is not None
+    assert [log.message for log in got.logs] == ["kept"]
+    reopened.close()
+
+
+def test_app_uses_storage_from_env(tmp_path):
+    from unified_agent_interface.app import get_app
+
+    (tmp_path / "agent_mod.py").write_text("def run(payload):\n    return 'ok'\n")
+    (tmp_path / "kosmos.toml").write_text(
+        '[agent]\nruntime = "callable"\nentrypoint = "agent_mod:run"\n'
+    )
+    db = tmp_path / "runs.db"
+    with temp_env(
+        KOSMOS_TOML=str(tmp_path / "kosmos.toml"),
+        UAI_PROCRASTINATE_INLINE="1",
+        UAI_STORAGE="sqlite",
+        UAI_STORAGE_PATH=str(db),
+    ):
+        with TestClient(get_app()) as client:
+            task_id = client.post("/run/", json={"input": "x"}).json()["task_id"]
+            # Inline runs execute on the executor pool; wait for completion
+            for _ in range(100):
+                if client.get(f"/run/{task_id}").json()["status"] == "completed":
+                    break
+                time.sleep(0.02)
+            assert client.get(f"/run/{task_id}").json()["status"] == "completed"
+            client.post(f"/run/{task_id}/logs", json={"message": "late"})
+            r = client.post(
+                f"/run/{task_id}/logs/batch",
+                json={"logs": [{"message": "b1"}, {"level": "WARN", "message": "b2"}]},
+            )
+            assert r.json() == {"ok": True, "count": 2}
+            body = client.get(f"/run/{task_id}/updates?logs_after=0").json()
+            assert [log["message"] for log in body["logs"]] == ["late", "b1", "b2"]
+            assert body["log_cursor"] == 3
+
+            # Appends go straight to storage, which answers 404 for unknown runs
+            for path, body in (
+                ("logs", {"message": "x"}),
+                ("logs/batch", {"logs": [{"message": "x"}]}),
+                ("artifacts", {"name": "a"}),
+                ("wait", {"prompt": "?"}),
+            ):
+                assert client.post(f"/run/missing/{path}", json=body).status_code == 404
+            r = client.post(f"/run/{task_id}/wait", json={"prompt": "?"})
+            assert r.json() == {"ok": False, "status": "completed"}
+
+        # A fresh app over the same file sees the finished run
+        with TestClient(get_app()) as client:
+            body = client.get(f"/run/{task_id}").json()
+            assert body["status"] == "completed"
+            assert body["result_text"] == "ok"
+
+
+def test_retention_expires_and_evicts_runs(tmp_path):
+    from unified_agent_interface.components.storage.memory import RetentionPolicy
+
+    s = InMemoryStorage(
+        RetentionPolicy(
+            run_ttl_seconds=0,
+            max_runs=2,
+            archive_dir=str(tmp_path / "archive"),
+            sweep_interval=0,
+        )
+    )
+    active = s.create_run(None, {})
+    done = s.create_run(None, {})
+    s.update_run(done.id, status="completed")  # expires on the next sweep
+    assert s.get_run(done.id) is not None  # restored from the archive
+    assert s.stats()["runs_expired"] == 1
+    assert s.stats()["restored"] == 1
+
+    # Active runs are never evicted, even over the cap
+    for _ in range(3):
+        s.create_run(None, {})
+    assert s.get_run(active.id).status == "pending"
+    assert s.stats()["runs"] >= 2
+
+
+def test_retention_caps_chats_and_messages():
+    from unified_agent_interface.components.storage.memory import RetentionPolicy
+
+    s = InMemoryStorage(RetentionPolicy(max_chats=2, max_messages_per_chat=2))
+    first = s.create_chat()
+    second = s.create_chat()
+    s.get_chat(first.id)  # touch: `second` is now least recently used
+    s.create_chat()
+    assert s.get_chat(second.id) is None
+    assert s.get_chat(first.id) is not None
+
+    for i in range(5):
+        s.add_message(first.id, Message(role="user", content=str(i)))
+    assert [m.content for m in s.get_messages(first.id)] == ["3", "4"]
+    stats = s.stats()
+    assert stats["chats_evicted"] == 1
+    assert stats["messages_trimmed"] == 3
@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from conftest import wait_for
+
+from unified_agent_interface.frameworks.output_stream import OutputShipper
+
+
+class _Recorder:
+    def __init__(self, fail: int = 0) -> None:
+        self.posts: list[tuple[str, str]] = []
+        self.fail = fail
+        self.lock = threading.Lock()
+
+    def __call__(self, task_id, text):
+        with self.lock:
+            if self.fail:
+                self.fail -= 1
+                return False
+            self.posts.append((task_id, text))
+            return True
+
+
+def test_first_chunk_goes_out_at_once_then_chunks_coalesce():
+    send = _Recorder()
+    shipper = OutputShipper(flush_interval=60, send=send)
+    shipper.enqueue("a", "He")
+    wait_for(lambda: send.posts, "first chunk")
+    for text in ("llo", ", ", "world"):
+        shipper.enqueue("a", text)
+    # The rest waits for the interval (or a flush) and leaves as one post
+    time.sleep(0.1)
+    assert send.posts == [("a", "He")]
+    assert shipper.flush("a", timeout=5)
+    assert send.posts == [("a", "He"), ("a", "llo, world")]
+    assert shipper.stats()["posts"] == 2
+    shipper.close()
+
+
+def test_chunks_flush_by_size_and_survive_failed_sends():
+    send = _Recorder(fail=1)
+    shipper = OutputShipper(flush_interval=0.05, max_chars=4, send=send)
+    shipper.enqueue("a", "ab")
+    shipper.enqueue("a", "cd")
+    shipper.enqueue("b", "xy")
+    assert shipper.flush(timeout=5)
+    text = {t: "".join(s for task, s in send.posts if task == t) for t in "ab"}
+    assert text == {"a": "abcd", "b": "xy"}
+    assert shipper.stats()["failed"] == 1
+    assert shipper.stats()["dropped"] == 0
+    shipper.close()
+
+
+@pytest.fixture()
+def stream_app(tmp_path, agent_app):
+    # Yields one chunk, then holds until the test creates the release file
+    release = tmp_path / "release"
+    app = agent_app(
+        "import os, time\n"
+        "def run(payload):\n"
+        "    yield 'first '\n"
+        f"    while not os.path.exists({str(release)!r}):\n"
+        "        time.sleep(0.01)\n"
+        "    yield 'second'\n"
+        "async def arun(payload):\n"
+        "    yield 'async '\n"
+        "    yield 'chunks'\n",
+        "gen_agent:run",
+    )
+    yield app, release
+    release.touch()
+
+
+def test_generator_output_is_visible_before_the_run_ends(stream_app):
+    app, release = stream_app
+    with TestClient(app) as client:
+        task_id = client.post("/run/", json={"input": "x"}).json()["task_id"]
+        wait_for(
+            lambda: client.get(f"/run/{task_id}").json()["partial_result"] == "first ",
+            "first chunk",
+        )
+        assert client.get(f"/run/{task_id}").json()["status"] == "running"
+        up = client.get(f"/run/{task_id}/updates", params={"output_after": 2}).json()
+        assert (up["output"], up["output_cursor"]) == ("rst ", 6)
+
+        release.touch()
+        wait_for(
+            lambda: client.get(f"/run/{task_id}").json()["status"] == "completed",
+            "run",
+        )
+        data = client.get(f"/run/{task_id}").json()
+        assert data["result_text"] == "first second"
+        assert data["partial_result"] == "first second"
+
+
+def test_async_generator_streams_on_the_loop(stream_app, agent_app):
+    # Same module, async entrypoint
+    with TestClient(agent_app(None, "gen_agent:arun")) as client:
+        task_id = client.post("/run/", json={}).json()["task_id"]
+        wait_for(
+            lambda: client.get(f"/run/{task_id}").json()["status"] == "completed",
+            "async run",
+        )
+        data = client.get(f"/run/{task_id}").json()
+        assert data["result_text"] == data["partial_result"] == "async chunks"
+
+
+def test_langchain_runs_use_stream(agent_app):
+    app = agent_app(
+        "class Chunk(dict):\n"
+        "    def __add__(self, other):\n"
+        "        return Chunk(text=self['text'] + other['text'])\n"
+        "class Chain:\n"
+        "    def invoke(self, inputs):\n"
+        "        raise AssertionError('not streamed')\n"
+        "    def stream(self, inputs):\n"
+        "        for word in inputs['text'].split():\n"
+        "            yield Chunk(text=word.upper() + ' ')\n"
+        "chain = Chain()\n",
+        "stream_chain:chain",
+        runtime="langchain",
+    )
+    with TestClient(app) as client:
+        task_id = client.post("/run/", json={"input": "to be streamed"}).json()[
+            "task_id"
+        ]
+        wait_for(
+            lambda: client.get(f"/run/{task_id}").json()["status"] == "completed",
+            "streamed run",
+        )
+        data = client.get(f"/run/{task_id}").json()
+        assert data["result_text"] == data["partial_result"] == "TO BE STREAMED "
+
+
+def _sse_events(response):
+    event = None
+    for line in response.iter_lines():
+        if line.startswith("event:"):
+            event = line[6:].strip()
+        elif line.startswith("data:"):
+            yield event, json.loads(line[5:])
+
+
+@pytest.fixture()
+def chat_app(agent_app):
+    source = (
+        "import asyncio, threading\n"
+        "class Chain:\n"
+        "    def __init__(self):\n"
+        "        self.turns = 0\n"
+        "    def invoke(self, inputs):\n"
+        "        raise AssertionError('not streamed')\n"
+        "    def stream(self, inputs):\n"
+        "        self.turns += 1\n"
+        "        for word in inputs['text'].split():\n"
+        "            yield {'text': word + str(self.turns) + ' '}\n"
+        "class AsyncChain:\n"
+        "    def invoke(self, inputs):\n"
+        "        raise AssertionError('sync path used')\n"
+        "    async def ainvoke(self, inputs):\n"
+        "        raise AssertionError('not streamed')\n"
+        "    async def astream(self, inputs):\n"
+        "        for ch in inputs['text']:\n"
+        "            await asyncio.sleep(0)\n"
+        "            yield ch + ':' + threading.current_thread().name + ' '\n"
+        "class Plain:\n"
+        "    def invoke(self, inputs):\n"
+        "        return {'text': inputs['text'][::-1]}\n"
+        "chain = Chain()\n"
+        "achain = AsyncChain()\n"
+        "plain = Plain()\n"
+    )
+
+    def _make(entrypoint, factory=None):
+        toml = f'factory = "{factory}"\n' if factory else ""
+        return agent_app(source, entrypoint, runtime="langchain", toml=toml)
+
+    return _make
+
+
+def _stream_turn(client, session_id, text):
+    with client.stream(
+        "POST", f"/chat/{session_id}/stream", json={"user_input": text}
+    ) as r:
+        assert r.headers["content-type"].startswith("text/event-stream")
+        return list(_sse_events(r))
+
+
+def test_chat_stream_emits_tokens_then_stores_the_reply(chat_app):
+    with TestClient(chat_app("chat_chain:chain", "chat_chain:Chain")) as client:
+        session_id = client.post("/chat/").json()["session_id"]
+        for turn in (1, 2):
+            events = _stream_turn(client, session_id, "hi there")
+            assert events[:-1] == [
+                ("token", {"text": f"hi{turn} "}),
+                ("token", {"text": f"there{turn} "}),
+            ]
+            kind, data = events[-1]
+            assert kind == "message"
+            assert data["message"]["role"] == "assistant"
+            assert data["message"]["content"] == f"hi{turn} there{turn} "
+
+        msgs = client.get(f"/chat/{session_id}/messages").json()
+        assert [(m["role"], m["content"]) for m in msgs] == [
+            ("user", "hi there"),
+            ("assistant", "hi1 there1 "),
+            ("user", "hi there"),
+            ("assistant", "hi2 there2 "),
+        ]
+        r = client.post("/chat/missing/stream", json={"user_input": "x"})
+        assert r.status_code == 404
+
+
+def test_chat_stream_uses_astream_on_the_loop(chat_app):
+    with TestClient(chat_app("chat_chain:achain")) as client:
+        session_id = client.post("/chat/").json()["session_id"]
+        events = _stream_turn(client, session_id, "ab")
+        assert events[:-1] == [
+            ("token", {"text": "a:uai-loop "}),
+            ("token", {"text": "b:uai-loop "}),
+        ]
+        assert events[-1][1]["message"]["content"] == "a:uai-loop b:uai-loop "
+
+
+def test_chat_stream_without_stream_replies_in_one_token(chat_app):
+    with TestClient(chat_app("chat_chain:plain")) as client:
+        session_id = client.post("/chat/").json()["session_id"]
+        events = _stream_turn(client, session_id, "abc")
+        assert events == [
+            ("token", {"text": "cba"}),
+            ("message", {"message": events[1][1]["message"], "artifacts": []}),
+        ]
+        assert events[1][1]["message"]["content"] == "cba"